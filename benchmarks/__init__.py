@@ -0,0 +1 @@
+"""Benchmarks for openlinter against synthetic repositories. See bench.py."""
@@ -0,0 +1,302 @@
+#!usr/bin/env python3
+"""
+bench.py
+
+Benchmark the linter against synthetic repositories (see `synthrepo.py`)
+and compare the results of two runs, e.g. before and after a change. Run
+from the openlinter root directory:
+
+$ python -m benchmarks.bench run --scale small
+$ python -m benchmarks.bench compare OLD.json NEW.json
+
+Each public function in `openlinter.rules` is timed against every
+repository shape, as is a whole linter run (`openlinter -d REPO` in a new
+process). Functions that look at one file at a time are timed over a
+sample of the repository's files. Results are saved as JSON named after
+the openlinter commit they were measured at.
+
+Functions
+---------
+run_benchmarks
+    Time every benchmark case against the repositories for a scale.
+
+compare
+    Compare two saved benchmark results.
+
+main
+    Command-line interface.
+
+Constants
+---------
+SAMPLE_FILES
+    Most files used by the per-file benchmark cases.
+"""
+
+import argparse
+import datetime
+import functools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import openlinter.rules as rules
+from openlinter.fsindex import FileIndex
+
+from benchmarks.synthrepo import SCALES, SHAPES, generate
+
+
+SAMPLE_FILES = 1000
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_ROOT = os.path.dirname(_HERE)
+
+
+def benchmark_cases(directory):
+    """Build the benchmark cases for a repository: a zero-argument
+    callable for each public function in openlinter.rules, plus 'main'
+    for a whole linter run.
+
+    Parameters
+    ----------
+    directory : string
+        Path to the repository
+
+    Returns
+    -------
+    dict
+        Maps each case name to the callable to time
+    """
+    files = _sample_files(directory)
+    index = FileIndex(directory)
+    entries = [index.get(path) for path in files]
+    heads = []
+    for path in files:
+        with open(path, 'rb') as f:
+            heads.append(f.read(rules.SNIFF_BYTES))
+    lexer_names = [rules.guess_lexer_name(path) for path in files]
+
+    def each(function, items):
+        return lambda: [function(item) for item in items]
+
+    return {
+        'candidate_lexer_names': each(rules.candidate_lexer_names,
+                                      [os.path.basename(path)
+                                       for path in files]),
+        'check_file_presence': functools.partial(
+            rules.check_file_presence, 'README', directory),
+        'check_files_presence': functools.partial(
+            rules.check_files_presence,
+            ['README', 'LICENSE', 'COPYING', 'CONTRIBUTING'], directory),
+        'check_for_file_content': each(rules.check_for_file_content, files),
+        'check_for_code': functools.partial(rules.check_for_code,
+                                            directory),
+        'detect_version_control': functools.partial(
+            rules.detect_version_control, directory),
+        'check_multiple_branches': functools.partial(
+            rules.check_multiple_branches, directory),
+        'check_for_develop_branch': functools.partial(
+            rules.check_for_develop_branch, directory, 'develop'),
+        'find_develop_branches': functools.partial(
+            rules.find_develop_branches, directory, ['develop', 'feature']),
+        'check_for_flagged_terms': functools.partial(
+            rules.check_for_flagged_terms, directory),
+        'check_for_languages': functools.partial(rules.check_for_languages,
+                                                 directory),
+        'check_for_multiple_commits': functools.partial(
+            rules.check_for_multiple_commits, directory),
+        'check_for_secrets': functools.partial(rules.check_for_secrets,
+                                               directory),
+        'check_for_signed_commits': functools.partial(
+            rules.check_for_signed_commits, directory),
+        'get_file_text': each(functools.partial(
+            rules.get_file_text, max_bytes=rules.MAX_GUESS_BYTES), files),
+        'guess_code_present': each(rules.guess_code_present, files),
+        'guess_lexer_name': each(rules.guess_lexer_name, files),
+        'guess_entry_lexer_name': each(functools.partial(
+            rules.guess_entry_lexer_name, index), entries),
+        'is_code_lexer': each(rules.is_code_lexer, lexer_names),
+        'looks_binary': each(rules.looks_binary, heads),
+        'warm_up': rules.warm_up,
+        'main': functools.partial(_run_linter, directory),
+    }
+
+
+def run_benchmarks(repos, repeat=3, cases=None, report=print):
+    """Time the benchmark cases against each repository.
+
+    Parameters
+    ----------
+    repos : dict
+        Maps each shape to its repository, as returned by
+        synthrepo.generate
+    repeat : int
+        How many times to time each case
+    cases : list of strings or None
+        Names of the cases to run; all of them if None
+    report : callable
+        Called with a line of progress for each case
+
+    Returns
+    -------
+    dict
+        Maps each shape to a dict from case name to its timings in
+        seconds: 'first' (the first run, with cold caches), 'min' and
+        'median'
+    """
+    results = {}
+    for shape, directory in sorted(repos.items()):
+        results[shape] = {}
+        for name, case in sorted(benchmark_cases(directory).items()):
+            if cases and name not in cases:
+                continue
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                case()
+                times.append(time.perf_counter() - start)
+            results[shape][name] = {'first': times[0], 'min': min(times),
+                                    'median': statistics.median(times)}
+            report('{:10} {:28} {:10.4f}s'.format(shape, name, min(times)))
+    return results
+
+
+def compare(old, new, threshold=0.1, report=print):
+    """Compare two saved benchmark results and report the change in the
+    minimum time of every case they share.
+
+    Parameters
+    ----------
+    old, new : dict
+        Saved results, as written by main
+    threshold : float
+        Relative change above which a case is marked as slower (or below
+        minus which it is marked as faster)
+    report : callable
+        Called with each line of the comparison
+
+    Returns
+    -------
+    list of tuples of (string, string, float)
+        Shape, case and ratio of new to old time for the cases that got
+        slower by more than the threshold
+    """
+    report('{} ({}) -> {} ({}), {} scale'.format(
+        old['commit'][:12], old['date'], new['commit'][:12], new['date'],
+        new['scale']))
+    slower = []
+    for shape in sorted(set(old['results']) & set(new['results'])):
+        for name in sorted(set(old['results'][shape]) &
+                           set(new['results'][shape])):
+            before = old['results'][shape][name]['min']
+            after = new['results'][shape][name]['min']
+            ratio = after / before if before else float('inf')
+            marker = ''
+            if ratio > 1 + threshold:
+                marker = '  slower'
+                slower.append((shape, name, ratio))
+            elif ratio < 1 - threshold:
+                marker = '  faster'
+            report('{:10} {:28} {:10.4f}s {:10.4f}s {:7.2f}x{}'.format(
+                shape, name, before, after, ratio, marker))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark openlinter against synthetic repositories.')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    run_parser = subparsers.add_parser(
+        'run', help='Generate the repositories (if needed) and time every '
+        'benchmark case against them.')
+    run_parser.add_argument('--scale', choices=sorted(SCALES),
+                            default='small')
+    run_parser.add_argument('--shapes', nargs='+', choices=SHAPES,
+                            default=list(SHAPES))
+    run_parser.add_argument('--cases', nargs='+', metavar='CASE',
+                            help='Only run these cases.')
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--repos', metavar='DIR',
+                            default=os.path.join(_HERE, 'repos'),
+                            help='Where to keep the generated repositories.')
+    run_parser.add_argument('-o', '--output', metavar='FILE',
+                            help='Where to save the results. Defaults to '
+                            'benchmarks/results/COMMIT-SCALE.json.')
+
+    compare_parser = subparsers.add_parser(
+        'compare', help='Compare two saved results.')
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=0.1)
+
+    args = parser.parse_args(argv)
+    if args.command == 'compare':
+        with open(args.old) as f:
+            old = json.load(f)
+        with open(args.new) as f:
+            new = json.load(f)
+        return 1 if compare(old, new, args.threshold) else 0
+
+    repos = generate(args.repos, args.scale, args.shapes, args.seed)
+    commit, dirty = _openlinter_commit()
+    saved = {
+        'commit': commit,
+        'dirty': dirty,
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'scale': args.scale,
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': run_benchmarks(repos, args.repeat, args.cases),
+    }
+    output = args.output or os.path.join(
+        _HERE, 'results', '{}{}-{}.json'.format(
+            commit[:12], '-dirty' if dirty else '', args.scale))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(saved, f, indent=2, sort_keys=True)
+    print('results saved to {}'.format(output))
+    return 0
+
+
+def _sample_files(directory):
+    # The first SAMPLE_FILES files in sorted order, skipping .git
+    files = []
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames[:] = sorted(d for d in dirnames if d != '.git')
+        for name in sorted(filenames):
+            files.append(os.path.join(dirpath, name))
+            if len(files) >= SAMPLE_FILES:
+                return files
+    return files
+
+
+def _run_linter(directory):
+    subprocess.run([sys.executable, '-m', 'openlinter.openlinter', '-d',
+                    directory], cwd=_ROOT, check=True,
+                   stdout=subprocess.DEVNULL)
+
+
+def _openlinter_commit():
+    # The commit being benchmarked, and whether the tree has changes
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=_ROOT,
+            stderr=subprocess.DEVNULL).decode().strip()
+        status = subprocess.check_output(
+            ['git', 'status', '--porcelain', '--untracked-files=no'],
+            cwd=_ROOT, stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+    return commit, bool(status.strip())
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,279 @@
+#!usr/bin/env python3
+"""
+synthrepo.py
+
+Generate synthetic git repositories for benchmarking the linter. Every
+repository is built from a seeded random number generator and fixed commit
+dates, so the same scale and seed always give the same files and the same
+commit SHAs. Repositories are written with `git fast-import` and checked
+out with `git reset --hard`, which only needs git itself (no network).
+
+Each scale has one repository per shape:
+
+files
+    A wide tree of many small files, none of which is code, so the code
+    check has to look at every one of them
+deep
+    Directories nested many levels deep, a few files in each
+binaries
+    Large binary files, some with names that make the code check read
+    them
+branches
+    A short history with thousands of branches
+history
+    A long linear history on one branch
+
+Functions
+---------
+generate
+    Generate (or reuse) the repositories for a scale.
+
+generate_shape
+    Generate the repository for one shape at one scale.
+
+Constants
+---------
+SCALES
+    The size settings for each scale.
+
+SHAPES
+    Names of the repository shapes.
+"""
+
+import json
+import os
+import random
+import shutil
+import subprocess
+
+
+SHAPES = ('files', 'deep', 'binaries', 'branches', 'history')
+
+SCALES = {
+    'small': {'files': 1000, 'depth': 20, 'binaries': 4, 'binary_mb': 1,
+              'branches': 100, 'commits': 200},
+    'medium': {'files': 20000, 'depth': 100, 'binaries': 8, 'binary_mb': 16,
+               'branches': 1000, 'commits': 5000},
+    'large': {'files': 100000, 'depth': 250, 'binaries': 16, 'binary_mb': 64,
+              'branches': 5000, 'commits': 50000},
+}
+
+# Bump when the generated content changes, so old repositories are rebuilt
+GENERATOR_VERSION = 1
+
+# Extensions of files that aren't code: no lexer, or a structured text one
+_TEXT_EXTENSIONS = ('.csv', '.dat', '.log', '.rst', '.tex', '.po', '.svg')
+
+_WORDS = ('lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur',
+          'adipiscing', 'elit', 'sed', 'do', 'eiusmod', 'tempor')
+
+_IDENTITY = 'Bench <bench@example.com>'
+
+# Commit dates start here and go up a minute per commit
+_EPOCH = 1500000000
+
+
+def generate(root, scale, shapes=SHAPES, seed=0):
+    """Generate the repositories for a scale under root/scale/, reusing
+    any that were already generated with the same settings.
+
+    Parameters
+    ----------
+    root : string
+        Directory to keep the generated repositories in
+    scale : string
+        One of the keys of SCALES
+    shapes : iterable of strings
+        Which of SHAPES to generate
+    seed : int
+        Seed for the random content
+
+    Returns
+    -------
+    dict
+        Maps each shape to the path of its repository
+    """
+    return dict((shape, generate_shape(root, scale, shape, seed))
+                for shape in shapes)
+
+
+def generate_shape(root, scale, shape, seed=0):
+    """Generate the repository for one shape at one scale, unless it was
+    already generated with the same settings.
+
+    Parameters
+    ----------
+    root : string
+        Directory to keep the generated repositories in
+    scale : string
+        One of the keys of SCALES
+    shape : string
+        One of SHAPES
+    seed : int
+        Seed for the random content
+
+    Returns
+    -------
+    string
+        Path to the repository
+    """
+    settings = dict(SCALES[scale], shape=shape, seed=seed,
+                    version=GENERATOR_VERSION)
+    path = os.path.join(root, scale, shape)
+    marker = path + '.json'
+    try:
+        with open(marker) as f:
+            if json.load(f) == settings:
+                return path
+    except (OSError, ValueError):
+        pass
+
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.makedirs(path)
+    _git(path, 'init', '-q')
+    rng = random.Random('{}-{}-{}'.format(seed, scale, shape))
+    process = subprocess.Popen(['git', 'fast-import', '--quiet'], cwd=path,
+                               stdin=subprocess.PIPE)
+    try:
+        _STREAMS[shape](_FastImport(process.stdin), rng, SCALES[scale])
+    finally:
+        process.stdin.close()
+        if process.wait() != 0:
+            raise RuntimeError('git fast-import failed for ' + path)
+    _git(path, 'symbolic-ref', 'HEAD', 'refs/heads/main')
+    _git(path, 'reset', '-q', '--hard')
+
+    with open(marker, 'w') as f:
+        json.dump(settings, f)
+    return path
+
+
+class _FastImport(object):
+    # Writes a git fast-import stream
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.commits = 0
+
+    def commit(self, message, files, parent=None, ref='refs/heads/main'):
+        # files: list of (path, bytes or callable writing chunks)
+        self.commits += 1
+        date = _EPOCH + 60 * self.commits
+        self._write('commit {}\nmark :{}\n'.format(ref, self.commits))
+        for role in ('author', 'committer'):
+            self._write('{} {} {} +0000\n'.format(role, _IDENTITY, date))
+        self._data(message.encode())
+        if parent is not None:
+            self._write('from :{}\n'.format(parent))
+        for path, content in files:
+            self._write('M 100644 inline {}\n'.format(path))
+            self._data(content)
+        self._write('\n')
+        return self.commits
+
+    def branch(self, ref, mark):
+        self._write('reset {}\nfrom :{}\n\n'.format(ref, mark))
+
+    def _data(self, content):
+        if callable(content):
+            size, chunks = content()
+            self._write('data {}\n'.format(size))
+            for chunk in chunks:
+                self.stream.write(chunk)
+        else:
+            self._write('data {}\n'.format(len(content)))
+            self.stream.write(content)
+        self._write('\n')
+
+    def _write(self, text):
+        self.stream.write(text.encode())
+
+
+def _text(rng, lines=5):
+    return ''.join(' '.join(rng.choice(_WORDS) for _ in range(8)) + '\n'
+                   for _ in range(lines)).encode()
+
+
+def _docs(rng):
+    # Documentation files for the files_exist checks
+    return [('README', _text(rng)), ('LICENSE', _text(rng)),
+            ('CONTRIBUTING', b'')]
+
+
+def _files_stream(fast_import, rng, settings):
+    # Spread the files out a hundred to a directory, two levels deep
+    files = _docs(rng)
+    for n in range(settings['files']):
+        path = 'd{:03d}/d{:03d}/f{:06d}{}'.format(
+            n // 10000, n // 100 % 100, n, rng.choice(_TEXT_EXTENSIONS))
+        files.append((path, _text(rng, rng.randint(1, 20))))
+    fast_import.commit('many files', files)
+
+
+def _deep_stream(fast_import, rng, settings):
+    files = _docs(rng)
+    directory = ''
+    for level in range(settings['depth']):
+        directory += 'l{:03d}/'.format(level)
+        for n in range(3):
+            files.append((directory + 'f{}{}'.format(
+                n, rng.choice(_TEXT_EXTENSIONS)), _text(rng)))
+    # The only code is at the bottom
+    files.append((directory + 'main.c', b'int main(void) { return 0; }\n'))
+    fast_import.commit('deep tree', files)
+
+
+def _binaries_stream(fast_import, rng, settings):
+    size = settings['binary_mb'] * 1024 * 1024
+    def binary(seed):
+        def chunks():
+            chunk_rng = random.Random(seed)
+            remaining = size
+            while remaining:
+                n = min(remaining, 1024 * 1024)
+                remaining -= n
+                yield chunk_rng.randbytes(n)
+        return lambda: (size, chunks())
+    files = _docs(rng)
+    for n in range(settings['binaries']):
+        # .inc names match several lexers, so these have to be sniffed;
+        # .png names match none and are never read
+        name = 'firmware{:02d}.inc' if n % 2 else 'asset{:02d}.png'
+        files.append(('blobs/' + name.format(n), binary(rng.random())))
+    fast_import.commit('binaries', files)
+
+
+def _branches_stream(fast_import, rng, settings):
+    marks = [fast_import.commit('initial', _docs(rng))]
+    for n in range(1, max(2, settings['commits'] // 10)):
+        marks.append(fast_import.commit(
+            'commit {}'.format(n), [('notes.rst', _text(rng))],
+            parent=marks[-1]))
+    for n in range(settings['branches']):
+        fast_import.branch('refs/heads/topic-{:05d}'.format(n),
+                           rng.choice(marks))
+
+
+def _history_stream(fast_import, rng, settings):
+    marks = [fast_import.commit('initial', _docs(rng))]
+    for n in range(1, settings['commits']):
+        files = [('notes.rst', _text(rng))]
+        if n % 100 == 0:
+            files.append(('src/module{:05d}.py'.format(n),
+                          b'def f():\n    return 1\n'))
+        marks.append(fast_import.commit('commit {}'.format(n), files,
+                                        parent=marks[-1]))
+
+
+_STREAMS = {
+    'files': _files_stream,
+    'deep': _deep_stream,
+    'binaries': _binaries_stream,
+    'branches': _branches_stream,
+    'history': _history_stream,
+}
+
+
+def _git(path, *args):
+    subprocess.check_call(('git',) + args, cwd=path)
@@ -0,0 +1,143 @@
+#!usr/bin/env python3
+"""
+batch.py
+
+Check many directories/repositories in one run by fanning the checks
+out over a pool of worker processes. Used by `openlinter.py` when the
+linter is run with `--batch` or `--batch-file`.
+
+Functions
+---------
+lint_many
+    Check each directory against a rule set, yielding results as each
+    directory finishes.
+
+read_directory_list
+    Collect directory paths from the command line, a file, or stdin.
+"""
+
+from __future__ import absolute_import
+
+import concurrent.futures
+import sys
+
+import openlinter.openlinter as linter
+from openlinter.results import ERROR, Result
+
+
+# Rule set and lint_directory options (cache, state...) for the current
+# worker process, set once by _init_worker so that they are not pickled
+# and sent with every directory
+_worker_rule_set = None
+_worker_options = None
+
+
+def lint_many(directories, rule_set, jobs=None, **options):
+    """Check each directory against a rule set, spreading the work over
+    a pool of processes, and yield the output for each directory as soon
+    as it is done.
+
+    Parameters
+    ----------
+    directories : iterable of strings
+        Paths to the directories to check
+    rule_set : dict
+        Contains the structured data from the parsed configuration file
+    jobs : int or None
+        Number of worker processes. None uses the number of CPUs; 1 runs
+        every check in the current process.
+    **options
+        Passed on to openlinter.lint_directory for every directory
+        (cache, state, ref, mirrors). A cache or state is shared by all
+        the workers; with a state, the output for each directory ends
+        with how many of its checks were reused.
+
+    Yields
+    ------
+    tuple of (string, list of results.Result)
+        The directory path and the results of checking it, in the order
+        that the directories finish
+    """
+    if jobs == 1:
+        for directory in directories:
+            yield _lint_one(directory, rule_set, options)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs, initializer=_init_worker,
+            initargs=(rule_set, options)) as executor:
+        futures = [executor.submit(_lint_in_worker, directory)
+                   for directory in directories]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+
+
+def read_directory_list(paths=None, path_file=None):
+    """Collect the directories to check in batch mode.
+
+    Paths given directly come first, followed by the paths listed in
+    path_file. If neither is given, paths are read from stdin. Blank
+    lines and lines starting with # are skipped.
+
+    Parameters
+    ----------
+    paths : list of strings or None
+        Directory paths given on the command line
+    path_file : string or None
+        Path to a file listing one directory per line, or - for stdin
+
+    Returns
+    -------
+    list of strings
+        Paths to the directories to check
+    """
+    directories = list(paths or [])
+    if path_file == '-' or (not directories and path_file is None):
+        directories.extend(_parse_directory_lines(sys.stdin))
+    elif path_file is not None:
+        with open(path_file, 'r') as f:
+            directories.extend(_parse_directory_lines(f))
+    return directories
+
+
+def _parse_directory_lines(lines):
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield line
+
+
+def _init_worker(rule_set, options):
+    global _worker_rule_set, _worker_options
+    _worker_rule_set = rule_set
+    _worker_options = options
+
+
+def _lint_in_worker(directory):
+    return _lint_one(directory, _worker_rule_set, _worker_options)
+
+
+def _lint_one(directory, rule_set, options):
+    output = []
+    cache = options.get('cache')
+    state = options.get('state')
+    try:
+        if state is not None:
+            # Count reuse per directory
+            state.hits = state.misses = 0
+        linter.lint_directory(directory, rule_set, report=output.append,
+                              **options)
+        if state is not None:
+            def report(result):
+                result.directory = directory
+                output.append(result)
+            linter.report_reuse(state, report)
+    except Exception as e:
+        # One broken repository shouldn't stop the whole batch
+        output.append(Result('lint', ERROR, 'could not check {}: {}'
+                             .format(directory, e), directory=directory))
+    if cache is not None:
+        # Worker processes aren't told when the batch ends, so write out
+        # cached results after each directory
+        cache.flush()
+    return directory, output
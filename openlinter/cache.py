@@ -0,0 +1,263 @@
+#!usr/bin/env python3
+"""
+cache.py
+
+A persistent cache of file classification results (the name of the
+Pygments lexer guessed for a file), so that unchanged files and identical
+files shared between repositories are only classified once.
+
+Results are stored in an SQLite database, which lets several linter
+processes read and write the same cache at once. The least recently used
+results are evicted once the cache holds more than a set number.
+
+Classes
+-------
+ClassificationCache
+    On-disk, size-capped LRU cache of lexer names.
+
+Functions
+---------
+blob_key
+    Returns the cache key for a file with a known git blob SHA.
+
+file_key
+    Returns the cache key for a file in a working tree.
+"""
+
+import os
+import threading
+import time
+
+
+DEFAULT_MAX_ENTRIES = 100000
+
+CACHE_FILENAME = 'classify.sqlite3'
+
+# Pending LRU timestamp updates are written out after this many lookups
+_FLUSH_EVERY = 500
+
+
+class ClassificationCache(object):
+    """Size-capped, least-recently-used cache of lexer names stored in an
+    SQLite database file.
+
+    An empty string is stored for files that have no lexer (binary files,
+    unrecognized text), so that these are not classified again either.
+
+    Parameters
+    ----------
+    path : string
+        Path to the database file, or to a directory to create it in
+    max_entries : int
+        Number of results to keep; the least recently used are evicted
+    """
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES):
+        if os.path.isdir(path):
+            path = os.path.join(path, CACHE_FILENAME)
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._connection = None
+        self._pid = None
+        self._touched = {}
+        self._added = {}
+        # Checks on several threads, or requests to a server, share it
+        self._lock = threading.RLock()
+
+    def get(self, key):
+        """Look up the lexer name cached for a key.
+
+        Parameters
+        ----------
+        key : string
+            Cache key, as returned by file_key
+
+        Returns
+        -------
+        string or None
+            The lexer name ('' if the file had no lexer), or None if the
+            key is not in the cache
+        """
+        with self._lock:
+            if key in self._added:
+                self.hits += 1
+                return self._added[key]
+            row = self._connect().execute(
+                'SELECT lexer FROM lexers WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched[key] = _now()
+            self._maybe_flush()
+            return row[0]
+
+    def put(self, key, lexer_name):
+        """Store the lexer name for a key.
+
+        Parameters
+        ----------
+        key : string
+            Cache key, as returned by file_key
+        lexer_name : string or None
+            The lexer name, or None if no lexer was found
+        """
+        with self._lock:
+            self._added[key] = lexer_name or ''
+            self._maybe_flush()
+
+    def flush(self):
+        """Write pending results and timestamps to the database and evict
+        the least recently used results if the cache is over its size."""
+        with self._lock:
+            if not self._added and not self._touched:
+                return
+            connection = self._connect()
+            now = _now()
+            with connection:
+                connection.executemany(
+                    'INSERT OR REPLACE INTO lexers (key, lexer, last_used) '
+                    'VALUES (?, ?, ?)',
+                    [(k, v, now) for k, v in self._added.items()])
+                connection.executemany(
+                    'UPDATE lexers SET last_used = ? WHERE key = ?',
+                    [(t, k) for k, t in self._touched.items()])
+                count = connection.execute(
+                    'SELECT COUNT(*) FROM lexers').fetchone()[0]
+                if count > self.max_entries:
+                    connection.execute(
+                        'DELETE FROM lexers WHERE key IN (SELECT key FROM '
+                        'lexers ORDER BY last_used LIMIT ?)',
+                        (count - self.max_entries,))
+            self._added.clear()
+            self._touched.clear()
+
+    def close(self):
+        """Flush pending writes and close the database connection."""
+        self.flush()
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        self.flush()
+        with self._lock:
+            return self._connect().execute(
+                'SELECT COUNT(*) FROM lexers').fetchone()[0]
+
+    def _connect(self):
+        # Connections can't be shared with forked worker processes, so
+        # each process opens its own
+        if self._connection is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            import sqlite3
+            connection = sqlite3.connect(self.path, timeout=60,
+                                         check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            with connection:
+                connection.execute(
+                    'CREATE TABLE IF NOT EXISTS lexers ('
+                    'key TEXT PRIMARY KEY, lexer TEXT NOT NULL, '
+                    'last_used REAL NOT NULL)')
+                connection.execute(
+                    'CREATE INDEX IF NOT EXISTS lexers_last_used '
+                    'ON lexers (last_used)')
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def _maybe_flush(self):
+        if len(self._added) + len(self._touched) >= _FLUSH_EVERY:
+            self.flush()
+
+    def __getstate__(self):
+        # Sent to worker processes without the open connection
+        state = self.__dict__.copy()
+        state.update(_connection=None, _pid=None, _added={}, _touched={})
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+
+def file_key(filename, stat, limits, index_entry=None):
+    """Make the cache key for a file in a working tree.
+
+    Files whose content is known to match a blob in the git index are
+    keyed by the blob SHA, so that identical files in different
+    repositories share one result. Other files are keyed by device, inode,
+    size and modification time. The file name, the limits on reading the
+    file and the Pygments version are part of the key, since they all
+    affect which lexer is guessed.
+
+    Parameters
+    ----------
+    filename : string
+        The file name, without any directory part
+    stat : os.stat_result
+        Stat data of the file
+    limits : tuple of (int, int)
+        The sniff_bytes and max_read_bytes the file is classified with
+    index_entry : gitrepo.IndexEntry or None
+        The git index entry for the file, if it is tracked
+
+    Returns
+    -------
+    string
+        Key for the cache
+    """
+    if index_entry is not None and index_entry.matches_stat(stat):
+        return blob_key(filename, index_entry.sha, limits)
+    identity = 'stat:{}:{}:{}:{}'.format(stat.st_dev, stat.st_ino,
+                                        stat.st_size, stat.st_mtime_ns)
+    return '{}:{}:{}'.format(_namespace(limits), identity, filename)
+
+
+def blob_key(filename, sha, limits):
+    """Make the cache key for a file whose git blob SHA is known.
+
+    Parameters
+    ----------
+    filename : string
+        The file name, without any directory part
+    sha : string
+        Hex SHA of the file's blob
+    limits : tuple of (int, int)
+        The sniff_bytes and max_read_bytes the file is classified with
+
+    Returns
+    -------
+    string
+        Key for the cache
+    """
+    return '{}:blob:{}:{}'.format(_namespace(limits), sha, filename)
+
+
+def _now():
+    return time.time()
+
+
+def _namespace(limits):
+    # Results guessed by another Pygments, or from more or less of the
+    # file, may differ
+    return '{}:{}:{}'.format(_pygments_version(), *limits)
+
+
+def _pygments_version():
+    # Only the top-level package, which is quick to import
+    import pygments
+    return pygments.__version__
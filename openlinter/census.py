@@ -0,0 +1,187 @@
+#!usr/bin/env python3
+"""
+census.py
+
+Count the files and bytes of each language in a directory, the way
+GitHub's linguist breaks a repository down by language. Unlike
+rules.check_for_code, which stops at the first code file, a census has to
+classify every file, so the paths are sent in batches to a pool of worker
+processes. Each worker builds Pygments' lexer lookup tables once, when it
+starts, and sends back a LanguageCensus for each batch; the censuses are
+added up as they come back. Censuses run on the threads of the scheduler,
+the server and Linter, so the workers are started from a fresh process
+(forkserver, or spawn where there is none) instead of forked from this
+one. Used by rules.check_for_languages.
+
+Classes
+-------
+LanguageCensus
+    Files and bytes per language, and whether any of the files are code.
+
+Functions
+---------
+count_languages
+    Returns the LanguageCensus for files in a directory, using a pool of
+    processes.
+
+Constants
+---------
+BATCH_SIZE
+    Most paths sent to a worker at a time.
+"""
+
+import concurrent.futures
+import multiprocessing
+import os
+
+import openlinter.rules as rules
+
+# Large enough that pickling a batch and its result costs little next to
+# classifying it, small enough to keep every worker busy to the end
+BATCH_SIZE = 256
+
+
+class LanguageCensus(object):
+    """How many files and bytes of each language were found.
+
+    Attributes
+    ----------
+    files : dict
+        Maps each Pygments lexer name to the number of files
+    bytes : dict
+        Maps each Pygments lexer name to the total size of its files
+    """
+    __slots__ = ('files', 'bytes')
+
+    def __init__(self):
+        self.files = {}
+        self.bytes = {}
+
+    def __repr__(self):
+        return '<LanguageCensus {} languages>'.format(len(self.files))
+
+    @property
+    def code(self):
+        """True if any of the languages is code (see
+        rules.is_code_lexer), as rules.check_for_code would find."""
+        return any(rules.is_code_lexer(name) for name in self.files)
+
+    def add(self, language, size):
+        """Count one file.
+
+        Parameters
+        ----------
+        language : string or None
+            The file's lexer name; files without one aren't counted
+        size : int
+            The file's size in bytes
+        """
+        if not language:
+            return
+        self.files[language] = self.files.get(language, 0) + 1
+        self.bytes[language] = self.bytes.get(language, 0) + size
+
+    def update(self, other):
+        """Add the counts of another LanguageCensus to these."""
+        for language, files in other.files.items():
+            self.files[language] = self.files.get(language, 0) + files
+            self.bytes[language] = (self.bytes.get(language, 0) +
+                                    other.bytes[language])
+
+    def breakdown(self):
+        """Return the languages, largest first.
+
+        Returns
+        -------
+        list of tuples of (string, int, int, float)
+            Each language's name, files, bytes and share of all the bytes
+            counted (0 to 1), by bytes and then by name
+        """
+        total = sum(self.bytes.values())
+        return [(language, self.files[language], self.bytes[language],
+                 self.bytes[language] / total if total else 0.0)
+                for language in sorted(self.files,
+                                       key=lambda l: (-self.bytes[l], l))]
+
+
+def count_languages(root, relpaths, sniff_bytes=rules.SNIFF_BYTES,
+                    max_bytes=rules.MAX_GUESS_BYTES, jobs=None,
+                    batch_size=BATCH_SIZE):
+    """Classify files on disk and count them by language.
+
+    Parameters
+    ----------
+    root : string
+        Path to the directory the files are in
+    relpaths : list of strings
+        Paths to the files, relative to root
+    sniff_bytes, max_bytes : int
+        How much of each file to read, as for rules.guess_lexer_name
+    jobs : int or None
+        Number of worker processes. None uses the number of CPUs; 1, or
+        no more than one batch of files, classifies them in the current
+        process.
+    batch_size : int
+        Most paths sent to a worker at a time
+
+    Returns
+    -------
+    tuple of (LanguageCensus, dict)
+        The counts, and the lexer names of the files that had to be read
+        to be classified (by relative path), for caching
+    """
+    census = LanguageCensus()
+    guessed = {}
+    batches = [relpaths[i:i + batch_size]
+               for i in range(0, len(relpaths), batch_size)]
+    if jobs == 1 or len(batches) < 2:
+        for batch in batches:
+            _add(census, guessed,
+                 _classify_batch(root, batch, sniff_bytes, max_bytes))
+        return census, guessed
+
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs, mp_context=_pool_context(),
+            initializer=_init_worker) as executor:
+        futures = [executor.submit(_classify_batch, root, batch,
+                                   sniff_bytes, max_bytes)
+                   for batch in batches]
+        for future in concurrent.futures.as_completed(futures):
+            _add(census, guessed, future.result())
+    return census, guessed
+
+
+def _add(census, guessed, result):
+    batch_census, batch_guessed = result
+    census.update(batch_census)
+    guessed.update(batch_guessed)
+
+
+def _pool_context():
+    # Locks held by other threads (the import lock, logging's,
+    # GitPython's) would stay held forever in a forked worker
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+def _init_worker():
+    # Built once per worker instead of once per batch
+    rules.warm_up()
+
+
+def _classify_batch(root, relpaths, sniff_bytes, max_bytes):
+    census = LanguageCensus()
+    guessed = {}
+    for relpath in relpaths:
+        path = os.path.join(root, relpath)
+        try:
+            size = os.path.getsize(path)
+            lexer_name = rules.guess_lexer_name(path, sniff_bytes, max_bytes)
+        except OSError:
+            # Removed or unreadable since the directory was listed
+            continue
+        census.add(lexer_name, size)
+        if len(rules.candidate_lexer_names(os.path.basename(path))) > 1:
+            guessed[relpath] = lexer_name
+    return census, guessed
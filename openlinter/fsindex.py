@@ -0,0 +1,269 @@
+#!usr/bin/env python3
+"""
+fsindex.py
+
+An in-memory index of a directory tree, built with `os.scandir` so that
+each directory is listed once and each file is stat'ed at most once per
+linter run. The file-based rules in `rules.py` query the index instead of
+listing and stat'ing the filesystem themselves.
+
+Classes
+-------
+Entry
+    A file or directory in the index, with cached stat results.
+
+FileIndex
+    Lazily scanned, cached index of the files under a directory.
+"""
+
+import heapq
+import os
+import threading
+
+from openlinter.instrument import record
+
+
+class Entry(object):
+    """A file or directory found while scanning a FileIndex.
+
+    Attributes
+    ----------
+    name : string
+        The file name, without any directory part
+    relpath : string
+        Path relative to the root of the index
+    path : string
+        Path including the root of the index
+    is_file : boolean
+        True if this is a file (or a symlink to one)
+    is_dir : boolean
+        True if this is a directory (or a symlink to one)
+    is_link : boolean
+        True if this is a symlink
+    """
+    __slots__ = ('name', 'relpath', 'path', 'is_file', 'is_dir', 'is_link',
+                 '_dir_entry', '_stat')
+
+    def __init__(self, dir_entry, relpath):
+        self.name = dir_entry.name
+        self.relpath = relpath
+        self.path = dir_entry.path
+        self.is_file = _safe_call(dir_entry.is_file)
+        self.is_dir = _safe_call(dir_entry.is_dir)
+        self.is_link = _safe_call(dir_entry.is_symlink)
+        self._dir_entry = dir_entry
+        self._stat = None
+
+    def __repr__(self):
+        return '<Entry {!r}>'.format(self.relpath)
+
+    @property
+    def ext(self):
+        """The lowercased file extension, including the dot, or ''."""
+        return os.path.splitext(self.name)[1].lower()
+
+    @property
+    def stat(self):
+        """The os.stat_result for this entry, following symlinks. Only
+        fetched the first time it is needed."""
+        if self._stat is None:
+            record('stats')
+            self._stat = self._dir_entry.stat()
+        return self._stat
+
+    @property
+    def size(self):
+        """The size of the file in bytes."""
+        return self.stat.st_size
+
+
+class FileIndex(object):
+    """Index of the files and directories under a root directory.
+
+    Directories are scanned on first use and the listing is kept, so
+    the checks for file presence, file content and code can all share
+    one pass over the tree.
+
+    Parameters
+    ----------
+    directory : string
+        Path to the root directory of the index
+    ignore : ignore.IgnoreRules or None
+        Rules for files and directories to leave out of iter_files;
+        ignored directories are pruned and never listed
+    """
+
+    def __init__(self, directory, ignore=None):
+        self.directory = directory
+        self.ignore = ignore
+        self._listings = {}
+        # Checks on several threads share the index
+        self._lock = threading.Lock()
+
+    def listdir(self, relpath=''):
+        """Return the entries in a directory of the index, scanning it if
+        it has not been scanned yet.
+
+        Parameters
+        ----------
+        relpath : string
+            Path to the directory relative to the index root; '' for the
+            root itself
+
+        Returns
+        -------
+        list of Entry
+            The entries in the directory, in the order the OS lists them
+
+        Raises
+        ------
+        OSError (e.g. FileNotFoundError) if the directory can't be listed
+        """
+        listing = self._listings.get(relpath)
+        if listing is None:
+            with self._lock:
+                listing = self._listings.get(relpath)
+                if listing is None:
+                    path = os.path.join(self.directory, relpath)
+                    record('dirs_listed')
+                    with os.scandir(path) as it:
+                        listing = [Entry(d, os.path.join(relpath, d.name))
+                                   for d in it]
+                    self._listings[relpath] = listing
+        return listing
+
+    def open(self, entry):
+        """Open a file in the index for reading its content.
+
+        Parameters
+        ----------
+        entry : Entry
+            A file entry from this index
+
+        Returns
+        -------
+        file object
+            The file, opened for reading bytes
+        """
+        return open(entry.path, 'rb')
+
+    def iter_files(self):
+        """Yield every file under the root, walking top-down like
+        os.walk. Directories that can't be listed are skipped, and
+        symlinks to directories are not followed. If the index has ignore
+        rules, ignored files are left out and ignored directories are not
+        walked into.
+
+        Yields
+        ------
+        Entry
+            Each file entry in the tree
+        """
+        pending = ['']
+        while pending:
+            relpath = pending.pop()
+            try:
+                entries = self.listdir(relpath)
+            except OSError:
+                continue
+            ignore = self.ignore
+            if ignore is not None:
+                ignore.visit_directory(relpath, entries, self)
+            subdirs = []
+            for entry in entries:
+                if (ignore is not None and
+                        ignore.is_ignored(entry.relpath, entry.is_dir)):
+                    continue
+                if entry.is_file:
+                    yield entry
+                elif entry.is_dir and not entry.is_link:
+                    subdirs.append(entry.relpath)
+            # Reversed so that subdirectories are visited in listing order
+            pending.extend(reversed(subdirs))
+
+    def iter_files_by(self, priority):
+        """Yield every file under the root, like iter_files, but best
+        first instead of top-down. Each file and directory costs what its
+        directory costs plus priority(entry), and the cheapest is visited
+        next, so a directory is only listed once nothing cheaper is left.
+
+        Parameters
+        ----------
+        priority : callable
+            Called with each file and directory Entry; returns a number,
+            lower for entries to visit sooner. Ties go to entries nearer
+            the root, then to listing order.
+
+        Yields
+        ------
+        Entry
+            Each file entry in the tree, cheapest first
+        """
+        order = 0
+        # (cost, depth, order, entry); the root has no entry
+        pending = [(0, 0, order, None)]
+        while pending:
+            cost, depth, _, item = heapq.heappop(pending)
+            if item is not None and item.is_file:
+                yield item
+                continue
+            relpath = '' if item is None else item.relpath
+            try:
+                entries = self.listdir(relpath)
+            except OSError:
+                continue
+            ignore = self.ignore
+            if ignore is not None:
+                ignore.visit_directory(relpath, entries, self)
+            for entry in entries:
+                if (ignore is not None and
+                        ignore.is_ignored(entry.relpath, entry.is_dir)):
+                    continue
+                if entry.is_file or (entry.is_dir and not entry.is_link):
+                    order += 1
+                    heapq.heappush(pending, (cost + priority(entry),
+                                             depth + 1, order, entry))
+
+    def get(self, path):
+        """Look up the entry for a path in the index.
+
+        Parameters
+        ----------
+        path : string
+            Path to a file or directory, either relative to the index
+            root or including it
+
+        Returns
+        -------
+        Entry or None
+            The entry for the path, or None if it is not in the index
+        """
+        relpath = self.relpath(path)
+        parent, name = os.path.split(relpath)
+        try:
+            entries = self.listdir(parent)
+        except OSError:
+            return None
+        for entry in entries:
+            if entry.name == name:
+                return entry
+        return None
+
+    def relpath(self, path):
+        """Return a path relative to the index root."""
+        root = os.path.normpath(self.directory)
+        path = os.path.normpath(path)
+        if path == root:
+            return ''
+        if root == '.':
+            return path
+        if path.startswith(root + os.sep):
+            return path[len(root) + 1:]
+        return path
+
+
+def _safe_call(method):
+    try:
+        return method()
+    except OSError:
+        return False
@@ -0,0 +1,534 @@
+#!usr/bin/env python3
+"""
+gitrepo.py
+
+Read-only helpers that get information straight from the files in a git
+repository's `.git` directory, without starting a `git` process.
+
+Classes
+-------
+CommitGraph
+    Parent lookups from a git commit-graph file.
+
+GitContext
+    A repository opened once and shared by all the version control rules.
+
+IndexEntry
+    Stat data and blob SHA recorded in the git index for one file.
+
+Functions
+---------
+find_git_dir
+    Returns the path to the git directory of a working tree, if any.
+
+open_repository
+    Returns a GitContext for a path, or the GitContext it is given.
+
+read_refs
+    Reads ref names and SHAs from loose ref files and packed-refs.
+
+read_commit_graph
+    Reads the commit-graph file of a repository, if it has one.
+
+read_index
+    Parses the git index file into a dict of tracked file stat data
+    and blob SHAs.
+"""
+
+import os
+import struct
+import threading
+
+
+# Fixed-size part of an index entry: ctime, mtime (seconds and
+# nanoseconds), dev, ino, mode, uid, gid, size, SHA-1 and flags
+_INDEX_ENTRY = struct.Struct('>10I20sH')
+
+
+class GitContext(object):
+    """A git repository opened once per linter run, so that every version
+    control rule can share what has been read from it.
+
+    Branch names are read straight from the ref files in the git
+    directory. A GitPython Repo is only created for rules that need to
+    look at objects, and then only once.
+
+    Parameters
+    ----------
+    repository : string
+        Path to a git working tree or bare repository
+
+    Raises
+    ------
+    git.NoSuchPathError if repository is not a path to a directory
+    git.InvalidGitRepositoryError if repository is a path to a directory
+        but not a git repository
+    """
+
+    def __init__(self, repository):
+        if not os.path.isdir(repository):
+            import git
+            raise git.NoSuchPathError(repository)
+        git_dir = find_git_dir(repository)
+        if git_dir is None:
+            import git
+            raise git.InvalidGitRepositoryError(repository)
+        self.path = repository
+        self.git_dir = git_dir
+        self.common_dir = _find_common_dir(git_dir)
+        self._branches = None
+        self._repo = None
+        self._commit_graph = None
+        self._lock = threading.Lock()
+
+    @property
+    def branches(self):
+        """Dict mapping each local branch name to the SHA (or symbolic ref)
+        it points to, read from refs/heads and packed-refs."""
+        if self._branches is None:
+            self._branches = read_refs(self.common_dir, 'refs/heads/')
+        return self._branches
+
+    @property
+    def head(self):
+        """The commit SHA that HEAD points to, or None for a repository
+        with no commits yet."""
+        try:
+            with open(os.path.join(self.git_dir, 'HEAD'), 'r') as f:
+                return self.resolve(f.read().strip())
+        except OSError:
+            return None
+
+    @property
+    def repo(self):
+        """A git.Repo for the repository, created on first use. It talks
+        to long-running git processes, so only one thread should use it at
+        a time."""
+        with self._lock:
+            if self._repo is None:
+                import git
+                self._repo = git.Repo(self.path)
+            return self._repo
+
+    @property
+    def commit_graph(self):
+        """The repository's CommitGraph, or None if it has no readable
+        commit-graph file. Read on first use."""
+        if self._commit_graph is None:
+            self._commit_graph = read_commit_graph(self.common_dir) or False
+        return self._commit_graph or None
+
+    def resolve(self, ref_value):
+        """Follow a branch value to a commit SHA.
+
+        Parameters
+        ----------
+        ref_value : string
+            A SHA or 'ref: refs/heads/<name>', as found in branches
+
+        Returns
+        -------
+        string or None
+            The commit SHA, or None if the ref can't be resolved
+        """
+        seen = set()
+        while ref_value and ref_value.startswith('ref:'):
+            target = ref_value[len('ref:'):].strip()
+            if target in seen or not target.startswith('refs/heads/'):
+                return None
+            seen.add(target)
+            ref_value = self.branches.get(target[len('refs/heads/'):])
+        return ref_value
+
+    def commit_parents(self, sha):
+        """Return the SHAs of a commit's parents, from the commit-graph
+        file if the commit is in it, or else from the commit object.
+
+        Parameters
+        ----------
+        sha : string
+            SHA of a commit
+
+        Returns
+        -------
+        list of strings
+            The parents' SHAs; empty for a root commit
+        """
+        graph = self.commit_graph
+        if graph is not None:
+            parents = graph.parents(sha)
+            if parents is not None:
+                return parents
+        return [parent.hexsha for parent in self.repo.commit(sha).parents]
+
+    def count_commits(self, sha, limit):
+        """Count the commits reachable from a commit, stopping once limit
+        have been found, so the cost depends on limit and not on the
+        length of the history.
+
+        Parameters
+        ----------
+        sha : string
+            SHA of the commit to start from
+        limit : int
+            Most commits to count
+
+        Returns
+        -------
+        int
+            The number of reachable commits, or limit if there are more
+        """
+        seen = {sha}
+        pending = [sha]
+        while pending and len(seen) < limit:
+            for parent in self.commit_parents(pending.pop()):
+                if parent not in seen:
+                    seen.add(parent)
+                    pending.append(parent)
+        return min(len(seen), limit)
+
+    def refresh(self):
+        """Forget the branches and commit-graph read so far, so that they
+        are read again when next used. The git.Repo stays open."""
+        self._branches = None
+        self._commit_graph = None
+
+    def close(self):
+        """Release the git.Repo and any git processes it has open."""
+        if self._repo is not None:
+            self._repo.close()
+            self._repo = None
+
+
+def open_repository(repository):
+    """Return a GitContext for a repository, reusing it if one is given.
+
+    Parameters
+    ----------
+    repository : string or GitContext
+        Path to a git repository, or an already open GitContext
+
+    Returns
+    -------
+    GitContext
+    """
+    if isinstance(repository, GitContext):
+        return repository
+    return GitContext(repository)
+
+
+def read_refs(git_dir, prefix='refs/'):
+    """Read refs from the loose ref files and packed-refs file of a git
+    directory. Loose refs take precedence, as they do in git.
+
+    Parameters
+    ----------
+    git_dir : string
+        Path to the git directory (the common directory for worktrees)
+    prefix : string
+        Only refs whose full name starts with this are read; it is
+        stripped from the returned names
+
+    Returns
+    -------
+    dict
+        Maps each ref name (without prefix) to its SHA, or to
+        'ref: <target>' for a symbolic ref
+    """
+    refs = {}
+    try:
+        with open(os.path.join(git_dir, 'packed-refs'), 'r') as f:
+            for line in f:
+                # Skip the header and peeled tag lines
+                if line.startswith(('#', '^')):
+                    continue
+                parts = line.split()
+                if len(parts) == 2 and parts[1].startswith(prefix):
+                    refs[parts[1][len(prefix):]] = parts[0]
+    except OSError:
+        pass
+
+    ref_root = os.path.join(git_dir, *prefix.rstrip('/').split('/'))
+    for root, dirs, files in os.walk(ref_root):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                with open(path, 'r') as f:
+                    value = f.read().strip()
+            except OSError:
+                continue
+            if value:
+                ref = os.path.relpath(path, ref_root).replace(os.sep, '/')
+                refs[ref] = value
+    return refs
+
+
+class CommitGraph(object):
+    """Parent lookups from a git commit-graph file
+    (objects/info/commit-graph), which git writes so that history can be
+    walked without reading each commit object.
+
+    Parameters
+    ----------
+    data : bytes
+        Contents of the commit-graph file
+
+    Raises
+    ------
+    ValueError if data is not a commit-graph file this can read
+    """
+    _NO_PARENT = 0x70000000
+    _EXTRA_EDGES = 0x80000000
+    _LAST_EDGE = 0x80000000
+
+    def __init__(self, data):
+        if data[:4] != b'CGPH' or data[4] != 1 or data[5] != 1:
+            raise ValueError('unsupported commit-graph file')
+        chunk_count = data[6]
+        chunks = {}
+        for i in range(chunk_count + 1):
+            chunk_id, offset = struct.unpack_from('>4sQ', data, 8 + 12 * i)
+            chunks[chunk_id] = offset
+        for required in (b'OIDF', b'OIDL', b'CDAT'):
+            if required not in chunks:
+                raise ValueError('commit-graph file has no {} chunk'.format(
+                    required.decode()))
+        self._data = data
+        self._fanout = struct.unpack_from('>256I', data, chunks[b'OIDF'])
+        self._oids = chunks[b'OIDL']
+        self._commits = chunks[b'CDAT']
+        self._edges = chunks.get(b'EDGE')
+        self.count = self._fanout[255]
+
+    def __len__(self):
+        return self.count
+
+    def position(self, sha):
+        """Return the position of a commit in the graph, or None."""
+        oid = bytes.fromhex(sha)
+        low = self._fanout[oid[0] - 1] if oid[0] else 0
+        high = self._fanout[oid[0]]
+        while low < high:
+            middle = (low + high) // 2
+            start = self._oids + 20 * middle
+            found = self._data[start:start + 20]
+            if found == oid:
+                return middle
+            elif found < oid:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def sha(self, position):
+        """Return the SHA of the commit at a position in the graph."""
+        start = self._oids + 20 * position
+        return self._data[start:start + 20].hex()
+
+    def parents(self, sha):
+        """Return the SHAs of a commit's parents.
+
+        Parameters
+        ----------
+        sha : string
+            SHA of a commit
+
+        Returns
+        -------
+        list of strings or None
+            The parents' SHAs, or None if the commit isn't in the graph
+        """
+        position = self.position(sha)
+        if position is None:
+            return None
+        first, second = struct.unpack_from(
+            '>II', self._data, self._commits + 36 * position + 20)
+        positions = []
+        if first != self._NO_PARENT:
+            positions.append(first)
+        if second & self._EXTRA_EDGES and self._edges is not None:
+            # Octopus merge: the rest of the parents are in the EDGE chunk
+            edge = self._edges + 4 * (second & ~self._EXTRA_EDGES)
+            while True:
+                value, = struct.unpack_from('>I', self._data, edge)
+                positions.append(value & ~self._LAST_EDGE)
+                if value & self._LAST_EDGE:
+                    break
+                edge += 4
+        elif second != self._NO_PARENT:
+            positions.append(second)
+        return [self.sha(p) for p in positions]
+
+
+def read_commit_graph(git_dir):
+    """Read the commit-graph file of a git directory.
+
+    Parameters
+    ----------
+    git_dir : string
+        Path to the git directory
+
+    Returns
+    -------
+    CommitGraph or None
+        None if there is no commit-graph file or it can't be read
+    """
+    try:
+        with open(os.path.join(git_dir, 'objects', 'info', 'commit-graph'),
+                  'rb') as f:
+            return CommitGraph(f.read())
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+class IndexEntry(object):
+    """Stat data and blob SHA recorded in the git index for one file."""
+    __slots__ = ('path', 'sha', 'size', 'mtime', 'mtime_ns', 'ino')
+
+    def __init__(self, path, sha, size, mtime, mtime_ns, ino):
+        self.path = path
+        self.sha = sha
+        self.size = size
+        self.mtime = mtime
+        self.mtime_ns = mtime_ns
+        self.ino = ino
+
+    def matches_stat(self, stat):
+        """Check whether a file's current stat data agrees with the index,
+        in which case the file still has the content of the indexed blob.
+
+        Parameters
+        ----------
+        stat : os.stat_result
+            Current stat data of the file in the working tree
+
+        Returns
+        -------
+        boolean
+            True if size and modification time match the index entry
+        """
+        if (stat.st_size & 0xffffffff) != self.size:
+            return False
+        if int(stat.st_mtime) & 0xffffffff != self.mtime:
+            return False
+        # Some systems record whole seconds only
+        return (self.mtime_ns == 0 or
+                stat.st_mtime_ns % 1000000000 == self.mtime_ns)
+
+
+def find_git_dir(directory):
+    """Find the git directory for a working tree or bare repository.
+
+    Parameters
+    ----------
+    directory : string
+        Path to a working tree or a bare repository
+
+    Returns
+    -------
+    string or None
+        Path to the git directory, or None if directory isn't a repository
+    """
+    dot_git = os.path.join(directory, '.git')
+    if os.path.isfile(dot_git):
+        # Worktrees and submodules use a "gitdir: <path>" file
+        with open(dot_git, 'r') as f:
+            line = f.readline().strip()
+        if line.startswith('gitdir:'):
+            dot_git = os.path.join(directory, line[len('gitdir:'):].strip())
+    for git_dir in (dot_git, directory):
+        if _is_git_dir(git_dir):
+            return git_dir
+    return None
+
+
+def _is_git_dir(path):
+    # The same test GitPython uses: a HEAD file and an objects directory
+    # (which a linked worktree keeps in its common directory)
+    if not os.path.isfile(os.path.join(path, 'HEAD')):
+        return False
+    return (os.path.isdir(os.path.join(path, 'objects')) or
+            os.path.isfile(os.path.join(path, 'commondir')))
+
+
+def _find_common_dir(git_dir):
+    # Linked worktrees keep their refs in the main repository's git dir
+    try:
+        with open(os.path.join(git_dir, 'commondir'), 'r') as f:
+            common_dir = f.read().strip()
+    except OSError:
+        return git_dir
+    return os.path.normpath(os.path.join(git_dir, common_dir))
+
+
+def read_index(git_dir):
+    """Parse the index file in a git directory (versions 2 to 4).
+
+    Parameters
+    ----------
+    git_dir : string
+        Path to the git directory (usually path/to/repository/.git)
+
+    Returns
+    -------
+    dict
+        Maps each tracked path (relative to the working tree, using /) to
+        an IndexEntry. Empty if there is no readable index. Files
+        modified in the same second as the index are left out.
+    """
+    try:
+        with open(os.path.join(git_dir, 'index'), 'rb') as f:
+            data = f.read()
+            index_mtime = int(os.fstat(f.fileno()).st_mtime)
+    except OSError:
+        return {}
+    if len(data) < 12 or data[:4] != b'DIRC':
+        return {}
+    version, count = struct.unpack('>II', data[4:12])
+    if version not in (2, 3, 4):
+        return {}
+
+    entries = {}
+    offset = 12
+    path = b''
+    for _ in range(count):
+        fields = _INDEX_ENTRY.unpack_from(data, offset)
+        (ctime, ctime_ns, mtime, mtime_ns, dev, ino, mode, uid, gid,
+         size, sha, flags) = fields
+        start = offset
+        offset += _INDEX_ENTRY.size
+        if flags & 0x4000:
+            # Extended flags, version 3 and up
+            offset += 2
+        if version == 4:
+            # Path is prefix-compressed against the previous entry
+            strip, offset = _read_offset_varint(data, offset)
+            end = data.index(b'\0', offset)
+            path = path[:len(path) - strip] + data[offset:end]
+            offset = end + 1
+        else:
+            end = data.index(b'\0', offset)
+            path = data[offset:end]
+            # Entries are NUL-padded to a multiple of 8 bytes
+            offset = start + ((end - start) // 8 + 1) * 8
+        # Only stage 0 (not conflicted) entries describe the working tree.
+        # Files changed in the same second the index was written may have
+        # changed without their stat data changing ("racily clean"), so
+        # their SHA can't be trusted.
+        if (flags >> 12) & 0x3 == 0 and mtime < index_mtime:
+            name = path.decode('utf-8', 'surrogateescape')
+            entries[name] = IndexEntry(name, sha.hex(), size, mtime,
+                                       mtime_ns, ino)
+    return entries
+
+
+def _read_offset_varint(data, offset):
+    # git's "offset" varint encoding, used by index version 4
+    byte = data[offset]
+    offset += 1
+    value = byte & 0x7f
+    while byte & 0x80:
+        byte = data[offset]
+        offset += 1
+        value = ((value + 1) << 7) | (byte & 0x7f)
+    return value, offset
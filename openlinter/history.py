@@ -0,0 +1,280 @@
+#!usr/bin/env python3
+"""
+history.py
+
+Check the file rules (files_exist and code_exists) over the history of a
+git repository, to see when it gained a README, a license or code.
+
+Commits are read straight from the object database. The first commit in
+the series is checked in full; after that only the paths changed between
+one commit and the next (from `git diff-tree`) are looked at again, and
+every other result is carried forward. The work done for a commit grows
+with the number of changed paths, not with the size of the tree.
+
+Functions
+---------
+lint_history
+    Yields the file rule results for each commit in a range.
+
+list_commits
+    Returns the commits in a range, oldest first, optionally sampled.
+
+changed_paths
+    Returns the paths that differ between two commits.
+
+format_history
+    Reports a result series as one compact line per commit.
+
+Constants
+---------
+SYMBOLS
+    How each result is shown by format_history.
+"""
+
+from __future__ import absolute_import
+
+import os
+
+import openlinter.gitrepo as gitrepo
+import openlinter.rules as rules
+from openlinter.cache import blob_key
+from openlinter.ignore import GITIGNORE, ignore_rules_for
+from openlinter.treeindex import GitTreeIndex
+
+
+# Present with content, present but empty, missing
+SYMBOLS = {True: '+', None: '0', False: '-'}
+
+
+def lint_history(directory, rule_set, revisions=None, step=1, cache=None):
+    """Check the file rules at each commit in a range, reusing the results
+    for the previous commit wherever the tree hasn't changed.
+
+    Parameters
+    ----------
+    directory : string
+        Path to a git repository (working tree or bare)
+    rule_set : dict
+        Contains the structured data from the parsed configuration file
+    revisions : string or None
+        Commit range in git's syntax (e.g. 'v1.0..main'); defaults to
+        all of HEAD's history
+    step : int
+        Check every step-th commit, always including the newest
+    cache : cache.ClassificationCache or None
+        Persistent cache of file classifications
+
+    Yields
+    ------
+    tuple of (string, string, dict)
+        Commit SHA, commit date (YYYY-MM-DD) and the results: the
+        file type names from files_exist mapped to True, None or False as
+        for rules.check_file_presence, and 'code' mapped to a boolean
+        if code_exists is set
+    """
+    repository = gitrepo.GitContext(directory)
+    try:
+        state = _HistoryState(repository, rule_set, cache)
+        previous = None
+        for sha, date in list_commits(repository, revisions, step):
+            if previous is None:
+                results = state.check_all(sha)
+            else:
+                results = state.check_changes(
+                    sha, changed_paths(repository, previous, sha))
+            previous = sha
+            yield sha, date, results
+    finally:
+        repository.close()
+
+
+def list_commits(repository, revisions=None, step=1):
+    """List the commits in a range, following only first parents so the
+    series runs along one line of history.
+
+    Parameters
+    ----------
+    repository : string or gitrepo.GitContext
+        Path to the git repository, or the repository already opened
+    revisions : string or None
+        Commit range in git's syntax; defaults to HEAD's history
+    step : int
+        Keep every step-th commit, counting from the oldest; the newest
+        is always kept
+
+    Returns
+    -------
+    list of tuples of (string, string)
+        Commit SHA and commit date (YYYY-MM-DD), oldest first
+    """
+    repository = gitrepo.open_repository(repository)
+    output = repository.repo.git.log('--first-parent', '--reverse',
+                                     '--format=%H %cs', revisions or 'HEAD')
+    commits = [tuple(line.split(' ', 1)) for line in output.splitlines()]
+    sampled = commits[::max(step, 1)]
+    if commits and sampled[-1] != commits[-1]:
+        sampled.append(commits[-1])
+    return sampled
+
+
+def changed_paths(repository, old, new):
+    """Find the files that were added, changed or removed between two
+    commits.
+
+    Parameters
+    ----------
+    repository : string or gitrepo.GitContext
+        Path to the git repository, or the repository already opened
+    old, new : strings
+        The commits to compare
+
+    Returns
+    -------
+    list of strings
+        Paths of the changed files, relative to the repository root
+    """
+    repository = gitrepo.open_repository(repository)
+    output = repository.repo.git.diff_tree('-r', '-z', '--no-renames',
+                                           old, new)
+    # Each change is ":<modes> <shas> <status>" then the path, NUL separated
+    fields = output.split('\0')
+    return [path.replace('/', os.sep)
+            for status, path in zip(fields[0::2], fields[1::2])
+            if status.startswith(':')]
+
+
+def format_history(series, rule_set, report=print):
+    """Report a history result series as a table with a line per commit.
+    Files are shown as + (present with content), 0 (present but empty)
+    or - (missing), and code as + or -.
+
+    Parameters
+    ----------
+    series : iterable
+        (commit, date, results) tuples from lint_history
+    rule_set : dict
+        Contains the structured data from the parsed configuration file
+    report : callable
+        Called with each output string; defaults to printing to stdout
+
+    Returns
+    -------
+    None
+    """
+    columns = _file_types(rule_set)
+    if rule_set.get('code_exists'):
+        columns.append('code')
+    report('  '.join(['commit ', 'date      '] + columns))
+    for sha, date, results in series:
+        cells = [SYMBOLS[results[name]].ljust(len(name)) for name in columns]
+        report('  '.join([sha[:7], date] + cells).rstrip())
+
+
+class _HistoryState(object):
+    # Results for the commit checked last, and what they were built from
+
+    def __init__(self, repository, rule_set, cache):
+        self.repository = repository
+        self.rule_set = rule_set
+        self.cache = cache
+        options = rule_set.get('code_detection') or {}
+        self.sniff_bytes = options.get('sniff_bytes', rules.SNIFF_BYTES)
+        self.max_bytes = options.get('max_read_bytes', rules.MAX_GUESS_BYTES)
+        self.results = {}
+        self.ignore = None
+        # relpath -> (blob SHA, is code) for every file that isn't ignored
+        self.files = {}
+        self.code_paths = set()
+
+    def check_all(self, sha):
+        self.ignore = ignore_rules_for(self.repository.path, self.rule_set)
+        index = GitTreeIndex(self.repository, sha, self.ignore)
+        self._check_file_types(index)
+        if self.rule_set.get('code_exists'):
+            files = {}
+            for entry in index.iter_files():
+                files[entry.relpath] = self._classify(index, entry)
+            self.files = files
+            self.code_paths = set(path for path, (_, is_code) in files.items()
+                                  if is_code)
+            self.results['code'] = bool(self.code_paths)
+        return dict(self.results)
+
+    def check_changes(self, sha, paths):
+        if any(os.path.basename(path) == GITIGNORE for path in paths):
+            # Which files are ignored may have changed anywhere below the
+            # .gitignore, so go through the whole tree (blobs that haven't
+            # changed are not classified again)
+            return self.check_all(sha)
+        index = GitTreeIndex(self.repository, sha, self.ignore)
+        if any(os.sep not in path for path in paths):
+            self._check_file_types(index)
+        if self.rule_set.get('code_exists'):
+            for path in paths:
+                entry = index.get(path)
+                if (entry is None or not entry.is_file or
+                        self._is_ignored(index, path)):
+                    self.files.pop(path, None)
+                    self.code_paths.discard(path)
+                    continue
+                self.files[path] = self._classify(index, entry)
+                if self.files[path][1]:
+                    self.code_paths.add(path)
+                else:
+                    self.code_paths.discard(path)
+            self.results['code'] = bool(self.code_paths)
+        return dict(self.results)
+
+    def _check_file_types(self, index):
+        for files_to_check in self.rule_set.get('files_exist') or ():
+            for file_type, names in files_to_check.items():
+                result = False
+                for name in names:
+                    found = rules.check_file_presence(
+                        name, self.repository.path, index)
+                    if found:
+                        result = True
+                        break
+                    elif found is None:
+                        result = None
+                self.results[file_type] = result
+
+    def _classify(self, index, entry):
+        known = self.files.get(entry.relpath)
+        if known is not None and known[0] == entry.sha:
+            return known
+        cache = self.cache
+        # As in rules.check_for_code, only files that need their content
+        # read are worth caching
+        if cache is not None and len(
+                rules.candidate_lexer_names(entry.name)) < 2:
+            cache = None
+        lexer_name = None
+        key = blob_key(entry.name, entry.sha,
+                       (self.sniff_bytes, self.max_bytes))
+        if cache is not None:
+            lexer_name = cache.get(key)
+        if lexer_name is None:
+            lexer_name = rules.guess_entry_lexer_name(
+                index, entry, self.sniff_bytes, self.max_bytes)
+            if cache is not None:
+                cache.put(key, lexer_name)
+        return entry.sha, rules.is_code_lexer(lexer_name)
+
+    def _is_ignored(self, index, relpath):
+        # Pick up the .gitignore files above the path on the way down, as
+        # FileIndex.iter_files would, and stop at an ignored directory
+        parent = ''
+        for name in relpath.split(os.sep)[:-1]:
+            self.ignore.visit_directory(parent, index.listdir(parent), index)
+            parent = os.path.join(parent, name)
+            if self.ignore.is_ignored(parent, True):
+                return True
+        self.ignore.visit_directory(parent, index.listdir(parent), index)
+        return self.ignore.is_ignored(relpath, False)
+
+
+def _file_types(rule_set):
+    return [file_type
+            for files_to_check in rule_set.get('files_exist') or ()
+            for file_type in files_to_check]
@@ -0,0 +1,275 @@
+#!usr/bin/env python3
+"""
+ignore.py
+
+Decide which files and directories to skip when looking through a
+repository: version control directories, directories named in the
+configuration file, and anything matched by the repository's `.gitignore`
+files or `.git/info/exclude`. Used by `fsindex.py` to prune directories
+while walking, so skipped directories are never listed.
+
+Classes
+-------
+IgnoreRules
+    Ignore patterns for one repository, following gitignore semantics.
+
+Functions
+---------
+ignore_rules_for
+    Returns the IgnoreRules for a directory and rule set.
+
+Constants
+---------
+VCS_DIRECTORIES
+    Names of version control metadata directories, which are always
+    skipped.
+"""
+
+import fnmatch
+import os
+import re
+import threading
+
+from openlinter.gitrepo import find_git_dir
+from openlinter.instrument import record
+
+
+VCS_DIRECTORIES = ('.git', '.hg', '.svn', '.bzr', '_darcs', 'CVS')
+
+GITIGNORE = '.gitignore'
+
+
+class IgnoreRules(object):
+    """Ignore patterns for a repository, following gitignore semantics:
+    patterns in a `.gitignore` file apply below the directory it is in,
+    patterns in deeper files take precedence, and within the patterns
+    that apply the last match wins (so `!pattern` can re-include a file).
+
+    Parameters
+    ----------
+    skip_directories : list of strings
+        Directory names (or glob patterns for them) to skip anywhere in
+        the tree, as well as VCS_DIRECTORIES
+    use_gitignore : boolean
+        Whether to read and apply `.gitignore` files
+    """
+
+    def __init__(self, skip_directories=(), use_gitignore=True):
+        skip = list(VCS_DIRECTORIES) + list(skip_directories or ())
+        self._skip = re.compile('|'.join(fnmatch.translate(name)
+                                         for name in skip))
+        self.use_gitignore = use_gitignore
+        # Directory relpath -> list of compiled patterns, lowest priority
+        # first; '' holds .git/info/exclude followed by the root .gitignore
+        self._patterns = {}
+        self._visited = set()
+        # Checks on several threads walk the tree with the same rules
+        self._lock = threading.Lock()
+
+    def add_patterns(self, base, lines):
+        """Add gitignore patterns that apply below a directory.
+
+        Parameters
+        ----------
+        base : string
+            Path of the directory the patterns apply to, relative to the
+            repository root ('' for the root)
+        lines : iterable of strings
+            Lines of a `.gitignore` or exclude file
+        """
+        patterns = [p for p in (_compile_pattern(line) for line in lines)
+                    if p is not None]
+        if patterns:
+            self._patterns.setdefault(base, []).extend(patterns)
+
+    def add_ignore_file(self, base, path):
+        """Read a `.gitignore` or exclude file and add its patterns.
+
+        Parameters
+        ----------
+        base : string
+            Path of the directory the patterns apply to, relative to the
+            repository root ('' for the root)
+        path : string
+            Path to the file to read
+        """
+        try:
+            with open(path, 'r', errors='replace') as f:
+                text = f.read()
+            record('files_read')
+            record('bytes_read', len(text))
+            self.add_patterns(base, text.splitlines())
+        except OSError:
+            pass
+
+    def visit_directory(self, relpath, entries, index=None):
+        """Pick up the `.gitignore` file of a directory, if it has one.
+        Called as each directory is listed, before its entries are
+        checked. If another thread is reading the file, waits for it.
+
+        Parameters
+        ----------
+        relpath : string
+            Path to the directory relative to the repository root
+        entries : list of fsindex.Entry
+            The directory's entries
+        index : fsindex.FileIndex or None
+            The index the entries are from, used to read the file;
+            otherwise it is read from the filesystem
+        """
+        if not self.use_gitignore or relpath in self._visited:
+            return
+        with self._lock:
+            if relpath in self._visited:
+                return
+            for entry in entries:
+                if entry.name == GITIGNORE and entry.is_file:
+                    if index is None:
+                        self.add_ignore_file(relpath, entry.path)
+                    else:
+                        with index.open(entry) as f:
+                            data = f.read()
+                        record('files_read')
+                        record('bytes_read', len(data))
+                        self.add_patterns(relpath, data.decode(
+                            'utf-8', 'replace').splitlines())
+                    break
+            # Only once the patterns are in, so that no other thread
+            # checks a path against the directory without them
+            self._visited.add(relpath)
+
+    def is_ignored(self, relpath, is_dir):
+        """Check whether a path should be skipped. Its parent directories
+        are assumed not to be ignored, since ignored directories are not
+        walked into.
+
+        Parameters
+        ----------
+        relpath : string
+            Path relative to the repository root
+        is_dir : boolean
+            Whether the path is a directory
+
+        Returns
+        -------
+        boolean
+            True if the path should be skipped
+        """
+        relpath = relpath.replace(os.sep, '/')
+        if is_dir and self._skip.match(relpath.rsplit('/', 1)[-1]):
+            return True
+        if not self._patterns:
+            return False
+        # Check the deepest .gitignore first: the last match there wins
+        parts = relpath.split('/')
+        for depth in range(len(parts) - 1, -1, -1):
+            base = '/'.join(parts[:depth])
+            patterns = self._patterns.get(base)
+            if not patterns:
+                continue
+            path = '/'.join(parts[depth:])
+            for regex, negate, dir_only in reversed(patterns):
+                if dir_only and not is_dir:
+                    continue
+                if regex.match(path):
+                    return not negate
+        return False
+
+
+def ignore_rules_for(directory, rule_set):
+    """Build the IgnoreRules for a directory from the configuration file
+    settings `skip_directories` and `use_gitignore`.
+
+    Parameters
+    ----------
+    directory : string
+        Path to the root of the repository
+    rule_set : dict
+        Contains the structured data from the parsed configuration file
+
+    Returns
+    -------
+    IgnoreRules
+    """
+    ignore = IgnoreRules(rule_set.get('skip_directories') or (),
+                         rule_set.get('use_gitignore', True))
+    if ignore.use_gitignore:
+        git_dir = find_git_dir(directory)
+        if git_dir is not None:
+            ignore.add_ignore_file('', os.path.join(git_dir, 'info',
+                                                    'exclude'))
+    return ignore
+
+
+def _compile_pattern(line):
+    # Returns (regex, negate, dir_only) for a gitignore line, or None
+    if line.startswith('#'):
+        return None
+    # Trailing spaces are ignored unless escaped
+    line = re.sub(r'(?<!\\) +$', '', line.rstrip('\r\n'))
+    if not line:
+        return None
+    negate = line.startswith('!')
+    if negate:
+        line = line[1:]
+    elif line.startswith('\\'):
+        # "\!" and "\#" match a literal leading ! or #
+        line = line[1:] if line[1:2] in ('!', '#') else line
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+    # A slash anywhere but the end anchors the pattern to its directory
+    anchored = '/' in line
+    line = line.lstrip('/')
+
+    regex = _translate_glob(line)
+    if not anchored:
+        regex = '(?:.*/)?' + regex
+    return re.compile('^' + regex + '$', re.DOTALL), negate, dir_only
+
+
+def _translate_glob(pattern):
+    segments = pattern.split('/')
+    out = []
+    for i, segment in enumerate(segments):
+        last = i == len(segments) - 1
+        if segment == '**':
+            # Leading "**/" and middle "/**/" match any number of
+            # directories; trailing "/**" matches everything inside
+            out.append('.*' if last else '(?:.*/)?')
+            continue
+        out.append(_translate_segment(segment))
+        if not last:
+            out.append('/')
+    return ''.join(out)
+
+
+def _translate_segment(segment):
+    out = []
+    i = 0
+    while i < len(segment):
+        char = segment[i]
+        if char == '*':
+            while i + 1 < len(segment) and segment[i + 1] == '*':
+                i += 1
+            out.append('[^/]*')
+        elif char == '?':
+            out.append('[^/]')
+        elif char == '[':
+            end = segment.find(']', i + 2)
+            if end == -1:
+                out.append(re.escape(char))
+            else:
+                body = segment[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end
+        elif char == '\\' and i + 1 < len(segment):
+            i += 1
+            out.append(re.escape(segment[i]))
+        else:
+            out.append(re.escape(char))
+        i += 1
+    return ''.join(out)
@@ -0,0 +1,295 @@
+#!usr/bin/env python3
+"""
+incremental.py
+
+Incremental linting: the output of each check is saved along with a
+fingerprint of everything the check looked at, and replayed on later runs
+instead of running the check again if none of it has changed.
+
+Fingerprints are built from these inputs, each read only if a check
+needs it:
+
+rules
+    The parsed rule set (so any configuration change re-runs every check)
+root
+    The names, types and sizes of the entries in the top directory
+refs
+    HEAD and every ref in the git repository
+tree
+    When checking a commit, its tree SHA. Otherwise, the path of every
+    file that isn't ignored, with its size and modification time, or,
+    for a file whose stat data matches the git index, its blob SHA (so
+    rewriting the index, as `git status` does, changes nothing).
+
+Results are stored in an SQLite database so that batch mode workers can
+share one state file.
+
+Classes
+-------
+LintState
+    Saved check results, keyed by directory and check.
+
+RuleInputs
+    Lazily computed fingerprints of one directory's check inputs.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+import openlinter.gitrepo as gitrepo
+from openlinter.results import UNDETERMINED, Result
+
+
+# Mixed into every fingerprint, so that results saved in an older format
+# are never replayed
+_FORMAT = b'results-1'
+
+
+class LintState(object):
+    """Check output saved from earlier runs, with the fingerprints of the
+    inputs it was computed from.
+
+    Parameters
+    ----------
+    path : string
+        Path to the state file; created if it doesn't exist
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._connection = None
+        self._pid = None
+        # Checks run on several threads share the connection
+        self._lock = threading.Lock()
+
+    def run(self, directory, check_id, fingerprint, check, report, *args):
+        """Replay the saved output of a check if its fingerprint matches,
+        or else run it, report its output and save it. Output with an
+        undetermined result is not saved.
+
+        Parameters
+        ----------
+        directory : string
+            Path to the directory being checked
+        check_id : string
+            Name of the check, unique within a run
+        fingerprint : string
+            Fingerprint of the check's inputs, from RuleInputs.fingerprint
+        check : callable
+            Called as check(*args, report=...) to run the check
+        report : callable
+            Called with each results.Result; replayed results have a
+            duration of 0
+        *args
+            Passed on to check
+        """
+        key = os.path.abspath(directory)
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT fingerprint, output FROM results '
+                'WHERE directory = ? AND check_id = ?',
+                (key, check_id)).fetchone()
+            if row is not None and row[0] == fingerprint:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if row is not None and row[0] == fingerprint:
+            for data in json.loads(row[1]):
+                result = Result.from_dict(data)
+                result.duration = 0.0
+                report(result)
+            return
+
+        output = []
+        def report_and_save(result):
+            output.append(result)
+            report(result)
+        check(*args, report=report_and_save)
+        if any(result.status == UNDETERMINED for result in output):
+            # A limit ran out, so the same inputs may give an answer on
+            # another run: don't replay this one
+            return
+        output = [result.to_dict() for result in output]
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO results '
+                '(directory, check_id, fingerprint, output) '
+                'VALUES (?, ?, ?, ?)',
+                (key, check_id, fingerprint, json.dumps(output)))
+
+    def forget(self, directory):
+        """Drop the saved output of every check on a directory, so that
+        they all run again next time.
+
+        Parameters
+        ----------
+        directory : string
+            Path to the directory
+        """
+        key = os.path.abspath(directory)
+        with self._lock, self._connect() as connection:
+            connection.execute('DELETE FROM results WHERE directory = ?',
+                               (key,))
+
+    def hit_rate(self):
+        """Return the fraction of checks replayed from saved results, or
+        None if no checks have been run."""
+        total = self.hits + self.misses
+        if not total:
+            return None
+        return self.hits / total
+
+    def close(self):
+        """Close the state file."""
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _connect(self):
+        # Each worker process opens its own connection
+        if self._connection is None or self._pid != os.getpid():
+            import sqlite3
+            connection = sqlite3.connect(self.path, timeout=60,
+                                         check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            with connection:
+                connection.execute(
+                    'CREATE TABLE IF NOT EXISTS results ('
+                    'directory TEXT NOT NULL, check_id TEXT NOT NULL, '
+                    'fingerprint TEXT NOT NULL, output TEXT NOT NULL, '
+                    'PRIMARY KEY (directory, check_id))')
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.update(_connection=None, _pid=None, hits=0, misses=0)
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+class RuleInputs(object):
+    """Fingerprints of the inputs checks can depend on, for one directory.
+    Each input is only read the first time a fingerprint needs it.
+
+    Parameters
+    ----------
+    directory : string
+        Path to the directory being checked
+    rule_set : dict
+        Contains the structured data from the parsed configuration file
+    index : fsindex.FileIndex
+        Index of the directory shared with the checks
+    """
+
+    def __init__(self, directory, rule_set, index):
+        self.directory = directory
+        self.rule_set = rule_set
+        self.index = index
+        self._digests = {}
+        self._repository = False
+        self._lock = threading.Lock()
+
+    def fingerprint(self, *inputs):
+        """Combine the fingerprints of several inputs into one.
+
+        Parameters
+        ----------
+        *inputs : strings
+            Names of inputs: 'root', 'refs' or 'tree'. The rule set is
+            always included.
+
+        Returns
+        -------
+        string
+            Hex digest identifying the current state of the inputs
+        """
+        digest = hashlib.sha1(_FORMAT)
+        for name in ('rules',) + inputs:
+            # Checks on other threads may want the same input
+            with self._lock:
+                if name not in self._digests:
+                    self._digests[name] = _digest(getattr(self, '_' + name)())
+            digest.update(name.encode() + b'=' + self._digests[name].encode())
+        return digest.hexdigest()
+
+    def _get_repository(self):
+        if self._repository is False:
+            try:
+                self._repository = gitrepo.GitContext(self.directory)
+            except Exception:
+                self._repository = None
+        return self._repository
+
+    def _rules(self):
+        yield json.dumps(self.rule_set, sort_keys=True, default=str)
+
+    def _root(self):
+        try:
+            entries = self.index.listdir()
+        except OSError:
+            yield 'missing'
+            return
+        for entry in sorted(entries, key=lambda e: e.name):
+            if entry.is_file:
+                yield '{}\tf\t{}'.format(entry.name, entry.size)
+            else:
+                yield '{}\t{}'.format(entry.name, 'd' if entry.is_dir else '?')
+
+    def _refs(self):
+        repository = self._get_repository()
+        if repository is None:
+            yield 'none'
+            return
+        yield 'HEAD\t{}'.format(repository.head)
+        refs = gitrepo.read_refs(repository.common_dir, 'refs/')
+        for name in sorted(refs):
+            yield '{}\t{}'.format(name, refs[name])
+
+    def _tree(self):
+        tree_sha = getattr(self.index, 'tree_sha', None)
+        if tree_sha is not None:
+            # Checking a commit straight from the object database
+            yield 'tree\t{}'.format(tree_sha)
+            return
+        # Tracked files whose stat data matches the index have the
+        # content of its blob; anything else, whether edited, untracked
+        # or outside git, is described by its own stat data
+        repository = self._get_repository()
+        tracked = {}
+        if repository is not None:
+            tracked = gitrepo.read_index(repository.git_dir)
+        for entry in self.index.iter_files():
+            try:
+                stat = entry.stat
+            except OSError:
+                continue
+            index_entry = tracked.get(entry.relpath.replace(os.sep, '/'))
+            if index_entry is not None and index_entry.matches_stat(stat):
+                yield '{}\t{}'.format(entry.relpath, index_entry.sha)
+            else:
+                yield '{}\t{}\t{}'.format(entry.relpath, stat.st_size,
+                                          stat.st_mtime_ns)
+
+
+def _digest(lines):
+    digest = hashlib.sha1()
+    for line in lines:
+        digest.update(line.encode('utf-8', 'surrogateescape'))
+        digest.update(b'\n')
+    return digest.hexdigest()
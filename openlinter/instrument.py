@@ -0,0 +1,291 @@
+#!usr/bin/env python3
+"""
+instrument.py
+
+Instrumentation for finding out where a lint run spends its time. While a
+Profiler is active, every rule function in `rules.py` is timed (wall and
+CPU time), and the work it does is counted: files stat'ed, files read and
+bytes read, directories listed, and git subprocesses started. Optionally,
+the peak memory allocated by each rule is traced as well.
+
+When no Profiler is active nothing is wrapped, and the counting hooks in
+the rest of the package cost one global lookup each.
+
+Classes
+-------
+Profiler
+    Context manager that records per-rule timings and I/O counts.
+
+Functions
+---------
+record
+    Adds to a counter of the active profiler, if there is one.
+
+write_profile
+    Writes a profiler's summary as a table or as JSON.
+
+Constants
+---------
+COUNTERS
+    Names of the I/O counters.
+
+OTHER
+    Name under which work done outside any rule is recorded.
+"""
+
+import functools
+import json
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+
+COUNTERS = ('stats', 'files_read', 'bytes_read', 'dirs_listed',
+            'git_processes')
+
+OTHER = '(other)'
+
+# Rule functions in rules.py are the public ones with these prefixes
+_RULE_PREFIXES = ('check_', 'detect_', 'find_')
+
+# The active Profiler, if any
+_active = None
+
+
+def record(counter, amount=1):
+    """Add to one of the COUNTERS of the active profiler, charging it to
+    the rule that is running. Does nothing if profiling is off.
+
+    Parameters
+    ----------
+    counter : string
+        One of COUNTERS
+    amount : int
+        How much to add
+    """
+    profiler = _active
+    if profiler is not None:
+        profiler.add(counter, amount)
+
+
+class Profiler(object):
+    """Records the time and I/O of each rule while it is active, as a
+    context manager:
+
+        with Profiler() as profiler:
+            lint_directory(directory, rule_set)
+        profiler.summary()
+
+    Times are exclusive: a rule called by another rule is only counted
+    under its own name. Rules running at the same time on different
+    threads are each charged their own time, so the rules can add up to
+    more than the total. Only one Profiler can be active at a time.
+
+    Parameters
+    ----------
+    trace_memory : boolean
+        Also record the peak memory allocated by Python code during each
+        rule (beyond what was allocated when it started), with
+        tracemalloc. Rules called by other rules are charged to the
+        outermost one. This slows the run down noticeably.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.rules = {}
+        self.wall = 0.0
+        self.cpu = 0.0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._patched = []
+        self._start = None
+
+    def __enter__(self):
+        global _active
+        if _active is not None:
+            raise RuntimeError('another Profiler is already active')
+        # Imported here so the modules that call record() can import this
+        # one without a cycle
+        import git
+        import openlinter.rules as rules
+        _active = self
+        for name in dir(rules):
+            function = getattr(rules, name)
+            if name.startswith(_RULE_PREFIXES) and callable(function):
+                self._patch(rules, name, self._wrap(name, function))
+        execute = git.cmd.Git.execute
+        @functools.wraps(execute)
+        def counting_execute(*args, **kwargs):
+            self.add('git_processes')
+            return execute(*args, **kwargs)
+        self._patch(git.cmd.Git, 'execute', counting_execute)
+        if self.trace_memory:
+            import tracemalloc
+            tracemalloc.start()
+        self._start = (time.perf_counter(), time.process_time())
+        return self
+
+    def __exit__(self, *exc_info):
+        global _active
+        self.wall += time.perf_counter() - self._start[0]
+        self.cpu += time.process_time() - self._start[1]
+        if self.trace_memory:
+            import tracemalloc
+            tracemalloc.stop()
+        for owner, name, original in reversed(self._patched):
+            setattr(owner, name, original)
+        self._patched = []
+        _active = None
+
+    def add(self, counter, amount=1):
+        """Add to a counter of the rule running in this thread."""
+        stack = self._stack()
+        name = stack[-1][0] if stack else OTHER
+        with self._lock:
+            self._stats(name)[counter] += amount
+
+    def summary(self):
+        """Return everything recorded so far.
+
+        Returns
+        -------
+        dict
+            'rules' maps each rule name that was called (and OTHER) to a
+            dict with its 'calls', 'wall' and 'cpu' seconds, the
+            COUNTERS and, if traced, 'peak_memory' in bytes. 'total' has
+            the same for the whole run, plus 'max_rss' (the process's
+            peak resident memory in bytes, where available).
+        """
+        with self._lock:
+            per_rule = dict((name, dict(stats))
+                            for name, stats in self.rules.items())
+        other = per_rule.setdefault(OTHER, self._empty_stats())
+        other['wall'] = max(0.0, self.wall - sum(
+            stats['wall'] for name, stats in per_rule.items()
+            if name != OTHER))
+        other['cpu'] = max(0.0, self.cpu - sum(
+            stats['cpu'] for name, stats in per_rule.items()
+            if name != OTHER))
+        total = self._empty_stats()
+        for stats in per_rule.values():
+            for key, value in stats.items():
+                if key == 'peak_memory':
+                    total[key] = max(total[key], value)
+                else:
+                    total[key] += value
+        total['wall'] = self.wall
+        total['cpu'] = self.cpu
+        if resource is not None:
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # Linux reports kilobytes, macOS bytes
+            total['max_rss'] = maxrss if sys.platform == 'darwin' \
+                else maxrss * 1024
+        return {'rules': per_rule, 'total': total}
+
+    def _empty_stats(self):
+        stats = dict.fromkeys(COUNTERS, 0)
+        stats.update(calls=0, wall=0.0, cpu=0.0)
+        if self.trace_memory:
+            stats['peak_memory'] = 0
+        return stats
+
+    def _stats(self, name):
+        if name not in self.rules:
+            self.rules[name] = self._empty_stats()
+        return self.rules[name]
+
+    def _stack(self):
+        # Rules running in this thread: [name, wall, cpu, child wall,
+        # child cpu] for each, innermost last
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _patch(self, owner, name, replacement):
+        self._patched.append((owner, name, getattr(owner, name)))
+        setattr(owner, name, replacement)
+
+    def _wrap(self, name, function):
+        @functools.wraps(function)
+        def profiled(*args, **kwargs):
+            stack = self._stack()
+            baseline = 0
+            if self.trace_memory and not stack:
+                import tracemalloc
+                tracemalloc.reset_peak()
+                baseline = tracemalloc.get_traced_memory()[0]
+            frame = [name, time.perf_counter(), time.process_time(), 0.0, 0.0]
+            stack.append(frame)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stack.pop()
+                wall = time.perf_counter() - frame[1]
+                cpu = time.process_time() - frame[2]
+                if stack:
+                    stack[-1][3] += wall
+                    stack[-1][4] += cpu
+                with self._lock:
+                    stats = self._stats(name)
+                    stats['calls'] += 1
+                    stats['wall'] += wall - frame[3]
+                    stats['cpu'] += cpu - frame[4]
+                    if self.trace_memory and not stack:
+                        import tracemalloc
+                        stats['peak_memory'] = max(
+                            stats['peak_memory'],
+                            tracemalloc.get_traced_memory()[1] - baseline)
+        return profiled
+
+
+def write_profile(profiler, output_format='text', stream=None):
+    """Write out a profiler's summary.
+
+    Parameters
+    ----------
+    profiler : Profiler
+        A profiler that has been run
+    output_format : string
+        'text' for a table, or 'json' for a JSON object on one line
+    stream : file object or None
+        Where to write; defaults to sys.stderr, so the profile doesn't
+        mix with the results
+
+    Returns
+    -------
+    None
+    """
+    stream = stream or sys.stderr
+    summary = profiler.summary()
+    if output_format == 'json':
+        stream.write(json.dumps(summary, sort_keys=True) + '\n')
+        return
+
+    columns = ['calls', 'wall', 'cpu'] + list(COUNTERS)
+    if profiler.trace_memory:
+        columns.append('peak_memory')
+    rows = sorted(summary['rules'].items(),
+                  key=lambda item: item[1]['wall'], reverse=True)
+    rows.append(('total', summary['total']))
+    width = max(len(name) for name, _ in rows)
+    stream.write('  '.join(['rule'.ljust(width)] +
+                           [c.rjust(max(len(c), 8)) for c in columns])
+                 .rstrip() + '\n')
+    for name, stats in rows:
+        cells = []
+        for column in columns:
+            value = stats[column]
+            if isinstance(value, float):
+                value = '{:.3f}'.format(value)
+            cells.append(str(value).rjust(max(len(column), 8)))
+        stream.write('  '.join([name.ljust(width)] + cells) + '\n')
+    if 'max_rss' in summary['total']:
+        stream.write('peak memory (RSS): {:.1f} MiB\n'.format(
+            summary['total']['max_rss'] / 1024 / 1024))
@@ -0,0 +1,210 @@
+#!usr/bin/env python3
+"""
+linter.py
+
+Run the linter from Python instead of from the command line, for programs
+such as web services that check many repositories in one long-lived
+process. A Linter is made once and then used for any number of
+directories or repository URLs. It keeps what a one-off run has to load
+each time: the parsed configuration files (read again only when they
+change), Pygments' lexer tables, the open git repositories, the
+classification cache and, optionally, the saved output of every check
+(see incremental.LintState). Results are returned as results.Result
+objects; nothing is printed.
+
+    from openlinter.linter import Linter
+
+    with Linter() as linter:
+        for result in linter.lint('path/to/repository'):
+            print(result.rule_id, result.status, result.detail)
+
+Classes
+-------
+Linter
+    Checks directories against rule sets, keeping state between calls.
+
+Constants
+---------
+DEFAULT_RULES
+    Path to the configuration file used when none is given.
+"""
+
+import importlib
+import os
+import threading
+
+import openlinter.gitrepo as gitrepo
+import openlinter.remote as remote
+import openlinter.rules as rules
+from openlinter.cache import CACHE_FILENAME, ClassificationCache
+from openlinter.incremental import LintState
+from openlinter.openlinter import (get_current_script_dir, lint_directory,
+                                   read_rule_set)
+
+DEFAULT_RULES = os.path.join(get_current_script_dir(), 'rules.yml')
+
+
+class Linter(object):
+    """Checks directories and repositories against rule sets, keeping
+    parsed rule sets, open git repositories, the classification cache and
+    saved check output in memory between calls. A Linter can be used from
+    several threads at once; checks of the same directory wait for each
+    other.
+
+    Parameters
+    ----------
+    rule_set : dict, string or None
+        The rule set to check with when a call doesn't give one: a parsed
+        rule set, or the path to a configuration file; DEFAULT_RULES if
+        None
+    cache_dir : string or None
+        Directory for the classification cache, compiled rule plans and
+        mirrors of remote repositories, as for --cache-dir
+    state_path : string or None
+        File to save check output in and replay it from while the
+        check's inputs are unchanged, as for --incremental; ':memory:'
+        keeps it in memory. If None, every check runs every time.
+    threads : int or None
+        Most checks to run at once for one directory (see lint_directory)
+
+    Raises
+    ------
+    OSError if the configuration file can't be read
+    """
+
+    def __init__(self, rule_set=None, cache_dir=None, state_path=None,
+                 threads=None):
+        self.default_rule_set = DEFAULT_RULES if rule_set is None else rule_set
+        self.cache_dir = cache_dir
+        self.threads = threads
+        self.cache = None
+        self.mirrors = None
+        if cache_dir is not None:
+            self.cache = ClassificationCache(
+                os.path.join(cache_dir, CACHE_FILENAME))
+            self.mirrors = os.path.join(cache_dir, remote.MIRRORS_DIRNAME)
+        self.state = None
+        if state_path is not None:
+            self.state = LintState(state_path)
+        # Maps each path to (stat signature, rule set)
+        self._rule_sets = {}
+        # Maps each directory to its open GitContext, or None
+        self._repositories = {}
+        self._directory_locks = {}
+        self._lock = threading.Lock()
+
+        # Load what the first check would otherwise wait for
+        self.rule_set()
+        rules.warm_up()
+        importlib.import_module('git')
+
+    def rule_set(self, rule_set=None):
+        """Return a parsed rule set. Configuration files are read again
+        only if they have changed since they were last read.
+
+        Parameters
+        ----------
+        rule_set : dict, string or None
+            A parsed rule set, which is returned as it is, or the path to
+            a configuration file; default_rule_set if None
+
+        Returns
+        -------
+        dict
+            Contains structured data from the parsed configuration file
+
+        Raises
+        ------
+        OSError if the file can't be read
+        """
+        if rule_set is None:
+            rule_set = self.default_rule_set
+        if isinstance(rule_set, dict):
+            return rule_set
+        path = os.path.abspath(rule_set)
+        stat = os.stat(path)
+        signature = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        with self._lock:
+            cached = self._rule_sets.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        parsed = read_rule_set(path, self.cache_dir)
+        with self._lock:
+            self._rule_sets[path] = (signature, parsed)
+        return parsed
+
+    def lint(self, directory, rule_set=None, ref=None, report=None):
+        """Check a directory, or a repository URL, against a rule set.
+
+        Parameters
+        ----------
+        directory : string
+            Path to the directory to check, or a repository URL
+        rule_set : dict, string or None
+            A parsed rule set or the path to a configuration file;
+            default_rule_set if None
+        ref : string or None
+            Check this commit instead of the working tree
+        report : callable or None
+            Also called with each results.Result as soon as it is ready
+
+        Returns
+        -------
+        list of results.Result
+            The results, in the order the linter reports them
+        """
+        rule_set = self.rule_set(rule_set)
+        if not remote.is_remote(directory):
+            directory = os.path.abspath(directory)
+        output = []
+        def collect(result):
+            output.append(result)
+            if report is not None:
+                report(result)
+        with self._directory_lock(directory):
+            lint_directory(directory, rule_set, collect, cache=self.cache,
+                           state=self.state, ref=ref, threads=self.threads,
+                           mirrors=self.mirrors,
+                           repository=self._repository(directory))
+        if self.cache is not None:
+            self.cache.flush()
+        return output
+
+    def close(self):
+        """Close the repositories, cache and state."""
+        for repository in self._repositories.values():
+            if repository is not None:
+                repository.close()
+        self._repositories.clear()
+        if self.cache is not None:
+            self.cache.close()
+        if self.state is not None:
+            self.state.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _directory_lock(self, directory):
+        # Checks of one directory share its repository and saved output,
+        # so they run one at a time
+        with self._lock:
+            return self._directory_locks.setdefault(directory,
+                                                    threading.Lock())
+
+    def _repository(self, directory):
+        # The directory's GitContext, opened on first use; called with
+        # the directory's lock held
+        if remote.is_remote(directory):
+            return None
+        repository = self._repositories.get(directory)
+        if repository is None:
+            if gitrepo.find_git_dir(directory) is None:
+                return None
+            repository = gitrepo.GitContext(directory)
+            self._repositories[directory] = repository
+        # Branches may have moved since the last check
+        repository.refresh()
+        return repository
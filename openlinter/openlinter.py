@@ -9,6 +9,12 @@ Functions
 main
     Main function of the linter--set up state and call checks.
 
+lint_directory
+    Check a directory against a rule set and report the results.
+
+report_reuse
+    Report how many checks were reused from an incremental state file.
+
 get_current_script_dir
     Inspect the stack to find the directory the current module is in.
 
@@ -16,107 +22,384 @@ parse_linter_args
     Parse command-line arguments and set up the console interface.
 
 get_rule_set
-    Read and parse the configuration file.
+    Read and parse the configuration file given on the command line.
+
+read_rule_set
+    Read and parse a configuration file.
+
+check_for_files
+    Call the checks for the presence of the configured files.
+
+check_for_code_files
+    Call the check for the presence of code and report the result.
+
+check_for_secret_files
+    Call the check for secrets and report each one found.
+
+check_for_flagged_term_files
+    Call the check for words to avoid and report each use found.
 
 check_for_git_branches
-    Call the checks related to git branching and print the results.
+    Call the checks related to git branching and report the results.
 
 check_multiple_git_commits
-    Call the check for multiple commits per branch and print the result.
+    Call the check for multiple commits per branch and report the result.
+
+check_signed_git_commits
+    Call the check for signed commits and report the result.
 """
 
 from __future__ import absolute_import
 
 import argparse
-import inspect
 import os
+import sys
+import time
 
-import yaml
-
+import openlinter.gitrepo as gitrepo
+import openlinter.remote as remote
 import openlinter.rules as rules
+from openlinter.cache import CACHE_FILENAME, ClassificationCache
+from openlinter.fsindex import FileIndex
+from openlinter.ignore import ignore_rules_for
+from openlinter.incremental import LintState, RuleInputs
+from openlinter.instrument import Profiler, write_profile
+from openlinter.plan import compile_plan, load_plan
+from openlinter.results import (FAIL, FORMATS, INFO, PASS, SKIP,
+                                UNDETERMINED, Result, get_reporter)
+from openlinter.scheduler import Task, run_tasks
+from openlinter.treeindex import GitTreeIndex
 
 
-# FIXME: this could be more functional and testable.
 def main():
+    if sys.argv[1:2] == ['serve']:
+        # Imported here so lint runs don't pay for it
+        import openlinter.server as server
+        server.main()
+        return
+    if sys.argv[1:2] == ['query']:
+        import openlinter.store as store
+        store.main()
+        return
+
     # Get command-line args and configuration data
     args = parse_linter_args()
     rule_set = get_rule_set(args)
 
-    # Check directory/repository against rules
+    cache = None
+    if args.cache_dir:
+        cache = ClassificationCache(
+            os.path.join(args.cache_dir, CACHE_FILENAME))
+    state = None
+    if args.incremental:
+        state = LintState(args.incremental)
+    mirrors = None
+    if args.cache_dir:
+        mirrors = os.path.join(args.cache_dir, remote.MIRRORS_DIRNAME)
+    reporter = get_reporter(args.format)
+    result_store = None
+    if args.store:
+        # Imported here so runs that don't store results don't pay for it
+        import openlinter.store as store
+        result_store = store.ResultStore(args.store)
+    profiler = None
+    if args.profile:
+        profiler = Profiler(args.profile_memory)
+        profiler.__enter__()
+
+    try:
+        if args.history is not None:
+            # Imported here so other runs don't pay for it
+            import openlinter.history as history
+            history.format_history(
+                history.lint_history(args.directory, rule_set, args.history,
+                                     args.every, cache),
+                rule_set)
+        elif args.batch is not None or args.batch_file:
+            # Imported here so single-directory runs don't pay for it
+            import openlinter.batch as batch
+            directories = batch.read_directory_list(args.batch,
+                                                    args.batch_file)
+            # Profiling only sees work done in this process
+            jobs = 1 if profiler is not None else args.jobs
+            for directory, output in batch.lint_many(
+                    directories, rule_set, jobs, cache=cache,
+                    state=state, ref=args.ref, threads=args.threads,
+                    mirrors=mirrors):
+                reporter.begin(directory)
+                for result in output:
+                    reporter.report(result)
+                if result_store is not None:
+                    result_store.record(directory, output,
+                                        store.checked_commit(
+                                            directory, args.ref, mirrors))
+        else:
+            output = []
+            def report(result):
+                output.append(result)
+                reporter.report(result)
+            lint_directory(args.directory, rule_set, report=report,
+                           cache=cache, state=state, ref=args.ref,
+                           threads=args.threads, mirrors=mirrors)
+            if result_store is not None:
+                result_store.record(args.directory, output,
+                                    store.checked_commit(args.directory,
+                                                         args.ref, mirrors))
+            if state is not None:
+                report_reuse(state, reporter.report)
+    finally:
+        if result_store is not None:
+            result_store.close()
+        if cache is not None:
+            cache.close()
+        if state is not None:
+            state.close()
+        if profiler is not None:
+            profiler.__exit__(None, None, None)
+            write_profile(profiler, args.profile)
+
+
+def lint_directory(directory, rule_set, report=print, cache=None,
+                   state=None, ref=None, threads=None, mirrors=None,
+                   repository=None):
+    """Check a directory/repository against every rule in a rule set and
+    report the result of each check. Checks that don't depend on each
+    other run concurrently, but their results are reported in the same
+    order as if they had run one after another.
+
+    Every check reports a results.Result, with its directory set to
+    the directory being checked. Printing a Result gives the linter's
+    text output.
+
+    Parameters
+    ----------
+    directory : string
+        Path to the directory to check, or the URL of a git repository
+        to clone without its blobs and check (see remote.clone)
+    rule_set : dict
+        Contains the structured data from the parsed configuration file
+    report : callable
+        Called with each results.Result; defaults to printing to stdout
+    cache : cache.ClassificationCache or None
+        Persistent cache of file classifications for the code check
+    state : incremental.LintState or None
+        Results saved from earlier runs. Checks whose inputs haven't
+        changed replay their saved output instead of running.
+    ref : string or None
+        If given, check the files in this commit of the git repository
+        instead of the working tree, reading them from the object
+        database. Bare repositories are always checked at HEAD.
+    threads : int or None
+        Most checks to run at once; None runs every check that is ready
+        (see scheduler.run_tasks), and 1 runs them one at a time.
+    mirrors : string or None
+        Directory to keep clones of repositories given by URL in, so
+        later runs only fetch what has changed; if None, each is cloned
+        into a temporary directory.
+    repository : gitrepo.GitContext or None
+        The git repository at directory, already opened, for the git
+        checks to use instead of opening it again. It is left open.
+
+    Returns
+    -------
+    None
+    """
     #######
-    # TODO: Consider architecture: how to handle the result (print to stdout
-    #       as we go, or pass around a result object?), how to handle interface
-    #       strings (hard-coded or able to change/localize easily).
+    # TODO: Consider architecture: how to handle interface strings
+    #       (hard-coded or able to change/localize easily).
     #######
+    if remote.is_remote(directory):
+        with remote.clone(directory, mirrors) as path:
+            _lint_directory(path, directory, rule_set, report, cache, state,
+                            ref, threads, None)
+    else:
+        _lint_directory(directory, directory, rule_set, report, cache,
+                        state, ref, threads, repository)
+
+
+def _lint_directory(directory, name, rule_set, report, cache, state, ref,
+                    threads, repository):
+    # Checks the files in directory; results, saved state and messages
+    # refer to it by name, which is the URL for a cloned repository
+    report = _for_directory(report, name)
+    plan = compile_plan(rule_set)
+
+    # Repositories opened for this run, closed when it ends
+    repositories = []
+
+    # One index of the directory tree is shared by all the file checks,
+    # if any are enabled
+    index = None
+    if plan.needs_index:
+        ignore = ignore_rules_for(directory, rule_set)
+        if ref is None and gitrepo.find_git_dir(directory) == directory:
+            # A bare repository has no working tree to look at
+            ref = 'HEAD'
+        if ref is None:
+            index = FileIndex(directory, ignore)
+        else:
+            index = GitTreeIndex(directory, ref, ignore)
+            repositories.append(index.repository)
+    inputs = None
+    if state is not None:
+        inputs = RuleInputs(directory, rule_set, index)
+
+    def run_check(check_id, input_names, check, *args, report):
+        # input_names are those of the plan's check that check_id is part
+        # of (see plan.CHECK_INPUTS)
+        if state is None:
+            check(*args, report=report)
+        else:
+            state.run(name, check_id, inputs.fingerprint(*input_names),
+                      check, report, *args)
+
+    # The checks run concurrently where they don't depend on each other,
+    # and report in the order they are added here
+    tasks = []
 
     # Check for the presence of specified files
-    if 'files_exist' in rule_set:
-        # FIXME: also unfortunately nested, breaking out functions will help
-        for files_to_check in rule_set['files_exist']:
-            for f in files_to_check:
-                for name in files_to_check[f]:
-                    result = rules.check_file_presence(name, args.directory)
-                    # If one exists with content, great, stop checking
-                    if result:
-                        output = '  {} exists and has content'.format(name)
-                        print(output)
-                        break
-                    # Otherwise note that none of the names exist?
-                    elif result is None:
-                        output = '! {} exists but is empty'.format(name,
-                            args.directory)
-                    else:
-                        output = '! {} not found in {}'.format(name, args.directory)
-                    print(output)
+    if 'files_exist' in plan.checks:
+        tasks.append(Task('files_exist', run_check, 'files_exist',
+                          plan.inputs_for('files_exist'), check_for_files,
+                          name, rule_set, index))
 
     # Check for the presence of any code
-    if 'code_exists' in rule_set:
-        code_exists = rules.check_for_code(args.directory)
-        if code_exists:
-            output = '  code files detected'
-        else:
-            output = '! no code files found'
-        print(output)
+    if 'code_exists' in plan.checks:
+        # Blobs in a git tree are read through one git process, so the
+        # file checks take turns with it
+        after = []
+        if isinstance(index, GitTreeIndex) and 'files_exist' in plan.checks:
+            after = ['files_exist']
+        tasks.append(Task('code_exists', run_check, 'code_exists',
+                          plan.inputs_for('code_exists'),
+                          check_for_code_files, directory, rule_set, index,
+                          cache, after=after))
+
+    # Check the files for secrets such as keys and passwords
+    if 'secrets' in plan.checks:
+        after = []
+        if isinstance(index, GitTreeIndex):
+            after = [task.name for task in tasks]
+        tasks.append(Task('secrets', run_check, 'secrets',
+                          plan.inputs_for('secrets'), check_for_secret_files,
+                          directory, rule_set, index, after=after))
+
+    # Check the comments, strings and docs for words to avoid
+    if 'inclusive_language' in plan.checks:
+        after = []
+        if isinstance(index, GitTreeIndex):
+            after = [task.name for task in tasks]
+        tasks.append(Task('inclusive_language', run_check,
+                          'inclusive_language',
+                          plan.inputs_for('inclusive_language'),
+                          check_for_flagged_term_files, directory, rule_set,
+                          index, cache, after=after))
 
     # Check for the presence of version control and git repo features
-    if 'version_control' in rule_set:
-        vcs = rules.detect_version_control(args.directory)
+    def detect_vcs(report):
+        start = time.perf_counter()
+        vcs = rules.detect_version_control(directory)
+        duration = time.perf_counter() - start
         if vcs:
-            output = '  version control using {}'.format(vcs)
+            output = Result('detect_vcs', PASS,
+                            'version control using {}'.format(vcs), duration)
         else:
-            output = '! version control system not detected'
-        print(output)
-
+            output = Result('detect_vcs', FAIL,
+                            'version control system not detected', duration)
+        report(output)
+        # Open the repository once for all the git checks
+        if vcs == 'git' and repository is not None:
+            return repository
+        if vcs == 'git':
+            repositories.append(gitrepo.GitContext(directory))
+            return repositories[-1]
+        return None
+
+    def run_git_check(repository, check_id, subject, check, *args, report):
         # Might be better with a try/except with git.InvalidGitRepositoryError
-        if 'detect_git_branches' in rule_set['version_control'] and vcs == 'git':
-            git_branch_info = check_for_git_branches(args, rule_set)
-        elif 'detect_git_branches' in rule_set['version_control']:
-            print('! no git repository detected, could not check for git branches')
-        else:
-            pass
-
-        if 'multiple_git_commits' in rule_set['version_control'] and vcs == 'git':
-            # Currently doesn't return anything
-            multiple_commits = check_multiple_git_commits(args)
-        elif 'multiple_git_commits' in rule_set['version_control']:
-            print('! no git repository detected, could not check for multiple commits')
+        if repository is None:
+            report(Result(check_id, SKIP, 'no git repository detected, '
+                          'could not check for {}'.format(subject)))
         else:
-            pass
+            run_check(check_id, plan.inputs_for('version_control'), check,
+                      repository, *args, report=report)
+
+    if 'version_control' in plan.checks:
+        tasks.append(Task('detect_vcs', detect_vcs))
+        if 'detect_git_branches' in rule_set['version_control']:
+            tasks.append(Task('detect_git_branches', run_git_check,
+                              'detect_git_branches', 'git branches',
+                              check_for_git_branches, rule_set,
+                              depends=['detect_vcs']))
+        if 'multiple_git_commits' in rule_set['version_control']:
+            tasks.append(Task('multiple_git_commits', run_git_check,
+                              'multiple_git_commits', 'multiple commits',
+                              check_multiple_git_commits,
+                              depends=['detect_vcs']))
+        # signed_commits: False turns the check off, as for other sections
+        if ('signed_commits' in rule_set['version_control'] and
+                rule_set.get('signed_commits', True) is not False):
+            tasks.append(Task('signed_commits', run_git_check,
+                              'signed_commits', 'signed commits',
+                              check_signed_git_commits, rule_set,
+                              depends=['detect_vcs']))
 
     #######
     # Checks with new rules get added here
     #######
 
+    try:
+        run_tasks(tasks, report, threads)
+    finally:
+        for repository in repositories:
+            repository.close()
+
+
+def _section(rule_set, name):
+    # A section of options, which can also be turned on with just True
+    options = rule_set.get(name)
+    return options if isinstance(options, dict) else {}
+
+
+def _for_directory(report, directory):
+    # Wraps a report callable to fill in the directory of each result
+    def report_for_directory(result):
+        result.directory = directory
+        report(result)
+    return report_for_directory
+
+
+def report_reuse(state, report=print):
+    """Report how many checks replayed their saved output instead of
+    running, in an incremental run.
+
+    Parameters
+    ----------
+    state : incremental.LintState
+        The state used for the run
+    report : callable
+        Called with a results.Result; defaults to printing to stdout
+
+    Returns
+    -------
+    None
+    """
+    rate = state.hit_rate()
+    if rate is not None:
+        report(Result('incremental', INFO,
+                      '{} of {} checks reused from the last run ({:.0%})'
+                      .format(state.hits, state.hits + state.misses, rate)))
+
 
 def get_current_script_dir():
-    """Inspect the stack to find the directory the current module is in.
+    """Find the directory the current module is in.
 
     Returns
     -------
     string
         a string containing the path to the module location
     """
-    module_location = os.path.abspath(inspect.stack()[0][1])
+    module_location = os.path.abspath(__file__)
     return os.path.dirname(module_location)
 
 
@@ -126,6 +409,9 @@ def parse_linter_args():
 
     Defaults to current working directory for the directory arg and the
     copy of rules.py in the directory this module is in for the rules arg.
+    The batch args are an alternative to the directory arg for checking
+    many repositories in one run. The history arg checks the directory's
+    git history instead of its current files.
 
     Returns
     -------
@@ -134,14 +420,60 @@ def parse_linter_args():
     """
     parser = argparse.ArgumentParser()
     group = parser.add_mutually_exclusive_group()
-    group.add_argument('-d', '--directory', help="The local path to your repository's base directory. Defaults to the current working directory.",
+    group.add_argument('-d', '--directory', help="The local path to your repository's base directory, or the URL of a git repository to clone (without file contents) and check. Defaults to the current working directory.",
        default=os.getcwd()
     )
+    group.add_argument('-b', '--batch', nargs='*', metavar='PATH', help='Check many repositories in parallel. Paths can be given here, read from --batch-file, or read one per line from stdin.',
+    )
+    parser.add_argument('--batch-file', metavar='FILE', help='A file listing repository paths to check in batch mode, one per line. Use - to read from stdin.',
+    )
+    parser.add_argument('-j', '--jobs', type=int, help='The number of worker processes to use in batch mode. Defaults to the number of CPUs.',
+        default=None
+    )
+    parser.add_argument('--threads', type=int, metavar='N', help='The most checks to run at once on a repository. Checks that do not depend on each other run in parallel by default; use 1 to run them one at a time.',
+        default=None
+    )
     parser.add_argument('-r', '--rules', help='The path to the rules configuration file, a YAML file containing the rules you would like to check for. Defaults to path/to/openlinter/rules.yml.',
         default=os.path.join(get_current_script_dir(), 'rules.yml')
     )
+    parser.add_argument('--cache-dir', metavar='DIR', help='A directory to keep a persistent cache of file classifications in, so unchanged files are not classified again on later runs. Repositories given by URL are also kept here and only updated on later runs.',
+        default=None
+    )
+    parser.add_argument('--ref', help='Check the files in this branch, tag or commit, read straight from the git repository, instead of the files in the working tree. Bare repositories are checked at HEAD by default.',
+        default=None
+    )
+    parser.add_argument('--history', nargs='?', const='HEAD', metavar='RANGE', help="Check the files and code at each commit in RANGE (git's range syntax, e.g. v1.0..main; defaults to all of HEAD's history) and print one line per commit.",
+        default=None
+    )
+    parser.add_argument('--every', type=int, metavar='N', help='With --history, check every Nth commit (and always the newest).',
+        default=1
+    )
+    parser.add_argument('--incremental', metavar='STATE_FILE', help='Save the result of each check in STATE_FILE and reuse it on later runs if nothing the check depends on has changed.',
+        default=None
+    )
+    parser.add_argument('--store', metavar='DB', help='Also save every result in the SQLite database DB, with the commit checked and the time, for `openlinter query` to report on.',
+        default=None
+    )
+    parser.add_argument('-f', '--format', choices=FORMATS, help='How to write out the results: text (the default) or json, one JSON object per line for each check as it finishes.',
+        default='text'
+    )
+    parser.add_argument('--profile', nargs='?', const='text', choices=FORMATS, help='Record the time, CPU time and file and git activity of each rule and write a summary to stderr when the run ends, as a table (text, the default) or as json. Batch mode runs in one process when profiling.',
+        default=None
+    )
+    parser.add_argument('--profile-memory', action='store_true', help='With --profile, also record the peak memory allocated during each rule. This slows the run down.',
+    )
     parser.add_argument('-v', '--version', action='version', version='1.0.1')
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.history is not None and args.format != 'text':
+        parser.error('--history only has text output')
+    if args.history is not None and remote.is_remote(args.directory):
+        parser.error('--history needs a local repository, not a URL')
+    if args.history is not None and (args.batch is not None or
+                                     args.batch_file):
+        parser.error('--history checks one repository; use -d, not batch mode')
+    if args.history is not None and args.store is not None:
+        parser.error('--history results are not saved; use --store without it')
+    return args
 
 
 def get_rule_set(args):
@@ -158,67 +490,322 @@ def get_rule_set(args):
     dict
         Contains structured data from the parsed configuration file
     """
-    with open(args.rules, 'r') as f:
-        text = f.read()
-    rule_set = yaml.safe_load(text)
-    return rule_set
+    return read_rule_set(args.rules, args.cache_dir)
+
+
+def read_rule_set(path, cache_dir=None):
+    """Read and parse a configuration file, or load it from the plans
+    compiled on earlier runs (see plan.load_plan).
+
+    Parameters
+    ----------
+    path : string
+        Path to the YAML configuration file
+    cache_dir : string or None
+        Directory that compiled plans are cached in, if any
+
+    Returns
+    -------
+    dict
+        Contains structured data from the parsed configuration file
+    """
+    return load_plan(path, cache_dir).rule_set
+
+
+def check_for_files(directory, rule_set, index=None, report=print):
+    """Call the checks for the presence of the files listed in the
+    configuration file and report the results.
 
+    Parameters
+    ----------
+    directory : string
+        Path to the directory to check
+    rule_set : dict
+        Contains the structured data from the parsed configuration file
+    index : fsindex.FileIndex or None
+        Index of directory shared with other checks
+    report : callable
+        Called with each results.Result; defaults to printing to stdout
+
+    Returns
+    -------
+    None
+    """
+    # Every configured name is looked for in one pass over the listing
+    plan = compile_plan(rule_set)
+    start = time.perf_counter()
+    found = rules.check_files_presence(plan.file_names, directory, index)
+    for rule, names in plan.file_rules:
+        rule_id = 'files_exist.{}'.format(rule)
+        for name in names:
+            result = found[name]
+            # The first result's duration includes the pass over the files
+            duration = time.perf_counter() - start
+            start = time.perf_counter()
+            # If one exists with content, great, stop checking
+            if result:
+                output = Result(rule_id, PASS,
+                                '{} exists and has content'.format(name),
+                                duration)
+                report(output)
+                break
+            # Otherwise note that none of the names exist?
+            elif result is None:
+                output = Result(rule_id, FAIL,
+                                '{} exists but is empty'.format(name),
+                                duration)
+            else:
+                output = Result(rule_id, FAIL, '{} not found in {}'
+                                .format(name, directory), duration)
+            report(output)
+
+
+def check_for_code_files(directory, rule_set, index=None, cache=None,
+                         report=print):
+    """Call the check for the presence of code files and report the
+    result. With census set under code_detection, every file is
+    classified instead (see rules.check_for_languages), and the
+    languages found are reported too.
+
+    Parameters
+    ----------
+    directory : string
+        Path to the directory to check
+    rule_set : dict
+        Contains the structured data from the parsed configuration file
+    index : fsindex.FileIndex or None
+        Index of directory shared with other checks
+    cache : cache.ClassificationCache or None
+        Persistent cache of file classifications
+    report : callable
+        Called with each results.Result; defaults to printing to stdout
+
+    Returns
+    -------
+    None
+    """
+    options = rule_set.get('code_detection') or {}
+    start = time.perf_counter()
+    census = None
+    if options.get('census'):
+        census = rules.check_for_languages(directory, index, cache, options)
+        code_exists = census.code
+    else:
+        code_exists = rules.check_for_code(directory, index, cache, options)
+    duration = time.perf_counter() - start
+    if code_exists:
+        output = Result('code_exists', PASS, 'code files detected', duration)
+    elif code_exists is None:
+        output = Result('code_exists', UNDETERMINED,
+                        'no code files found before reaching the '
+                        'code_detection limits', duration)
+    else:
+        output = Result('code_exists', FAIL, 'no code files found', duration)
+    report(output)
+    if census is not None and census.files:
+        report(Result('code_exists.languages', INFO, 'languages: ' + ', '.join(
+            '{} {:.1%} ({} file{})'.format(language, share, files,
+                                           '' if files == 1 else 's')
+            for language, files, _, share in census.breakdown())))
+
+
+def check_for_secret_files(directory, rule_set, index=None, report=print):
+    """Call the check for secrets in the files and report the result:
+    one failure for each possible secret found.
+
+    Parameters
+    ----------
+    directory : string
+        Path to the directory to check
+    rule_set : dict
+        Contains the structured data from the parsed configuration file
+    index : fsindex.FileIndex or None
+        Index of directory shared with other checks
+    report : callable
+        Called with each results.Result; defaults to printing to stdout
 
-def check_for_git_branches(args, rule_set):
+    Returns
+    -------
+    None
+    """
+    start = time.perf_counter()
+    findings = rules.check_for_secrets(directory, index,
+                                       _section(rule_set, 'secrets'))
+    duration = time.perf_counter() - start
+    for finding in findings:
+        detail = 'possible {} in {}:{}'.format(finding.kind, finding.path,
+                                               finding.line)
+        if finding.sha is not None:
+            detail += ' (in history, blob {})'.format(finding.sha[:12])
+        report(Result('secrets', FAIL, detail, duration))
+    if not findings:
+        report(Result('secrets', PASS, 'no secrets found', duration))
+
+
+def check_for_flagged_term_files(directory, rule_set, index=None, cache=None,
+                                 report=print):
+    """Call the check for words to avoid in comments, strings and docs
+    and report the result: one failure for each use of a word.
+
+    Parameters
+    ----------
+    directory : string
+        Path to the directory to check
+    rule_set : dict
+        Contains the structured data from the parsed configuration file
+    index : fsindex.FileIndex or None
+        Index of directory shared with other checks
+    cache : cache.ClassificationCache or None
+        Persistent cache of file classifications
+    report : callable
+        Called with each results.Result; defaults to printing to stdout
+
+    Returns
+    -------
+    None
+    """
+    options = _section(rule_set, 'inclusive_language')
+    start = time.perf_counter()
+    findings = rules.check_for_flagged_terms(directory, options.get('terms'),
+                                             index, cache, options)
+    duration = time.perf_counter() - start
+    for finding in findings:
+        detail = '"{}" used in {}:{}'.format(finding.term, finding.path,
+                                              finding.line)
+        if finding.suggestion:
+            detail += ', consider "{}"'.format(finding.suggestion)
+        report(Result('inclusive_language', FAIL, detail, duration))
+    if not findings:
+        report(Result('inclusive_language', PASS,
+                      'no words to avoid found in comments and docs',
+                      duration))
+
+
+def check_for_git_branches(repository, rule_set, report=print):
     """Call the checks related to git branching (multiple branches and
-    appropriately named develop/feature branch) and print the results
-    to stdout.
+    appropriately named develop/feature branch) and report the results.
 
     Parameters
     ----------
-    args : argparse.Namespace
-        Arguments input when script is called from the console
+    repository : string or gitrepo.GitContext
+        Path to the git repository to check, or the repository already
+        opened
     rule_set : dict
         Contains the structured data from the parsed configuration file
+    report : callable
+        Called with each results.Result; defaults to printing to stdout
 
     Returns
     -------
     None
     """
-    branches = rules.check_multiple_branches(args.directory)
+    start = time.perf_counter()
+    repository = gitrepo.open_repository(repository)
+    branches = rules.check_multiple_branches(repository)
+    duration = time.perf_counter() - start
     if branches:
-        output = '  multiple git branches found'
+        output = Result('detect_git_branches', PASS,
+                        'multiple git branches found', duration)
     else:
-        output = '! fewer than 2 git branches found'
-    print(output)
+        output = Result('detect_git_branches', FAIL,
+                        'fewer than 2 git branches found', duration)
+    report(output)
 
     # check for a dev/feature branch
-    # TODO: pull some of this out into a function
-    develop = False
-    for name in rule_set['dev_branch_names']:
-        if rules.check_for_develop_branch(args.directory, name):
-            develop = True
-            output = '  development branch "{}" found'.format(name)
-            print(output)
+    start = time.perf_counter()
+    develop = rules.find_develop_branches(repository,
+                                          rule_set['dev_branch_names'])
+    duration = time.perf_counter() - start
+    for name in develop:
+        output = Result('dev_branch_names', PASS,
+                        'development branch "{}" found'.format(name),
+                        duration)
+        report(output)
     if not develop:
-        output = '! no development branch found'
-        print(output)
+        output = Result('dev_branch_names', FAIL,
+                        'no development branch found', duration)
+        report(output)
 
 
-def check_multiple_git_commits(args):
-    """Call the check for multiple commits on a branch and print the
-    result to stdout.
+def check_multiple_git_commits(repository, report=print):
+    """Call the check for multiple commits on a branch and report the
+    result.
 
     Parameters
     ----------
-    args : argparse.Namespace
-        Arguments input when script is called from the console
+    repository : string or gitrepo.GitContext
+        Path to the git repository to check, or the repository already
+        opened
+    report : callable
+        Called with each results.Result; defaults to printing to stdout
 
     Returns
     -------
     None
     """
-    multiple_commits = rules.check_for_multiple_commits(args.directory)
+    start = time.perf_counter()
+    multiple_commits = rules.check_for_multiple_commits(repository)
+    duration = time.perf_counter() - start
     if multiple_commits:
-        output = '  multiple commits on a branch found'
+        output = Result('multiple_git_commits', PASS,
+                        'multiple commits on a branch found', duration)
+    else:
+        output = Result('multiple_git_commits', FAIL,
+                        'one or fewer commits on each branch', duration)
+    report(output)
+
+
+def check_signed_git_commits(repository, rule_set, report=print):
+    """Call the check for signed commits and report the result: whether
+    every commit checked is signed and, if the signatures are verified,
+    whether they are all good.
+
+    Parameters
+    ----------
+    repository : string or gitrepo.GitContext
+        Path to the git repository to check, or the repository already
+        opened
+    rule_set : dict
+        Contains the structured data from the parsed configuration file
+    report : callable
+        Called with each results.Result; defaults to printing to stdout
+
+    Returns
+    -------
+    None
+    """
+    options = _section(rule_set, 'signed_commits')
+    start = time.perf_counter()
+    commits = rules.check_for_signed_commits(repository, options)
+    duration = time.perf_counter() - start
+    unsigned = [commit for commit in commits if not commit.signed]
+    if not commits:
+        output = Result('signed_commits', SKIP, 'no commits to check',
+                        duration)
+    elif unsigned:
+        output = Result('signed_commits', FAIL,
+                        '{} of {} commits not signed, newest {}'.format(
+                            len(unsigned), len(commits),
+                            unsigned[0].sha[:12]), duration)
     else:
-        output = '! one or fewer commits on each branch'
-    print(output)
+        output = Result('signed_commits', PASS,
+                        'all {} commits signed'.format(len(commits)),
+                        duration)
+    report(output)
+    if options.get('verify') and len(unsigned) < len(commits):
+        bad = [commit for commit in commits
+               if commit.signed and not commit.verified]
+        signed = len(commits) - len(unsigned)
+        if bad:
+            output = Result('signed_commits', FAIL,
+                            '{} of {} signatures not verified, newest '
+                            '{}'.format(len(bad), signed, bad[0].sha[:12]),
+                            duration)
+        else:
+            output = Result('signed_commits', PASS,
+                            'all {} signatures verified'.format(signed),
+                            duration)
+        report(output)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,299 @@
+#!usr/bin/env python3
+"""
+plan.py
+
+Compile a rule set into a plan of what a run has to do: which checks are
+enabled, what each of them reads (the top-level listing, the file tree,
+the git refs) so that nothing else is read, and one matcher for every
+file name the files_exist rules look for, so the top-level directory is
+listed and matched once however many names are configured.
+
+Plans can be cached on disk, keyed by a hash of the configuration file,
+so later runs with the same file don't import or run the YAML parser.
+
+Classes
+-------
+NameMatcher
+    Finds which of several names each file name contains, in one pass.
+
+RulePlan
+    The checks, inputs and file names of a compiled rule set.
+
+Functions
+---------
+compile_plan
+    Returns the RulePlan for a rule set.
+
+load_plan
+    Returns the RulePlan for a configuration file, cached on disk.
+
+name_matcher
+    Returns a shared NameMatcher for some names.
+
+Constants
+---------
+CHECK_INPUTS
+    The inputs each check reads, as named by incremental.RuleInputs.
+
+PLAN_DIRNAME
+    Subdirectory of the cache directory that plans are kept in.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+# In the order the checks run and report
+CHECK_INPUTS = {
+    'files_exist': ('root',),
+    'code_exists': ('tree',),
+    'secrets': ('tree',),
+    'inclusive_language': ('tree',),
+    'version_control': ('refs',),
+}
+
+PLAN_DIRNAME = 'plans'
+
+# Mixed into the cache key, so plans saved in an older format are ignored
+_FORMAT = b'plan-2'
+
+
+class NameMatcher(object):
+    """Finds which of several names are part of a file name, with one
+    regular expression run over the file name. Names are matched the way
+    rules.check_file_presence matches one: anywhere in the file name,
+    case-sensitively.
+
+    Parameters
+    ----------
+    names : iterable of strings
+        The names to look for
+    """
+
+    def __init__(self, names):
+        self.names = tuple(dict.fromkeys(names))
+        # Longest first, so that at each position the longest name that
+        # starts there is matched; names that are prefixes of it are
+        # added from _prefixes, and every other name is found at its own
+        # position by the lookahead
+        alternatives = sorted(self.names, key=len, reverse=True)
+        self._regex = re.compile('(?=({}))'.format(
+            '|'.join(re.escape(name) for name in alternatives)))
+        self._prefixes = {
+            name: [other for other in self.names
+                   if other != name and name.startswith(other)]
+            for name in self.names}
+
+    def match(self, filename):
+        """Find the names that are part of a file name.
+
+        Parameters
+        ----------
+        filename : string
+            The file name
+
+        Returns
+        -------
+        set of strings
+            The names found in filename
+        """
+        found = set()
+        if not self.names:
+            return found
+        for match in self._regex.finditer(filename):
+            name = match.group(1)
+            if name not in found:
+                found.add(name)
+                found.update(self._prefixes[name])
+        return found
+
+
+class RulePlan(object):
+    """What a run with a rule set has to do.
+
+    Parameters
+    ----------
+    rule_set : dict
+        Contains the structured data from the parsed configuration file
+
+    Attributes
+    ----------
+    checks : tuple of strings
+        The enabled checks (keys of CHECK_INPUTS whose section is set and
+        not False), in the order they run
+    inputs : frozenset of strings
+        Every input the enabled checks read: 'root', 'tree' and 'refs'
+    file_rules : list of tuples of (string, list of strings)
+        Each files_exist rule and the names it looks for, in order
+    file_names : tuple of strings
+        Every name the files_exist rules look for, once each
+    """
+
+    def __init__(self, rule_set):
+        self.rule_set = rule_set
+        # A section set to False (or left empty) turns its check off
+        self.checks = tuple(check for check in CHECK_INPUTS
+                            if rule_set.get(check))
+        self.file_rules = [(rule, list(names))
+                           for files_to_check in
+                           rule_set.get('files_exist') or ()
+                           for rule, names in files_to_check.items()]
+        self.file_names = tuple(dict.fromkeys(
+            name for _, names in self.file_rules for name in names))
+        self.inputs = frozenset(name for check in self.checks
+                                for name in self.inputs_for(check))
+
+    @property
+    def matcher(self):
+        """The NameMatcher for file_names, shared by plans with the same
+        names."""
+        return name_matcher(self.file_names)
+
+    @property
+    def needs_index(self):
+        """True if any enabled check reads the directory's files."""
+        return bool(self.inputs & {'root', 'tree'})
+
+    def inputs_for(self, check):
+        """Return the inputs one check reads.
+
+        Parameters
+        ----------
+        check : string
+            A key of CHECK_INPUTS
+
+        Returns
+        -------
+        tuple of strings
+            The input names, for incremental.RuleInputs.fingerprint
+        """
+        inputs = CHECK_INPUTS[check]
+        if check == 'secrets':
+            options = self.rule_set.get('secrets')
+            if isinstance(options, dict) and options.get('scan_history'):
+                inputs += ('refs',)
+        return inputs
+
+    def to_dict(self):
+        """Return the plan as a dict of JSON-serializable values. Values
+        YAML reads as other types, such as dates, become strings."""
+        return {'rule_set': self.rule_set, 'checks': list(self.checks),
+                'inputs': sorted(self.inputs), 'file_rules': self.file_rules}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Make a RulePlan from a dict returned by to_dict, without
+        compiling it again."""
+        plan = cls.__new__(cls)
+        plan.rule_set = data['rule_set']
+        plan.checks = tuple(data['checks'])
+        plan.inputs = frozenset(data['inputs'])
+        plan.file_rules = [(rule, list(names))
+                           for rule, names in data['file_rules']]
+        plan.file_names = tuple(dict.fromkeys(
+            name for _, names in plan.file_rules for name in names))
+        return plan
+
+
+def compile_plan(rule_set):
+    """Compile a rule set into a plan.
+
+    Parameters
+    ----------
+    rule_set : dict
+        Contains the structured data from the parsed configuration file
+
+    Returns
+    -------
+    RulePlan
+    """
+    return RulePlan(rule_set)
+
+
+@functools.lru_cache(maxsize=64)
+def name_matcher(names):
+    """Return a NameMatcher for some names, made once per set of names.
+
+    Parameters
+    ----------
+    names : tuple of strings
+        The names to look for
+
+    Returns
+    -------
+    NameMatcher
+    """
+    return NameMatcher(names)
+
+
+def load_plan(path, cache_dir=None):
+    """Read a configuration file and compile it, or load the plan saved
+    the last time a file with the same content was compiled. A relative
+    signed_commits keyring is taken to be relative to the directory the
+    file is in.
+
+    Parameters
+    ----------
+    path : string
+        Path to the YAML configuration file
+    cache_dir : string or None
+        Directory to keep compiled plans in, under PLAN_DIRNAME; if None,
+        the file is always parsed
+
+    Returns
+    -------
+    RulePlan
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    # Paths in the file are relative to the file, not the current
+    # directory; they are resolved after loading, since the cached plan
+    # is shared by every file with the same content
+    config_dir = os.path.dirname(os.path.abspath(path))
+    plan_path = None
+    if cache_dir is not None:
+        key = hashlib.sha1(_FORMAT + data).hexdigest()
+        plan_path = os.path.join(cache_dir, PLAN_DIRNAME, key + '.json')
+        try:
+            with open(plan_path, 'r') as f:
+                plan = RulePlan.from_dict(json.load(f))
+            _resolve_paths(plan.rule_set, config_dir)
+            return plan
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    import yaml
+    plan = compile_plan(yaml.safe_load(data))
+    if plan_path is not None:
+        _save(plan, plan_path)
+    # Return what later runs will load, so every run sees the same values
+    plan = RulePlan.from_dict(json.loads(json.dumps(plan.to_dict(),
+                                                    default=str)))
+    _resolve_paths(plan.rule_set, config_dir)
+    return plan
+
+
+def _resolve_paths(rule_set, config_dir):
+    # The signed_commits keyring, if relative, is next to the rules file
+    options = rule_set.get('signed_commits')
+    if isinstance(options, dict) and options.get('keyring'):
+        keyring = os.path.expanduser(options['keyring'])
+        options['keyring'] = os.path.join(config_dir, keyring)
+
+
+def _save(plan, path):
+    # Written to a temporary file and renamed, so that other processes
+    # never read half a plan
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(plan.to_dict(), f, default=str, sort_keys=True)
+        os.replace(temp_path, path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
@@ -0,0 +1,144 @@
+#!usr/bin/env python3
+"""
+remote.py
+
+Check repositories given by URL instead of by path. The repository is
+cloned without its file contents: a shallow, blobless partial clone
+(`git clone --filter=blob:none --depth N`) has only the newest commits
+and their trees. Git fetches a file's blob from the remote the first time
+a rule reads it, so checking a large repository for a README downloads
+its trees and the few files looked at, not every version of every file.
+
+Clones can be kept as mirrors in a cache directory, in which case later
+runs only fetch what has changed since.
+
+Functions
+---------
+is_remote
+    Returns True if a repository argument is a URL rather than a path.
+
+clone
+    Context manager giving a local bare clone of a remote repository.
+
+mirror_path
+    Returns where the mirror of a URL is kept in a cache directory.
+
+Constants
+---------
+CLONE_DEPTH
+    How many commits of history each branch is cloned with.
+
+MIRRORS_DIRNAME
+    Subdirectory of the cache directory that mirrors are kept in.
+"""
+
+import contextlib
+import hashlib
+import os
+import re
+import tempfile
+
+# Enough history for the version control checks' default windows
+CLONE_DEPTH = 100
+
+MIRRORS_DIRNAME = 'mirrors'
+
+# scheme://..., or scp-like user@host:path
+_URL = re.compile(r'[A-Za-z][A-Za-z0-9+.-]*://|[\w.-]+@[\w.-]+:')
+
+
+def is_remote(repository):
+    """Check whether a repository argument is a URL (https://, ssh://,
+    git://, file:// or user@host:path) rather than a local path.
+
+    Parameters
+    ----------
+    repository : string
+        Path or URL of a repository
+
+    Returns
+    -------
+    boolean
+        True if repository is a URL
+    """
+    return _URL.match(repository) is not None
+
+
+@contextlib.contextmanager
+def clone(url, mirrors=None, depth=CLONE_DEPTH):
+    """Make a local bare clone of a remote repository, without blobs,
+    for as long as the with block runs.
+
+    Parameters
+    ----------
+    url : string
+        URL of the repository
+    mirrors : string or None
+        Directory to keep a mirror of the repository in, reused and
+        updated on later runs. If None, the clone is made in a temporary
+        directory and removed afterwards.
+    depth : int or None
+        Commits of history to clone on each branch; None for all
+
+    Yields
+    ------
+    string
+        Path to the bare clone, checked out at the remote's HEAD
+
+    Raises
+    ------
+    git.GitCommandError if the repository can't be cloned or fetched
+    """
+    import git
+    shallow = [] if depth is None else ['--depth', str(depth)]
+    if mirrors is not None:
+        path = mirror_path(url, mirrors)
+        if os.path.isdir(path):
+            # Blobs are still left out: the clone remembers its filter
+            git.Git(path).fetch('--prune', *shallow)
+        else:
+            os.makedirs(mirrors, exist_ok=True)
+            _clone(url, path, shallow)
+        yield path
+        return
+    with tempfile.TemporaryDirectory(prefix='openlinter-') as temp:
+        path = os.path.join(temp, _mirror_name(url))
+        _clone(url, path, shallow)
+        yield path
+
+
+def mirror_path(url, mirrors):
+    """Return the path a URL's mirror is kept at.
+
+    Parameters
+    ----------
+    url : string
+        URL of the repository
+    mirrors : string
+        Directory the mirrors are kept in
+
+    Returns
+    -------
+    string
+        Path to the mirror, named after the repository and a hash of url
+        so that different URLs don't share one
+    """
+    digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:12]
+    name = _mirror_name(url)
+    return os.path.join(mirrors, '{}-{}.git'.format(name[:-len('.git')],
+                                                    digest))
+
+
+def _clone(url, path, shallow):
+    import git
+    # --mirror keeps every branch and sets up fetching them all again
+    git.Git().clone('--mirror', '--no-single-branch', '--filter=blob:none',
+                    *(shallow + [url, path]))
+
+
+def _mirror_name(url):
+    # The last part of the URL, such as project.git
+    name = re.split(r'[/:]', url.rstrip('/'))[-1]
+    if name.endswith('.git'):
+        name = name[:-len('.git')]
+    return (re.sub(r'[^\w.-]', '_', name) or 'repository') + '.git'
@@ -0,0 +1,175 @@
+#!usr/bin/env python3
+"""
+results.py
+
+Structured results for the checks, and the reporters that write them out.
+Each check reports a Result as soon as it finishes; a reporter turns the
+results into the linter's usual text output or into newline-delimited
+JSON (one object per line) for other tools to read as the run goes on.
+
+Classes
+-------
+Result
+    The outcome of one check: rule id, status, detail and duration.
+
+TextReporter
+    Writes results in the linter's text format.
+
+JsonReporter
+    Writes results as newline-delimited JSON.
+
+Functions
+---------
+get_reporter
+    Returns the reporter for an output format name.
+
+Constants
+---------
+PASS, FAIL, SKIP, UNDETERMINED, ERROR, INFO
+    Result statuses.
+
+FORMATS
+    Names of the output formats, for get_reporter.
+"""
+
+import json
+import sys
+
+
+PASS = 'pass'
+FAIL = 'fail'
+# The check couldn't be run, e.g. a git check without a git repository
+SKIP = 'skip'
+# The check stopped at a limit before it could tell whether it passed
+UNDETERMINED = 'undetermined'
+# The check raised an error
+ERROR = 'error'
+# Not a check, just information about the run
+INFO = 'info'
+
+FORMATS = ('text', 'json')
+
+
+class Result(object):
+    """The outcome of one check.
+
+    Parameters
+    ----------
+    rule_id : string
+        Which check this is the result of, named after its setting in the
+        configuration file (e.g. 'code_exists', 'files_exist.readme')
+    status : string
+        One of PASS, FAIL, SKIP, UNDETERMINED, ERROR or INFO
+    detail : string
+        Human-readable description of the result
+    duration : float
+        Seconds spent on the check in this run; 0 if its result was reused
+    directory : string or None
+        Path to the directory that was checked
+    """
+    __slots__ = ('rule_id', 'status', 'detail', 'duration', 'directory')
+
+    def __init__(self, rule_id, status, detail, duration=0.0,
+                 directory=None):
+        self.rule_id = rule_id
+        self.status = status
+        self.detail = detail
+        self.duration = duration
+        self.directory = directory
+
+    def __repr__(self):
+        return '<Result {} {}: {!r}>'.format(self.rule_id, self.status,
+                                            self.detail)
+
+    def __str__(self):
+        # The linter's text format: problems are marked with a !
+        marker = ' ' if self.status in (PASS, INFO) else '!'
+        return '{} {}'.format(marker, self.detail)
+
+    @property
+    def passed(self):
+        """True if the check passed."""
+        return self.status == PASS
+
+    def to_dict(self):
+        """Return the result as a dict of JSON-serializable values."""
+        return {'directory': self.directory, 'rule_id': self.rule_id,
+                'status': self.status, 'detail': self.detail,
+                'duration': self.duration}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Make a Result from a dict returned by to_dict."""
+        return cls(data['rule_id'], data['status'], data['detail'],
+                   data.get('duration', 0.0), data.get('directory'))
+
+
+class TextReporter(object):
+    """Writes results in the linter's text format, one line per result.
+
+    Parameters
+    ----------
+    stream : file object or None
+        Where to write; defaults to sys.stdout at the time of writing
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def begin(self, directory):
+        """Start the output for a directory, when checking several."""
+        self._write(directory)
+
+    def report(self, result):
+        """Write out one result."""
+        self._write(str(result))
+
+    def _write(self, line):
+        stream = self.stream or sys.stdout
+        stream.write(line + '\n')
+
+
+class JsonReporter(TextReporter):
+    """Writes each result as a JSON object on its own line, flushing
+    after every line so readers see results as soon as they are ready.
+
+    Parameters
+    ----------
+    stream : file object or None
+        Where to write; defaults to sys.stdout at the time of writing
+    """
+
+    def begin(self, directory):
+        """Results carry their directory, so nothing is written."""
+        pass
+
+    def report(self, result):
+        """Write out one result."""
+        stream = self.stream or sys.stdout
+        stream.write(json.dumps(result.to_dict(), sort_keys=True) + '\n')
+        stream.flush()
+
+
+def get_reporter(name, stream=None):
+    """Return a reporter for an output format.
+
+    Parameters
+    ----------
+    name : string
+        One of FORMATS
+    stream : file object or None
+        Where to write; defaults to sys.stdout
+
+    Returns
+    -------
+    TextReporter or JsonReporter
+
+    Raises
+    ------
+    ValueError if there is no such format
+    """
+    if name == 'text':
+        return TextReporter(stream)
+    if name == 'json':
+        return JsonReporter(stream)
+    raise ValueError('unknown output format: {}'.format(name))
@@ -7,9 +7,15 @@ meets desired criteria. Generally called in `openlinter.py`.
 
 Functions
 ---------
+candidate_lexer_names
+    Returns the Pygments lexers whose file name patterns match a file name.
+
 check_file_presence
     Checks whether a directory contains a file whose name contains a keyword.
 
+check_files_presence
+    Checks check_file_presence for several keywords in one pass.
+
 check_for_code
     Returns True if a directory contains a "code"-containing file.
 
@@ -19,40 +25,130 @@ check_for_develop_branch
 check_for_file_content
     Returns True if a directory contains at least one "code" file.
 
+check_for_flagged_terms
+    Returns the uses of words to avoid in a directory's comments and docs.
+
+check_for_languages
+    Returns the files and bytes of each language in a directory.
+
 check_for_multiple_commits
     Returns True if a git repository has at least one branch with more than
     one commit.
 
+check_for_secrets
+    Returns the possible secrets (keys, passwords etc.) in a directory.
+
+check_for_signed_commits
+    Returns which commits on a git repository's branches are signed.
+
 check_multiple_branches
     Returns True if a git repository has more than one branch.
 
 detect_version_control
     Identifies the version control system, if any. Currently checks for git.
 
+find_develop_branches
+    Returns which of several names are used by a repository's branches.
+
 get_file_text
     Returns the text of a given file, if it has UTF-8-decodable text.
 
 guess_code_present
     Uses Pygments to guess for the type of code in a file.
 
+guess_entry_lexer_name
+    Returns the name of the Pygments lexer guessed for a file in an index.
+
+guess_lexer_name
+    Returns the name of the Pygments lexer guessed for a file.
+
+is_code_lexer
+    Returns True if a lexer name is for "code", not structured text.
+
+looks_binary
+    Returns True if the first bytes of a file show that it is binary.
+
+warm_up
+    Builds the lookup tables the code checks use ahead of the first check.
+
 
 Constants
 ---------
 NOT_CODE
     lexer.name from the Pygments lexers that correspond to "structured
     text", not "code".
+
+SNIFF_BYTES, MAX_GUESS_BYTES
+    Default limits on how much of a file is read to classify it.
+
+BINARY_SIGNATURES
+    Magic numbers that start common binary file formats.
+
+CODE_DIRECTORIES, NON_CODE_DIRECTORIES
+    Directory names that usually do and don't hold source code.
+
+CODE_EXTENSIONS, NON_CODE_EXTENSIONS
+    File extensions of source code, and of documents, data and media.
 """
+import codecs
+import fnmatch
+import functools
 import os
+import re
+import time
 
-import git
-import pygments.lexers as lexers
+import openlinter.gitrepo as gitrepo
+from openlinter.cache import blob_key, file_key
+from openlinter.fsindex import FileIndex
+from openlinter.ignore import IgnoreRules
+from openlinter.instrument import record
+from openlinter.plan import name_matcher
+from openlinter.treeindex import GitTreeIndex
 
 # Pygments lexer names that will parse files that are not code
 NOT_CODE = ['markdown','BBCode', 'Groff', 'MoinMoin/Trac Wiki markup',
             'reStructuredText', 'TeX','Gettext Catalog', 'HTTP', 'IRC logs',
             'Todotxt']
 
-def check_file_presence(keyword, directory):
+# Bytes read from the start of a file to check whether it is binary
+SNIFF_BYTES = 8192
+
+# Most bytes of a file's text given to the lexer guesser
+MAX_GUESS_BYTES = 65536
+
+# Magic numbers at the start of common binary file formats
+BINARY_SIGNATURES = (
+    b'\x89PNG', b'\xff\xd8\xff', b'GIF87a', b'GIF89a', b'%PDF-', b'PK\x03\x04',
+    b'\x1f\x8b', b'BZh', b'\xfd7zXZ\x00', b'7z\xbc\xaf\x27\x1c', b'\x7fELF',
+    b'\xca\xfe\xba\xbe', b'\xcf\xfa\xed\xfe', b'\x00asm',
+    b'SQLite format 3\x00', b'RIFF', b'OggS', b'fLaC', b'ID3',
+    b'\x1a\x45\xdf\xa3', b'PAR1', b'\x93NUMPY', b'\x89HDF\r\n\x1a\n',
+)
+
+# Where check_for_code looks first and last (compared lowercased)
+CODE_DIRECTORIES = frozenset([
+    'src', 'source', 'sources', 'lib', 'libs', 'app', 'apps', 'cmd', 'pkg',
+    'internal', 'bin', 'scripts', 'server', 'client'])
+NON_CODE_DIRECTORIES = frozenset([
+    'data', 'datasets', 'testdata', 'doc', 'docs', 'documentation', 'assets',
+    'static', 'media', 'images', 'img', 'fixtures'])
+CODE_EXTENSIONS = frozenset([
+    '.py', '.pyx', '.js', '.mjs', '.jsx', '.ts', '.tsx', '.go', '.rs',
+    '.java', '.kt', '.scala', '.clj', '.groovy', '.c', '.h', '.cc', '.cpp',
+    '.cxx', '.hpp', '.cs', '.fs', '.swift', '.m', '.rb', '.php', '.pl',
+    '.pm', '.r', '.jl', '.lua', '.sh', '.bash', '.ex', '.exs', '.erl', '.hs',
+    '.ml', '.dart', '.vue', '.coffee', '.sql'])
+NON_CODE_EXTENSIONS = frozenset([
+    '.md', '.markdown', '.rst', '.txt', '.csv', '.tsv', '.json', '.xml',
+    '.log', '.dat', '.bin', '.pdf', '.png', '.jpg', '.jpeg', '.gif', '.svg',
+    '.ico', '.mp3', '.mp4', '.wav', '.zip', '.gz', '.tar', '.parquet',
+    '.npy', '.h5'])
+
+# Costs for check_for_code's search order: a file costs its own cost plus
+# its directories' costs, and cheaper files are checked first
+_PREFERRED, _NEUTRAL, _AVOIDED = 0, 1, 3
+
+def check_file_presence(keyword, directory, index=None):
     """Checks whether a given directory contains a file whose name contains
     a given keyword and whether that file has content.
 
@@ -62,6 +158,9 @@ def check_file_presence(keyword, directory):
         a string containing the term to search for
     directory : string
         a string containing the path to the directory to search in
+    index : FileIndex or None
+        an index of directory shared with other checks; one is made if
+        not given
 
     Returns
     -------
@@ -75,11 +174,12 @@ def check_file_presence(keyword, directory):
     """
     # TODO: minor refactoring, this should be a separate check than
     # the check for file content, should not return True/None/False
-    files = os.listdir(directory)
-    for filename in files:
-        if os.path.isfile(os.path.join(directory, filename)):
-            if keyword in filename:
-                if check_for_file_content(os.path.join(directory,filename)):
+    if index is None:
+        index = FileIndex(directory)
+    for entry in index.listdir():
+        if entry.is_file:
+            if keyword in entry.name:
+                if check_for_file_content(entry.path, index):
                     return True
                 else:
                     return None
@@ -87,13 +187,58 @@ def check_file_presence(keyword, directory):
     return False
 
 
-def check_for_file_content(filepath):
+def check_files_presence(keywords, directory, index=None):
+    """Check, for each of several keywords, whether a directory contains
+    a file whose name contains it and whether that file has content. The
+    top-level listing is matched against every keyword at once (see
+    plan.NameMatcher), so the cost doesn't grow with the number of
+    keywords.
+
+    Parameters
+    ----------
+    keywords : iterable of strings
+        The terms to search for
+    directory : string
+        Path to the directory to search in
+    index : FileIndex or None
+        An index of directory shared with other checks; one is made if
+        not given
+
+    Returns
+    -------
+    dict
+        Maps each keyword to what check_file_presence would return for
+        it: True, None (the file is empty) or False (no file)
+    """
+    if index is None:
+        index = FileIndex(directory)
+    matcher = name_matcher(tuple(keywords))
+    found = dict.fromkeys(matcher.names, False)
+    remaining = len(found)
+    for entry in index.listdir():
+        if not remaining:
+            break
+        if not entry.is_file:
+            continue
+        for keyword in matcher.match(entry.name):
+            # The first file listed that matches decides, as in
+            # check_file_presence
+            if found[keyword] is False:
+                found[keyword] = check_for_file_content(entry.path,
+                                                        index) or None
+                remaining -= 1
+    return found
+
+
+def check_for_file_content(filepath, index=None):
     """Check whether a given file has content (is > 0 bytes).
 
     Parameters
     ----------
     filepath : string
         Path to the file to check for content.
+    index : FileIndex or None
+        Index containing the file; its cached size is used if given.
 
     Returns
     -------
@@ -102,10 +247,15 @@ def check_for_file_content(filepath):
 
     Raises FileNotFound error if there is no file at the given path.
     """
+    if index is not None:
+        entry = index.get(filepath)
+        if entry is not None:
+            return entry.size > 0
+    record('stats')
     return os.path.getsize(filepath) > 0
 
 
-def check_for_code(directory):
+def check_for_code(directory, index=None, cache=None, options=None):
     """Check whether a directory contains at least one file that is
     likely to be code (as judged by Pygment's guess_lexer functionality).
 
@@ -113,20 +263,316 @@ def check_for_code(directory):
     ----------
     directory : string
         Path to a directory.
+    index : FileIndex or None
+        An index of directory shared with other checks, which can be a
+        treeindex.GitTreeIndex to check a commit. If not given, one is
+        made that skips version control directories.
+    cache : cache.ClassificationCache or None
+        Persistent cache of lexer guesses. Files with a cached result are
+        not read or classified again.
+    options : dict or None
+        The code_detection section of the configuration file, which can
+        set sniff_bytes and max_read_bytes (see guess_lexer_name), and
+        limits on the whole search: max_files (files classified),
+        max_bytes (bytes read) and max_seconds.
 
     Returns
     -------
-    boolean
-        True if the directory probably has code files, False otherwise.
+    boolean or None
+        True if the directory probably has code files, False if it
+        doesn't, or None (undetermined) if a limit was reached first.
+
+    Files are checked best first rather than in listing order: source
+    directories (CODE_DIRECTORIES) and source files (CODE_EXTENSIONS)
+    before the rest, and documents, data and media last, so that a
+    project's code is usually found after classifying a few files.
     """
-    code_present = False
-    for root, dirs, files in os.walk(directory):
-        for f in files:
-            code_present = guess_code_present(os.path.join(root, f))
-            if code_present:
-                return True
+    options = options or {}
+    sniff_bytes = options.get('sniff_bytes', SNIFF_BYTES)
+    max_bytes = options.get('max_read_bytes', MAX_GUESS_BYTES)
+    budget = _Budget(options.get('max_files'), options.get('max_bytes'),
+                     options.get('max_seconds'))
+    if index is None:
+        index = FileIndex(directory, IgnoreRules())
+    tracked = _tracked_files(directory, index, cache)
+    for entry in index.iter_files_by(_code_priority):
+        if budget.exhausted():
+            return None
+        budget.files += 1
+        lexer_name = _cached_lexer_name(
+            entry, cache, tracked, (sniff_bytes, max_bytes),
+            functools.partial(_guess_within, budget, index, entry,
+                              sniff_bytes, max_bytes))
+        if is_code_lexer(lexer_name):
+            return True
     return False
 
+
+class _Budget(object):
+    # How much of a search check_for_code may do, and has done
+    __slots__ = ('max_files', 'max_bytes', 'deadline', 'files', 'bytes')
+
+    def __init__(self, max_files=None, max_bytes=None, max_seconds=None):
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.deadline = (None if max_seconds is None else
+                         time.perf_counter() + max_seconds)
+        self.files = 0
+        self.bytes = 0
+
+    def exhausted(self):
+        return ((self.max_files is not None and
+                 self.files >= self.max_files) or
+                (self.max_bytes is not None and
+                 self.bytes >= self.max_bytes) or
+                (self.deadline is not None and
+                 time.perf_counter() >= self.deadline))
+
+
+def _guess_within(budget, index, entry, sniff_bytes, max_bytes):
+    # guess_entry_lexer_name, counting the bytes it will read at most
+    if len(candidate_lexer_names(entry.name)) > 1:
+        budget.bytes += min(entry.size, max_bytes)
+    return guess_entry_lexer_name(index, entry, sniff_bytes, max_bytes)
+
+
+def _code_priority(entry):
+    # Search cost of an entry for check_for_code
+    if entry.is_dir:
+        name = entry.name.lower()
+        if name in CODE_DIRECTORIES:
+            return _PREFERRED
+        if name in NON_CODE_DIRECTORIES:
+            return _AVOIDED
+        return _NEUTRAL
+    ext = entry.ext
+    if ext in CODE_EXTENSIONS:
+        return _PREFERRED
+    if ext in NON_CODE_EXTENSIONS:
+        return _AVOIDED
+    return _NEUTRAL
+
+
+def check_for_languages(directory, index=None, cache=None, options=None):
+    """Count the files and bytes of each language in a directory, like
+    GitHub's linguist. Unlike check_for_code, every file is classified,
+    in parallel over a pool of processes (see census.count_languages).
+
+    Parameters
+    ----------
+    directory : string
+        Path to a directory.
+    index : FileIndex or None
+        An index of directory shared with other checks, which can be a
+        treeindex.GitTreeIndex to check a commit; a commit's files are
+        read through this process's git and classified here. If not
+        given, one is made that skips version control directories.
+    cache : cache.ClassificationCache or None
+        Persistent cache of lexer guesses, shared with check_for_code.
+        Only files that aren't cached are sent to the workers.
+    options : dict or None
+        The code_detection section of the configuration file, which can
+        set sniff_bytes and max_read_bytes (see guess_lexer_name) and
+        census_jobs, the number of processes (the number of CPUs if not
+        set). The limits on check_for_code's search don't apply.
+
+    Returns
+    -------
+    census.LanguageCensus
+        The files and bytes of each lexer name; its code attribute is
+        what check_for_code would return.
+    """
+    # Imported on first use, like the lexers
+    from openlinter.census import LanguageCensus, count_languages
+    options = options or {}
+    sniff_bytes = options.get('sniff_bytes', SNIFF_BYTES)
+    max_bytes = options.get('max_read_bytes', MAX_GUESS_BYTES)
+    if index is None:
+        index = FileIndex(directory, IgnoreRules())
+    tracked = _tracked_files(directory, index, cache)
+    census = LanguageCensus()
+    if isinstance(index, GitTreeIndex):
+        for entry in index.iter_files():
+            census.add(_cached_lexer_name(
+                entry, cache, tracked, (sniff_bytes, max_bytes),
+                functools.partial(
+                    guess_entry_lexer_name, index, entry, sniff_bytes,
+                    max_bytes)), entry.size)
+        return census
+
+    uncached = []
+    keys = {}
+    for entry in index.iter_files():
+        if cache is not None:
+            key = file_key(entry.name, entry.stat, (sniff_bytes, max_bytes),
+                           tracked.get(entry.relpath.replace(os.sep, '/')))
+            lexer_name = cache.get(key)
+            if lexer_name is not None:
+                census.add(lexer_name, entry.size)
+                continue
+            keys[entry.relpath] = key
+        uncached.append(entry.relpath)
+    counted, guessed = count_languages(index.directory, uncached,
+                                       sniff_bytes, max_bytes,
+                                       options.get('census_jobs'))
+    census.update(counted)
+    if cache is not None:
+        for relpath, lexer_name in guessed.items():
+            cache.put(keys[relpath], lexer_name)
+    return census
+
+
+def _tracked_files(directory, index, cache):
+    # The git index entries that cache keys for a working tree can use
+    if cache is None or isinstance(index, GitTreeIndex):
+        return {}
+    git_dir = gitrepo.find_git_dir(directory)
+    if git_dir is None:
+        return {}
+    return gitrepo.read_index(git_dir)
+
+
+def _cached_lexer_name(entry, cache, tracked, limits, guess):
+    # The lexer name for an entry from the cache, or from calling guess
+    # (and then cached), where guess reads as much of the file as limits
+    # (sniff_bytes, max_read_bytes) allow. Only files whose content has
+    # to be read are worth caching.
+    if cache is None or len(candidate_lexer_names(entry.name)) < 2:
+        return guess()
+    if getattr(entry, 'sha', None):
+        # Entries read from a git tree know their blob SHA
+        key = blob_key(entry.name, entry.sha, limits)
+    else:
+        index_entry = tracked.get(entry.relpath.replace(os.sep, '/'))
+        key = file_key(entry.name, entry.stat, limits, index_entry)
+    lexer_name = cache.get(key)
+    if lexer_name is None:
+        lexer_name = guess()
+        cache.put(key, lexer_name)
+    return lexer_name
+
+
+def check_for_flagged_terms(directory, terms=None, index=None, cache=None,
+                            options=None):
+    """Find words and phrases to avoid, such as non-inclusive language, in
+    the comments, strings and prose of the text files in a directory (see
+    terms.find_terms). Each file is tokenized with the lexer the code
+    check guesses for it.
+
+    Parameters
+    ----------
+    directory : string
+        Path to a directory.
+    terms : dict or None
+        Maps each word or phrase to look for to what to use instead, or
+        None; terms.DEFAULT_TERMS if not given
+    index : FileIndex or None
+        An index of directory shared with other checks, which can be a
+        treeindex.GitTreeIndex to check a commit. If not given, one is
+        made that skips version control directories.
+    cache : cache.ClassificationCache or None
+        Persistent cache of lexer guesses, shared with check_for_code
+    options : dict or None
+        The inclusive_language section of the configuration file, which
+        can set max_file_bytes
+
+    Returns
+    -------
+    list of terms.TermFinding
+        Each use of a term, in the order the files are walked
+    """
+    # Imported on first use, like the lexers
+    from openlinter.terms import (DEFAULT_TERMS, MAX_FILE_BYTES, TermFinding,
+                                  TermMatcher, find_terms)
+    options = options or {}
+    max_file_bytes = options.get('max_file_bytes', MAX_FILE_BYTES)
+    matcher = TermMatcher(DEFAULT_TERMS if terms is None else terms)
+    if index is None:
+        index = FileIndex(directory, IgnoreRules())
+    tracked = _tracked_files(directory, index, cache)
+    findings = []
+    for entry in index.iter_files():
+        if entry.size > max_file_bytes:
+            continue
+        with index.open(entry) as f:
+            data = f.read()
+        record('files_read')
+        record('bytes_read', len(data))
+        if looks_binary(data[:SNIFF_BYTES]):
+            continue
+        try:
+            text = data.decode('utf-8')
+        except UnicodeDecodeError:
+            continue
+        lexer_name = _cached_lexer_name(
+            entry, cache, tracked, (SNIFF_BYTES, MAX_GUESS_BYTES),
+            functools.partial(_text_lexer_name, entry.name, text))
+        for line, term, suggestion in find_terms(text, lexer_name, matcher):
+            findings.append(TermFinding(entry.relpath, line, term,
+                                        suggestion))
+    return findings
+
+def check_for_secrets(directory, index=None, options=None):
+    """Find possible secrets, such as API keys, private keys and
+    passwords, in the text files in a directory, and optionally in every
+    version of them in the git history (see secretscan.SecretScanner).
+
+    Parameters
+    ----------
+    directory : string
+        Path to a directory.
+    index : FileIndex or None
+        An index of directory shared with other checks, which can be a
+        treeindex.GitTreeIndex to check a commit. If not given, one is
+        made that skips version control directories.
+    options : dict or None
+        The secrets section of the configuration file, which can set
+        patterns (extra patterns, by name), entropy_threshold,
+        max_file_bytes and scan_history.
+
+    Returns
+    -------
+    list of secretscan.Finding
+        The possible secrets found, in the current files first and then
+        in history. Each blob in history is only scanned if it isn't one
+        of the current files.
+    """
+    # Imported on first use, like the lexers
+    from openlinter.secretscan import (ENTROPY_THRESHOLD, SecretScanner,
+                                       scan_history)
+    options = options or {}
+    scanner = SecretScanner(options.get('patterns'),
+                            options.get('entropy_threshold',
+                                        ENTROPY_THRESHOLD),
+                            options.get('max_file_bytes'))
+    if index is None:
+        index = FileIndex(directory, IgnoreRules())
+    findings = list(scanner.scan_index(index))
+    if not options.get('scan_history'):
+        return findings
+    git_dir = gitrepo.find_git_dir(directory)
+    if git_dir is None:
+        return findings
+
+    # Blobs known to be the same as a current file were scanned already
+    if isinstance(index, GitTreeIndex):
+        scanned = set(entry.sha for entry in index.iter_files())
+    else:
+        scanned = set()
+        tracked = gitrepo.read_index(git_dir)
+        for entry in index.iter_files():
+            index_entry = tracked.get(entry.relpath.replace(os.sep, '/'))
+            if index_entry is not None and index_entry.matches_stat(
+                    entry.stat):
+                scanned.add(index_entry.sha)
+    repository = gitrepo.GitContext(directory)
+    try:
+        findings.extend(scan_history(repository, scanner, scanned))
+    finally:
+        repository.close()
+    return findings
+
+
 def guess_code_present(filepath):
     """Guess whether a file contains "code" or not. Structured text
     (as listed in NOT_CODE) does not count as "code", but anything else
@@ -142,25 +588,139 @@ def guess_code_present(filepath):
     boolean
         True if the file contains "code" (as a best guess), False otherwise
     """
-    text = get_file_text(filepath)
+    return is_code_lexer(guess_lexer_name(filepath))
+
+
+def guess_lexer_name(filepath, sniff_bytes=SNIFF_BYTES,
+                     max_bytes=MAX_GUESS_BYTES):
+    """Find the name of the Pygments lexer that best fits a file, judging
+    by its file name and text.
+
+    The file is not read at all if its name matches no lexer or exactly
+    one lexer, since Pygments only looks at the text to choose between
+    several lexers. Otherwise only the first max_bytes are read, and
+    files that look binary are given up on after sniff_bytes.
+
+    Parameters
+    ----------
+    filepath : string
+        Path to the file to classify.
+    sniff_bytes : int
+        Number of bytes to check for signs that the file is binary.
+    max_bytes : int
+        Most bytes of the file to read and give to the lexer guesser.
+
+    Returns
+    -------
+    string or None
+        The lexer name, or None if Pygments has no lexer for the file
+    """
     filename = os.path.split(filepath)[1]
+    return _guess_lexer_name(filename, functools.partial(open, filepath, 'rb'),
+                             sniff_bytes, max_bytes)
+
+
+def guess_entry_lexer_name(index, entry, sniff_bytes=SNIFF_BYTES,
+                           max_bytes=MAX_GUESS_BYTES):
+    """Find the name of the Pygments lexer that best fits a file in an
+    index, reading its content (if needed) through the index. Works the
+    same way as guess_lexer_name.
+
+    Parameters
+    ----------
+    index : fsindex.FileIndex or treeindex.GitTreeIndex
+        Index the file is in
+    entry : fsindex.Entry or treeindex.TreeEntry
+        The file's entry in the index
+    sniff_bytes : int
+        Number of bytes to check for signs that the file is binary.
+    max_bytes : int
+        Most bytes of the file to read and give to the lexer guesser.
+
+    Returns
+    -------
+    string or None
+        The lexer name, or None if Pygments has no lexer for the file
+    """
+    return _guess_lexer_name(entry.name, functools.partial(index.open, entry),
+                             sniff_bytes, max_bytes)
+
+
+def _guess_lexer_name(filename, open_file, sniff_bytes, max_bytes):
+    candidates = candidate_lexer_names(filename)
+    if len(candidates) < 2:
+        return candidates[0] if candidates else None
+    with open_file() as f:
+        text = _read_text_head(f, max_bytes, sniff_bytes)
+    if text is None:
+        return None
+    return _pick_lexer_name(filename, text)
+
+
+def _text_lexer_name(filename, text, max_chars=MAX_GUESS_BYTES):
+    # As _guess_lexer_name, for a file whose text has already been read
+    candidates = candidate_lexer_names(filename)
+    if len(candidates) < 2:
+        return candidates[0] if candidates else None
+    return _pick_lexer_name(filename, text[:max_chars])
+
+
+def _pick_lexer_name(filename, text):
+    # Imported on first use: loading Pygments' lexers is slow
+    from pygments.lexers import guess_lexer_for_filename
+    from pygments.util import ClassNotFound
     try:
-        lexer = lexers.guess_lexer_for_filename(filename, text)
-        if lexer.name not in NOT_CODE:
-            return True
-        else:
-            return False
-    except lexers.ClassNotFound:
-        return False
+        return guess_lexer_for_filename(filename, text).name
+    except ClassNotFound:
+        return None
+
+
+def looks_binary(prefix):
+    """Check whether the first bytes of a file show that it is binary:
+    it has a NUL byte or starts with a known binary magic number.
+
+    Parameters
+    ----------
+    prefix : bytes
+        The first bytes of the file
 
+    Returns
+    -------
+    boolean
+        True if the file is binary, False if it may be text
+    """
+    return b'\0' in prefix or prefix.startswith(BINARY_SIGNATURES)
+
+
+def is_code_lexer(lexer_name):
+    """Check whether a lexer name means the file is "code": anything with
+    a lexer that is not structured text (as listed in NOT_CODE).
+
+    Parameters
+    ----------
+    lexer_name : string or None
+        Lexer name from guess_lexer_name; '' or None for no lexer
 
-def get_file_text(filepath):
+    Returns
+    -------
+    boolean
+        True if the lexer is for code, False otherwise
+    """
+    return bool(lexer_name) and lexer_name not in NOT_CODE
+
+
+def get_file_text(filepath, max_bytes=None, sniff_bytes=SNIFF_BYTES):
     """Return the text of a file in a given location, if it has text.
 
     Parameters
     ----------
     filepath : string
         Path to file to read
+    max_bytes : int or None
+        If given, read at most this many bytes from the start of the file
+        and return None early for files that look binary
+    sniff_bytes : int
+        With max_bytes, how many bytes to check for signs of a binary file
 
     Results
     -------
@@ -171,11 +731,89 @@ def get_file_text(filepath):
     ------
     FileNotFoundError if there is no file at filepath
     """
+    if max_bytes is not None:
+        with open(filepath, 'rb') as f:
+            return _read_text_head(f, max_bytes, sniff_bytes)
     try:
         with open(filepath, 'r') as f:
-            return f.read()
+            text = f.read()
     except UnicodeDecodeError:
         return None
+    record('files_read')
+    record('bytes_read', len(text))
+    return text
+
+
+def _read_text_head(f, max_bytes, sniff_bytes):
+    data = f.read(min(sniff_bytes, max_bytes))
+    record('files_read')
+    if looks_binary(data):
+        record('bytes_read', len(data))
+        return None
+    if len(data) < max_bytes:
+        data += f.read(max_bytes - len(data))
+    at_end = not f.read(1)
+    record('bytes_read', len(data) + (not at_end))
+    # A multi-byte character may be cut off at the end of a partial read
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        return decoder.decode(data, final=at_end)
+    except UnicodeDecodeError:
+        return None
+
+
+@functools.lru_cache(maxsize=65536)
+def candidate_lexer_names(filename):
+    """Find the Pygments lexers whose file name patterns match a file
+    name. These are the lexers guess_lexer_for_filename chooses between,
+    so a file with at most one of them can be classified without reading
+    it.
+
+    Parameters
+    ----------
+    filename : string
+        The file name, without any directory part
+
+    Returns
+    -------
+    tuple of strings
+        The names of the matching lexers, without repeats
+    """
+    names = []
+    for pattern, name in _lexer_filename_patterns():
+        if pattern.match(filename) and name not in names:
+            names.append(name)
+    return tuple(names)
+
+
+def warm_up():
+    """Build the lookup tables the code checks use, so that the first
+    check doesn't have to wait for them. Long-lived processes, such as
+    worker processes and servers, call this once when they start.
+
+    Returns
+    -------
+    None
+    """
+    _lexer_filename_patterns()
+
+
+@functools.lru_cache(maxsize=None)
+def _lexer_filename_patterns():
+    # Built once: guess_lexer_for_filename loops over every lexer class
+    # and every pattern each time it is called. It matches the same
+    # patterns, in the same order: each lexer's filenames, which
+    # get_all_lexers lists, then its alias_filenames.
+    from pygments.lexers import find_lexer_class, get_all_lexers
+    patterns = []
+    for name, _, filenames, _ in get_all_lexers(plugins=True):
+        lexer = find_lexer_class(name)
+        globs = list(filenames)
+        if lexer is not None:
+            globs.extend(lexer.alias_filenames)
+        for glob in globs:
+            patterns.append((re.compile(fnmatch.translate(glob)), name))
+    return patterns
 
 
 def detect_version_control(directory):
@@ -199,6 +837,9 @@ def detect_version_control(directory):
 
     if os.path.isdir(os.path.join(directory, '.git/')):
         version_control_system = 'git'
+    elif gitrepo.find_git_dir(directory) is not None:
+        # Bare repository, or a worktree with a .git file
+        version_control_system = 'git'
 
     # Could add checks for others here: CVS, svn, hg
 
@@ -210,8 +851,8 @@ def check_multiple_branches(repository):
 
     Parameters
     ----------
-    repository : string
-        Path to a git repository
+    repository : string or gitrepo.GitContext
+        Path to a git repository, or the repository already opened
 
     Results
     -------
@@ -224,9 +865,8 @@ def check_multiple_branches(repository):
         but not a git repository
     git.NoSuchPathError if repository is not a path to a directory
     """
-    repo = git.Repo(repository)
-    branches = repo.branches
-    if len(branches) > 1:
+    repo = gitrepo.open_repository(repository)
+    if len(repo.branches) > 1:
         return True
     else:
         return False
@@ -237,8 +877,8 @@ def check_for_develop_branch(repository, dev_branch_name):
 
     Parameters
     ----------
-    repository : string
-        Path to a git repository
+    repository : string or gitrepo.GitContext
+        Path to a git repository, or the repository already opened
 
     dev_branch_name : string
         Desired branch name to check for
@@ -254,15 +894,44 @@ def check_for_develop_branch(repository, dev_branch_name):
         but not a git repository
     git.NoSuchPathError if repository is not a path to a directory
     """
-    repo = git.Repo(repository)
-    branches = repo.branches
-    for branch in branches:
-        if dev_branch_name in branch.name:
-            break
-    else:
-        return False
+    return bool(find_develop_branches(repository, [dev_branch_name]))
+
 
-    return True
+def find_develop_branches(repository, dev_branch_names):
+    """Find which of several development branch names are used by a git
+    repository's branches, in one pass over the branches.
+
+    Parameters
+    ----------
+    repository : string or gitrepo.GitContext
+        Path to a git repository, or the repository already opened
+
+    dev_branch_names : list of strings
+        Desired branch names to check for
+
+    Results
+    -------
+    list of strings
+        The names in dev_branch_names that are part of a branch name,
+        in the order they were given
+
+    Raises
+    ------
+    git.InvalidGitRepositoryError if repository is a path to a directory
+        but not a git repository
+    git.NoSuchPathError if repository is not a path to a directory
+    """
+    repo = gitrepo.open_repository(repository)
+    remaining = set(dev_branch_names)
+    found = set()
+    for branch in repo.branches:
+        for name in remaining:
+            if name in branch:
+                found.add(name)
+        remaining -= found
+        if not remaining:
+            break
+    return [name for name in dev_branch_names if name in found]
 
 
 def check_for_multiple_commits(repository):
@@ -270,8 +939,8 @@ def check_for_multiple_commits(repository):
 
     Parameters
     ----------
-    repository : string
-        Path to a git repository
+    repository : string or gitrepo.GitContext
+        Path to a git repository, or the repository already opened
 
     Results
     -------
@@ -284,20 +953,44 @@ def check_for_multiple_commits(repository):
         but not a git repository
     git.NoSuchPathError if repository is not a path to a directory
     """
-    repo = git.Repo(repository)
-    branches = repo.branches
-    multiple_commits = False
-    for branch in branches:
-        # Number of commits accessible from branch head
-        count = branch.commit.count()
-        if count > 1:
-            multiple_commits = True
-    return multiple_commits
-
-
-# TODO: figure out how to do this, flesh this out
-def check_for_signed_commits(repository):
-    repo = git.Repo(repository)
-    branches = repo.branches
-    for branch in branches:
-        pass
+    repo = gitrepo.open_repository(repository)
+    for ref_value in repo.branches.values():
+        # A branch head with a parent has at least two commits, so the
+        # first one found answers the question
+        sha = repo.resolve(ref_value)
+        if sha is not None and repo.commit_parents(sha):
+            return True
+    return False
+
+
+def check_for_signed_commits(repository, options=None):
+    """Check which commits on a git repository's branches are signed,
+    reading the commits in bulk (see signatures.check_commits). A commit
+    on several branches is only checked once.
+
+    Parameters
+    ----------
+    repository : string or gitrepo.GitContext
+        Path to a git repository, or the repository already opened
+    options : dict or None
+        The signed_commits section of the configuration file, which can
+        set max_commits (check only the newest commits), since and until
+        (dates), verify (check signatures with gpgv) and keyring.
+
+    Results
+    -------
+    list of signatures.CommitSignature
+        One for each commit checked, newest first
+
+    Raises
+    ------
+    git.InvalidGitRepositoryError if repository is a path to a directory
+        but not a git repository
+    git.NoSuchPathError if repository is not a path to a directory
+    """
+    from openlinter.signatures import check_commits
+    options = options or {}
+    return list(check_commits(repository, options.get('max_commits'),
+                              options.get('since'), options.get('until'),
+                              options.get('verify', False),
+                              options.get('keyring')))
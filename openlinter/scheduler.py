@@ -0,0 +1,159 @@
+#!usr/bin/env python3
+"""
+scheduler.py
+
+Run the checks for one repository concurrently. Each check is a Task that
+can depend on earlier tasks (the git checks depend on detecting version
+control, for example); a task is started on a thread pool as soon as the
+tasks it depends on have finished. The checks mostly wait on the
+filesystem or on git subprocesses, so threads let them overlap, and a run
+takes about as long as its slowest chain of checks.
+
+Output is still reported in the order the tasks were given, whatever order
+they finish in: each task's output is held until every task before it has
+been reported.
+
+Classes
+-------
+Task
+    A check to run, with the tasks it depends on.
+
+Functions
+---------
+run_tasks
+    Run tasks concurrently and report their output in order.
+"""
+
+class Task(object):
+    """A check to run as part of run_tasks.
+
+    The task is run as function(*values, *args, report=...), where values
+    are the return values of the tasks it depends on, in the order given.
+
+    Parameters
+    ----------
+    name : string
+        Name of the task, unique within a run
+    function : callable
+        The check to run
+    *args
+        Passed on to function
+    depends : list of strings
+        Names of tasks, given earlier in the same run, that have to finish
+        before this one starts
+    after : list of strings
+        Names of earlier tasks that have to finish before this one starts,
+        without their values being passed on (e.g. because they use the
+        same resource)
+    """
+
+    def __init__(self, name, function, *args, depends=(), after=()):
+        self.name = name
+        self.function = function
+        self.args = args
+        self.depends = tuple(depends)
+        self.after = tuple(after)
+
+    def __repr__(self):
+        return '<Task {!r}>'.format(self.name)
+
+
+def run_tasks(tasks, report=print, threads=None):
+    """Run tasks, each as soon as the tasks it depends on have finished,
+    and report their output in the order the tasks are given.
+
+    If a task raises an exception, no more tasks are started; the output
+    of the tasks before it (and its own output up to the error) is
+    reported, and the exception is raised once the running tasks finish.
+
+    Parameters
+    ----------
+    tasks : list of Task
+        The tasks to run. A task can only depend on tasks before it.
+    report : callable
+        Called with each result, always from the calling thread
+    threads : int or None
+        Most tasks to run at once. None runs every task that is ready;
+        1 runs the tasks one after another in this thread.
+
+    Returns
+    -------
+    dict
+        Maps each task's name to the value it returned
+
+    Raises
+    ------
+    ValueError if a task depends on a task that isn't before it
+    """
+    seen = set()
+    for task in tasks:
+        missing = [name for name in task.depends + task.after
+                   if name not in seen]
+        if missing:
+            raise ValueError('task {!r} depends on {}, which must come '
+                             'before it'.format(task.name, ', '.join(missing)))
+        seen.add(task.name)
+
+    values = {}
+    if threads == 1 or len(tasks) < 2:
+        for task in tasks:
+            values[task.name] = _call(task, values, report)
+        return values
+
+    import concurrent.futures
+    outputs = dict((task.name, []) for task in tasks)
+    waiting = list(tasks)
+    finished = set()
+    reported = 0
+    error = None
+    failed = None
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=threads or len(tasks)) as executor:
+        running = {}
+        while True:
+            if error is None:
+                for task in list(waiting):
+                    if all(name in finished
+                           for name in task.depends + task.after):
+                        waiting.remove(task)
+                        future = executor.submit(_call, task, values,
+                                                 outputs[task.name].append)
+                        running[future] = task
+            if not running:
+                break
+            done, _ = concurrent.futures.wait(
+                running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                task = running.pop(future)
+                try:
+                    values[task.name] = future.result()
+                except Exception as e:
+                    if error is None:
+                        error = e
+                        failed = task
+                    continue
+                finished.add(task.name)
+            # Report everything that is ready, in order
+            while reported < len(tasks):
+                name = tasks[reported].name
+                if name not in finished:
+                    break
+                for result in outputs[name]:
+                    report(result)
+                reported += 1
+    if error is not None:
+        # The output of the finished tasks before the one that failed,
+        # then its own up to the failure
+        for task in tasks[reported:tasks.index(failed)]:
+            if task.name in finished:
+                for result in outputs[task.name]:
+                    report(result)
+        for result in outputs[failed.name]:
+            report(result)
+        raise error
+    return values
+
+
+def _call(task, values, report):
+    dependencies = [values[name] for name in task.depends]
+    return task.function(*dependencies, *task.args, report=report)
@@ -0,0 +1,462 @@
+#!usr/bin/env python3
+"""
+secretscan.py
+
+Scan files for secrets committed to a repository: API keys, private keys,
+passwords and other credentials, and some personal information. Every
+pattern is combined into one regular expression, so each file is read and
+matched in a single pass however many patterns there are. Long tokens that
+look random (by their Shannon entropy) are flagged too, since generated
+keys and tokens rarely match a fixed pattern.
+
+Each pattern starts with a literal character. The regular expression
+engine then only tries the combined expression at bytes that can start a
+match, instead of trying every pattern at every byte, which makes it about
+twenty times faster. Patterns that need to see what comes before their
+first character (such as a password's variable name) check it afterwards,
+with a second expression for the text before the match on its line.
+
+Files are scanned in fixed-size chunks, each matched together with the
+first OVERLAP_BYTES of the next chunk, so a secret that straddles a chunk
+boundary is still found, and found once. Large files are memory-mapped
+instead of being read into memory. History can be scanned as well: every
+blob reachable from any ref is read once, however many commits share it.
+
+Classes
+-------
+Finding
+    A possible secret found in a file.
+
+SecretScanner
+    Scans files for secrets.
+
+Functions
+---------
+scan_history
+    Scans every blob in a git repository's history.
+
+Constants
+---------
+PATTERNS
+    What the scanner looks for.
+
+HIGH_ENTROPY
+    The kind of Finding for random-looking tokens.
+
+ENTROPY_THRESHOLD
+    Bits per character above which a long token looks random.
+
+CHUNK_BYTES, OVERLAP_BYTES, MMAP_BYTES
+    Sizes used to read and match files.
+"""
+
+import collections
+import math
+import mmap
+import os
+import re
+
+from openlinter.instrument import record
+from openlinter.rules import SNIFF_BYTES, looks_binary
+from openlinter.treeindex import open_blob
+
+# Name, regular expression, and expression that the text before the match
+# on the same line has to end with (or None). No match may be longer than
+# OVERLAP_BYTES, or it can be missed where it crosses a chunk boundary.
+_PASSWORD_NAME = (r'(?i:pass(?:wo?r?d)?|secret|api_?key|auth_?token|'
+                  r'access_?token)["\']?[ \t]{0,4}$')
+PATTERNS = (
+    ('AWS access key ID', r'A[KS]IA[0-9A-Z]{16}\b', r'(?<!\w)$'),
+    ('private key', r'-----BEGIN (?:[A-Z0-9]+ ){0,2}PRIVATE KEY', None),
+    ('GitHub token', r'gh[opsu]_[A-Za-z0-9]{36,250}\b', r'(?<!\w)$'),
+    ('Slack token', r'xox[abeoprs]-[A-Za-z0-9-]{10,250}', r'(?<!\w)$'),
+    ('Google API key', r'AIza[0-9A-Za-z_-]{35}', r'(?<!\w)$'),
+    ('Stripe secret key', r'k_live_[0-9A-Za-z]{20,250}', r'(?<!\w)[rs]$'),
+    ('password in URL', r'://[^/\s:@]{1,64}:[^/\s:@]{3,64}@',
+     r'(?<!\w)[A-Za-z][\w+.-]{0,20}$'),
+    ('password assignment', r'=[ \t]{0,4}["\'][^"\'\s]{8,250}["\']',
+     _PASSWORD_NAME),
+    ('password assignment', r':[ \t]{0,4}["\'][^"\'\s]{8,250}["\']',
+     _PASSWORD_NAME),
+    ('US social security number', r'-[0-9]{2}-[0-9]{4}\b',
+     r'(?<![\w-])[0-9]{3}$'),
+)
+
+HIGH_ENTROPY = 'high-entropy string'
+
+# Shannon entropy, in bits per character, above which a token is flagged.
+# Hex strings (such as git SHAs) can't go above 4.
+ENTROPY_THRESHOLD = 4.5
+
+# Lengths of the tokens whose entropy is checked; longer runs are usually
+# embedded data (images, minified code), not keys
+MIN_TOKEN_LENGTH = 20
+MAX_TOKEN_LENGTH = 250
+
+# Bytes matched at a time, and bytes of the next chunk matched with each
+CHUNK_BYTES = 1024 * 1024
+OVERLAP_BYTES = 4096
+
+# Files at least this big are memory-mapped rather than read
+MMAP_BYTES = 4 * 1024 * 1024
+
+# Most bytes before a match that are checked for the start of its line
+_CONTEXT_BYTES = 64
+
+# Maps the characters of base64 (and URL-safe base64) to 'a' and everything
+# else to ' ', so that runs of them can be found with bytes.find
+_TOKEN_CHARS = frozenset(b'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+                         b'abcdefghijklmnopqrstuvwxyz'
+                         b'0123456789+/=_-')
+_TOKEN_MASK = bytes(ord('a') if c in _TOKEN_CHARS else ord(' ')
+                    for c in range(256))
+# Document IDs and the like in links are random too, but aren't secrets
+_IN_URL = re.compile(br'://[^\s"\'<>()]*$')
+_DIGIT = re.compile(b'[0-9]')
+_LETTER = re.compile(b'[A-Za-z]')
+# Flags such as (?i) at the start of a pattern, which apply to all of it
+_GLOBAL_FLAGS = re.compile(r'\(\?([aiLmsux]+)\)')
+
+
+class Finding(object):
+    """A possible secret found in a file.
+
+    Parameters
+    ----------
+    path : string
+        Path of the file, relative to the repository
+    line : int
+        Line the secret starts on, counting from 1
+    kind : string
+        What was found: the name of one of the patterns, or HIGH_ENTROPY
+    sha : string or None
+        SHA of the blob, for secrets found in history
+    """
+    __slots__ = ('path', 'line', 'kind', 'sha')
+
+    def __init__(self, path, line, kind, sha=None):
+        self.path = path
+        self.line = line
+        self.kind = kind
+        self.sha = sha
+
+    def __repr__(self):
+        return '<Finding {} at {}:{}>'.format(self.kind, self.path,
+                                              self.line)
+
+
+class SecretScanner(object):
+    """Scans files for secrets, matching every pattern at once.
+
+    Parameters
+    ----------
+    patterns : dict or None
+        Extra patterns to look for, mapping a name to a regular expression
+        (as a string). Matches must be at most OVERLAP_BYTES long, and
+        patterns that start with a literal character are scanned fastest.
+    entropy_threshold : float or None
+        Bits per character above which a long token that mixes letters and
+        digits counts as a secret; None to not check tokens at all
+    max_file_bytes : int or None
+        Files bigger than this are skipped
+
+    Raises
+    ------
+    ValueError if one of the patterns is not a valid regular expression
+    """
+
+    def __init__(self, patterns=None, entropy_threshold=ENTROPY_THRESHOLD,
+                 max_file_bytes=None):
+        named = list(PATTERNS) + [(name, pattern, None) for name, pattern
+                                  in sorted((patterns or {}).items())]
+        self._patterns = []
+        for name, pattern, before in named:
+            try:
+                compiled = re.compile(pattern.encode())
+            except re.error as error:
+                raise ValueError('invalid pattern for {!r} in secrets: '
+                                 '{}'.format(name, error))
+            self._patterns.append(
+                (name, compiled,
+                 re.compile(before.encode()) if before else None))
+        # Each pattern is a group of its own, so that an alternation or
+        # flags in one don't reach into the others
+        self._matcher = re.compile(b'|'.join(_scoped(pattern).encode()
+                                             for _, pattern, _ in named))
+        self.entropy_threshold = entropy_threshold
+        self.max_file_bytes = max_file_bytes
+
+    def scan_index(self, index):
+        """Scan every file in an index.
+
+        Parameters
+        ----------
+        index : fsindex.FileIndex or treeindex.GitTreeIndex
+            Index of the files to scan
+
+        Yields
+        ------
+        Finding
+            Each possible secret, in the order the files are walked
+        """
+        for entry in index.iter_files():
+            if self.max_file_bytes is not None and \
+                    entry.size > self.max_file_bytes:
+                continue
+            with index.open(entry) as f:
+                for finding in self.scan(f, entry.relpath):
+                    yield finding
+
+    def scan(self, f, path, sha=None):
+        """Scan one file. Binary files are skipped.
+
+        Parameters
+        ----------
+        f : file object
+            The file, opened for reading bytes. Real files are
+            memory-mapped if they are big enough.
+        path : string
+            Path of the file, relative to the repository
+        sha : string or None
+            SHA of the file's blob, if scanning history
+
+        Yields
+        ------
+        Finding
+            Each possible secret in the file, in order
+        """
+        mapped = _map(f)
+        if mapped is None:
+            scanned = self._scan_stream(f)
+        else:
+            scanned = self._scan_mapped(mapped)
+        try:
+            for line, kind in scanned:
+                yield Finding(path, line, kind, sha)
+        finally:
+            scanned.close()
+            if mapped is not None:
+                mapped.close()
+
+    def _scan_stream(self, f):
+        # Reads a chunk at a time. What is left of the last chunk once it
+        # has been matched is kept, with some context before it.
+        state = _ScanState()
+        data = f.read(CHUNK_BYTES)
+        record('files_read')
+        record('bytes_read', len(data))
+        if looks_binary(data[:SNIFF_BYTES]):
+            return
+        base = 0
+        while True:
+            chunk = f.read(CHUNK_BYTES)
+            record('bytes_read', len(chunk))
+            data += chunk
+            final = not chunk
+            limit = len(data) if final else len(data) - OVERLAP_BYTES
+            if limit > state.counted - base:
+                for found in self._scan_window(state, data, base, limit,
+                                               len(data)):
+                    yield found
+            if final:
+                return
+            keep = max(state.counted - base - _CONTEXT_BYTES, 0)
+            data = data[keep:]
+            base += keep
+
+    def _scan_mapped(self, mapped):
+        state = _ScanState()
+        size = len(mapped)
+        record('files_read')
+        record('bytes_read', size)
+        if looks_binary(mapped[:SNIFF_BYTES]):
+            return
+        for start in range(0, size, CHUNK_BYTES):
+            limit = min(start + CHUNK_BYTES, size)
+            for found in self._scan_window(state, mapped, 0, limit,
+                                           min(limit + OVERLAP_BYTES, size)):
+                yield found
+
+    def _scan_window(self, state, buffer, base, limit, end):
+        # Finds the secrets that start before limit and after what has
+        # already been scanned. buffer holds the file from offset base;
+        # limit and end are relative to buffer.
+        found = []
+        matched = []
+        position = max(state.next_match - base, 0)
+        while True:
+            match = self._matcher.search(buffer, position, end)
+            if match is None or match.start() >= limit:
+                break
+            kind, stop = self._classify(buffer, match.start(), end)
+            if kind is None:
+                # Wrong text before it; another match may start inside it
+                position = match.start() + 1
+                continue
+            found.append((match.start(), kind))
+            matched.append((match.start(), stop))
+            position = stop
+        state.next_match = base + max(position, limit)
+
+        if self.entropy_threshold is not None:
+            start = max(state.next_token - base, 0)
+            for token_start, token_stop in _token_runs(buffer, start, limit,
+                                                       end):
+                state.next_token = base + token_stop
+                token = buffer[token_start:token_stop]
+                if (not _overlaps(token_start, token_stop, matched) and
+                        _DIGIT.search(token) and _LETTER.search(token) and
+                        _entropy(token) > self.entropy_threshold and
+                        not _IN_URL.search(_line_before(buffer,
+                                                        token_start))):
+                    found.append((token_start, HIGH_ENTROPY))
+            state.next_token = max(state.next_token, base + limit)
+
+        found.sort()
+        for position, kind in found:
+            state.count_lines(buffer, base, position)
+            yield state.line, kind
+        state.count_lines(buffer, base, limit)
+
+    def _classify(self, buffer, start, end):
+        # The first pattern that matches at start, with the right text
+        # before it on its line, and where its match ends
+        before = _line_before(buffer, start)
+        for name, pattern, context in self._patterns:
+            match = pattern.match(buffer, start, end)
+            if match is not None and (context is None or
+                                      context.search(before)):
+                return name, match.end()
+        return None, start
+
+
+class _ScanState(object):
+    # How far scanning has got in one file, as offsets into the file
+    __slots__ = ('next_match', 'next_token', 'counted', 'line')
+
+    def __init__(self):
+        self.next_match = 0
+        self.next_token = 0
+        self.counted = 0
+        self.line = 1
+
+    def count_lines(self, buffer, base, position):
+        # Moves the line count on to position (relative to buffer)
+        start = self.counted - base
+        if position > start:
+            if isinstance(buffer, bytes):
+                self.line += buffer.count(b'\n', start, position)
+            else:
+                self.line += buffer[start:position].count(b'\n')
+            self.counted = base + position
+
+
+def scan_history(repository, scanner, skip=()):
+    """Scan every version of every file in the history of a git
+    repository: each blob reachable from any ref is scanned once, under
+    the first path git lists it at.
+
+    Parameters
+    ----------
+    repository : gitrepo.GitContext
+        The repository
+    scanner : SecretScanner
+        The scanner to use
+    skip : set of strings
+        SHAs of blobs that have already been scanned
+
+    Yields
+    ------
+    Finding
+        Each possible secret, with the SHA of the blob it is in
+    """
+    git = repository.repo.git
+    listing = git.rev_list('--objects', '--all', as_process=True)
+    checked = git.cat_file(
+        '--batch-check=%(objecttype) %(objectname) %(objectsize) %(rest)',
+        istream=listing.proc.stdout, as_process=True)
+    try:
+        for line in checked.proc.stdout:
+            object_type, sha, size, path = line.decode(
+                'utf-8', 'surrogateescape').rstrip('\n').split(' ', 3)
+            if object_type != 'blob' or sha in skip:
+                continue
+            if scanner.max_file_bytes is not None and \
+                    int(size) > scanner.max_file_bytes:
+                continue
+            with open_blob(repository, sha) as f:
+                for finding in scanner.scan(f, path, sha):
+                    yield finding
+    finally:
+        # Stops both processes early if the caller stopped reading
+        for process in (checked, listing):
+            process.proc.stdout.close()
+            process.proc.wait()
+
+
+def _scoped(pattern):
+    # Wraps a pattern in a group, turning flags at its start into flags of
+    # the group: (?i)key|token becomes (?i:key|token)
+    flags = ''
+    match = _GLOBAL_FLAGS.match(pattern)
+    while match is not None:
+        flags += match.group(1)
+        pattern = pattern[match.end():]
+        match = _GLOBAL_FLAGS.match(pattern)
+    # A verbose pattern may end in a comment, which would hide the ')'
+    end = '\n)' if 'x' in flags else ')'
+    return '(?{}:{}{}'.format(flags, pattern, end)
+
+
+def _token_runs(buffer, start, limit, end):
+    # Yields (start, stop) of each run of token characters that starts at
+    # or after start and before limit, and isn't too long to be a key.
+    # A run that continues from before start is skipped.
+    offset = start - 1 if start > 0 else start
+    mask = buffer[offset:end].translate(_TOKEN_MASK)
+    position = start - offset
+    if position and mask[0] != ord(' '):
+        position = mask.find(b' ', position)
+    run = b'a' * MIN_TOKEN_LENGTH
+    while position >= 0:
+        position = mask.find(run, position)
+        if position < 0 or offset + position >= limit:
+            return
+        stop = mask.find(b' ', position)
+        if stop < 0:
+            stop = len(mask)
+        if stop - position <= MAX_TOKEN_LENGTH:
+            yield offset + position, offset + stop
+        position = stop
+
+
+def _line_before(buffer, position):
+    # Up to _CONTEXT_BYTES of the line before position
+    before = buffer[max(position - _CONTEXT_BYTES, 0):position]
+    return before[before.rfind(b'\n') + 1:]
+
+
+def _map(f):
+    # Memory-maps a real file that is big enough, otherwise None
+    try:
+        fileno = f.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+    if os.fstat(fileno).st_size < MMAP_BYTES:
+        return None
+    try:
+        return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+
+def _overlaps(start, stop, spans):
+    return any(span_start < stop and start < span_stop
+               for span_start, span_stop in spans)
+
+
+def _entropy(token):
+    # Shannon entropy in bits per character
+    length = len(token)
+    return -sum(count / length * math.log2(count / length)
+                for count in collections.Counter(token).values())
@@ -0,0 +1,275 @@
+#!usr/bin/env python3
+"""
+server.py
+
+`openlinter serve`: a long-running linter for CI systems and editors that
+lint the same repositories again and again. A one-off run starts Python,
+parses the configuration file, loads Pygments' lexers and opens the git
+repository before it checks anything; the server does all that once and
+keeps it between requests, along with the classification cache and the
+saved output of every check (see incremental.LintState). Checking a
+repository that hasn't changed replays the saved output.
+
+Requests are HTTP, on localhost or a Unix socket, and each is handled on
+its own thread; requests for the same directory wait for each other. POST
+a JSON object to /lint:
+
+    {"directory": "/path/to/repository", "rules": "/path/to/rules.yml",
+     "ref": "v1.0"}
+
+Only directory is needed. The response is newline-delimited JSON, one
+result per line as each check finishes, as with `--format json`.
+
+The linting itself is done by a linter.Linter. Saved output is replayed
+only while a check's inputs have the same fingerprint, which covers the
+refs and every file, staged or not; with --watch, the server also drops a
+directory's saved output when inotify reports a change in it.
+
+Classes
+-------
+LintServer
+    Lints directories on request, keeping state between requests.
+
+Functions
+---------
+make_server
+    Returns an HTTP server for a LintServer on a port or Unix socket.
+
+main
+    Entry point for `openlinter serve`.
+
+Constants
+---------
+DEFAULT_PORT
+    Port the server listens on by default.
+"""
+
+import argparse
+import http.server
+import json
+import os
+import socketserver
+import sys
+
+from openlinter.linter import DEFAULT_RULES, Linter
+from openlinter.results import ERROR, Result
+
+DEFAULT_PORT = 7867
+
+
+class LintServer(Linter):
+    """Lints directories on request, keeping parsed rule sets, open git
+    repositories, the classification cache and saved check output in
+    memory between requests.
+
+    Parameters
+    ----------
+    rules_path : string
+        Path to the configuration file used when a request doesn't name
+        one
+    cache_dir : string or None
+        Directory for the classification cache, compiled rule plans and
+        mirrors of remote repositories, as for --cache-dir
+    state_path : string or None
+        File to save check output in, so it outlasts the server; kept
+        in memory if None
+    threads : int or None
+        Most checks to run at once for one request (see lint_directory)
+    watch : boolean
+        Drop a directory's saved output when inotify reports a change in
+        it (see watch.Watcher)
+    """
+
+    def __init__(self, rules_path, cache_dir=None, state_path=None,
+                 threads=None, watch=False):
+        self.rules_path = rules_path
+        self.watcher = None
+        super(LintServer, self).__init__(rules_path, cache_dir,
+                                         state_path or ':memory:', threads)
+        if watch:
+            # Imported here since it needs Linux
+            from openlinter.watch import Watcher
+            self.watcher = Watcher(self.state.forget)
+
+    def lint(self, directory, rules_path=None, ref=None, report=print):
+        """Check a directory, or a repository URL, and report the results
+        as lint_directory does.
+
+        Parameters
+        ----------
+        directory : string
+            Path to the directory to check, or a repository URL
+        rules_path : string or None
+            Path to the configuration file; rules_path if None
+        ref : string or None
+            Check this commit instead of the working tree
+        report : callable
+            Called with each results.Result
+
+        Returns
+        -------
+        list of results.Result
+            The results, as reported
+        """
+        if self.watcher is not None and os.path.isdir(directory):
+            # What the checks skip isn't watched either
+            self.watcher.watch(directory, self.rule_set(rules_path))
+        return super(LintServer, self).lint(directory, rules_path, ref,
+                                            report)
+
+    def close(self):
+        """Close the repositories, cache and state, and stop watching."""
+        if self.watcher is not None:
+            self.watcher.close()
+        super(LintServer, self).close()
+
+
+class _RequestHandler(http.server.BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        if self.path != '/lint':
+            self._send_error(404, 'no such endpoint: {}'.format(self.path))
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length).decode('utf-8'))
+            directory = request['directory']
+        except (ValueError, KeyError, TypeError):
+            self._send_error(400, 'expected a JSON object with a directory')
+            return
+        linter = self.server.linter
+        try:
+            linter.rule_set(request.get('rules'))
+        except (OSError, ValueError) as e:
+            self._send_error(400, 'could not read rules: {}'.format(e))
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.end_headers()
+        def report(result):
+            self._write(result.to_dict())
+        try:
+            linter.lint(directory, request.get('rules'), request.get('ref'),
+                        report)
+        except Exception as e:
+            # Like batch mode, report the error as a result
+            report(Result('lint', ERROR, 'could not check {}: {}'.format(
+                directory, e), directory=directory))
+
+    def log_message(self, format, *args):
+        # Requests aren't logged; results go back to the client
+        pass
+
+    def _send_error(self, code, message):
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self._write({'error': message})
+
+    def _write(self, data):
+        self.wfile.write(json.dumps(data, sort_keys=True).encode('utf-8') +
+                         b'\n')
+        self.wfile.flush()
+
+
+class _HTTPServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class _UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        # A socket file left behind by a server that was killed
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        socketserver.ThreadingUnixStreamServer.server_bind(self)
+
+    def server_close(self):
+        socketserver.ThreadingUnixStreamServer.server_close(self)
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+def make_server(linter, socket_path=None, host='127.0.0.1',
+                port=DEFAULT_PORT):
+    """Make an HTTP server that answers lint requests with a LintServer.
+    Call its serve_forever method to start answering them.
+
+    Parameters
+    ----------
+    linter : LintServer
+        Does the linting
+    socket_path : string or None
+        Listen on a Unix socket at this path instead of a port
+    host : string
+        Address to listen on; localhost by default
+    port : int
+        Port to listen on; 0 picks a free one
+
+    Returns
+    -------
+    socketserver.BaseServer
+        The server; its server_address says where it is listening
+    """
+    if socket_path is not None:
+        server = _UnixHTTPServer(socket_path, _RequestHandler)
+    else:
+        server = _HTTPServer((host, port), _RequestHandler)
+    server.linter = linter
+    return server
+
+
+def main(argv=None):
+    """Run `openlinter serve` until it is interrupted.
+
+    Parameters
+    ----------
+    argv : list of strings or None
+        The arguments after `serve`; sys.argv's if None
+    """
+    parser = argparse.ArgumentParser(
+        prog='openlinter serve',
+        description='Keep the linter running and check directories on '
+        'request. POST {"directory": PATH} as JSON to /lint.')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--socket', metavar='PATH', help='Listen on a Unix socket at PATH instead of a port.',
+    )
+    group.add_argument('--port', type=int, help='The port to listen on at --host. Defaults to {}.'.format(DEFAULT_PORT),
+        default=DEFAULT_PORT
+    )
+    parser.add_argument('--host', help='The address to listen on. Defaults to 127.0.0.1, so only this machine can connect.',
+        default='127.0.0.1'
+    )
+    parser.add_argument('-r', '--rules', help='The rules configuration file to use when a request does not give one. Defaults to path/to/openlinter/rules.yml.',
+        default=DEFAULT_RULES
+    )
+    parser.add_argument('--cache-dir', metavar='DIR', help='A directory to keep a persistent cache of file classifications and clones of repositories given by URL in.',
+        default=None
+    )
+    parser.add_argument('--incremental', metavar='STATE_FILE', help='Save the output of each check in STATE_FILE instead of in memory, so it is kept when the server restarts.',
+        default=None
+    )
+    parser.add_argument('--threads', type=int, metavar='N', help='The most checks to run at once for each request.',
+        default=None
+    )
+    parser.add_argument('--watch', action='store_true', help="Watch each checked directory with inotify (Linux only) and run all of its checks again after any change, including edits that aren't staged in git.",
+    )
+    args = parser.parse_args(sys.argv[2:] if argv is None else argv)
+
+    try:
+        linter = LintServer(args.rules, args.cache_dir, args.incremental,
+                            args.threads, args.watch)
+    except OSError as e:
+        parser.error(str(e))
+    with linter:
+        server = make_server(linter, args.socket, args.host, args.port)
+        address = args.socket or 'http://{}:{}'.format(*server.server_address)
+        sys.stderr.write('openlinter serving on {}\n'.format(address))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
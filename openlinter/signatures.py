@@ -0,0 +1,245 @@
+#!usr/bin/env python3
+"""
+signatures.py
+
+Check whether the commits of a git repository are signed, and optionally
+verify the signatures against a local keyring.
+
+The commits to check are listed by one `git rev-list` over every branch,
+which lists a commit shared by several branches only once, and their raw
+objects are read in bulk through one `git cat-file --batch` process fed
+by it. Two git processes are started however many commits are checked;
+only verifying a signature starts another process (`gpgv`), once for
+each signed commit.
+
+Classes
+-------
+CommitSignature
+    Whether one commit is signed, and whether its signature is valid.
+
+Functions
+---------
+read_commits
+    Yields the SHA and raw object of each commit in a window.
+
+check_commits
+    Yields a CommitSignature for each commit in a window.
+
+split_signature
+    Separates a raw commit object into its signature and signed payload.
+
+verify_signature
+    Checks an OpenPGP signature with gpgv.
+
+Constants
+---------
+SIGNATURE_HEADERS
+    Commit headers that hold a signature.
+"""
+
+import os
+import subprocess
+import tempfile
+
+from openlinter import gitrepo
+
+SIGNATURE_HEADERS = (b'gpgsig', b'gpgsig-sha256')
+
+# Signature formats, by the first line of the signature
+_KINDS = {
+    b'-----BEGIN PGP SIGNATURE-----': 'gpg',
+    b'-----BEGIN SSH SIGNATURE-----': 'ssh',
+    b'-----BEGIN SIGNED MESSAGE-----': 'x509',
+}
+
+
+class CommitSignature(object):
+    """Whether one commit is signed, and whether its signature is valid.
+
+    Parameters
+    ----------
+    sha : string
+        SHA of the commit
+    kind : string or None
+        'gpg', 'ssh', 'x509' or 'unknown' for a signed commit, or None
+        for an unsigned one
+    verified : boolean or None
+        Whether the signature was checked and is good; None if it wasn't
+        checked
+    """
+    __slots__ = ('sha', 'kind', 'verified')
+
+    def __init__(self, sha, kind=None, verified=None):
+        self.sha = sha
+        self.kind = kind
+        self.verified = verified
+
+    @property
+    def signed(self):
+        """True if the commit has a signature."""
+        return self.kind is not None
+
+    def __repr__(self):
+        return '<CommitSignature {} {}>'.format(self.sha[:12],
+                                                self.kind or 'unsigned')
+
+
+def read_commits(repository, max_commits=None, since=None, until=None):
+    """Read the raw objects of the commits on any branch, newest first.
+
+    Parameters
+    ----------
+    repository : string or gitrepo.GitContext
+        Path to the git repository, or the repository already opened
+    max_commits : int or None
+        Read only this many of the newest commits
+    since, until : string or None
+        Read only commits made after or before this date, in any format
+        `git rev-list` understands (such as '2017-01-31')
+
+    Yields
+    ------
+    tuple of (string, bytes)
+        Each commit's SHA and raw object
+    """
+    repository = gitrepo.open_repository(repository)
+    if not repository.branches:
+        return
+    args = ['--branches']
+    if max_commits is not None:
+        args.append('--max-count={}'.format(max_commits))
+    if since is not None:
+        args.append('--since={}'.format(since))
+    if until is not None:
+        args.append('--until={}'.format(until))
+    git = repository.repo.git
+    listing = git.rev_list(*args, as_process=True)
+    objects = git.cat_file('--batch', istream=listing.proc.stdout,
+                           as_process=True)
+    stream = objects.proc.stdout
+    try:
+        for header in iter(stream.readline, b''):
+            fields = header.split()
+            if len(fields) != 3:
+                # "<sha> missing", from a shallow or broken repository
+                continue
+            sha, object_type, size = fields
+            data = stream.read(int(size))
+            stream.read(1)
+            if object_type == b'commit':
+                yield sha.decode('ascii'), data
+    finally:
+        # Stops both processes early if the caller stopped reading
+        for process in (objects, listing):
+            process.proc.stdout.close()
+            process.proc.wait()
+
+
+def check_commits(repository, max_commits=None, since=None, until=None,
+                  verify=False, keyring=None):
+    """Check which of the commits on any branch are signed.
+
+    Parameters
+    ----------
+    repository : string or gitrepo.GitContext
+        Path to the git repository, or the repository already opened
+    max_commits, since, until
+        Which commits to check, as for read_commits
+    verify : boolean
+        Also check each OpenPGP signature with gpgv
+    keyring : string or None
+        Path to the keyring file of trusted public keys to verify with;
+        gpgv's default (trustedkeys.kbx in the GnuPG home) if None
+
+    Yields
+    ------
+    CommitSignature
+        One for each commit, newest first
+    """
+    for sha, data in read_commits(repository, max_commits, since, until):
+        signature, payload = split_signature(data)
+        if signature is None:
+            yield CommitSignature(sha)
+            continue
+        kind = _KINDS.get(signature.split(b'\n', 1)[0].strip(), 'unknown')
+        verified = None
+        if verify:
+            verified = kind == 'gpg' and verify_signature(signature, payload,
+                                                          keyring)
+        yield CommitSignature(sha, kind, verified)
+
+
+def split_signature(data):
+    """Separate a raw commit object into its signature and the payload
+    that was signed: the object without its signature header.
+
+    Parameters
+    ----------
+    data : bytes
+        The raw commit object, as read by read_commits
+
+    Returns
+    -------
+    tuple of (bytes or None, bytes)
+        The signature, or None if the commit isn't signed, and the payload
+    """
+    end = data.find(b'\n\n')
+    if end < 0:
+        end = len(data)
+    headers = data[:end].split(b'\n')
+    signature = None
+    kept = []
+    in_signature = False
+    for line in headers:
+        if line.startswith(b' ') and in_signature:
+            # Continuation lines of a multi-line header start with a space
+            signature.append(line[1:])
+            continue
+        name = line.split(b' ', 1)[0]
+        in_signature = signature is None and name in SIGNATURE_HEADERS
+        if in_signature:
+            signature = [line[len(name) + 1:]]
+        else:
+            kept.append(line)
+    if signature is None:
+        return None, data
+    return b'\n'.join(signature) + b'\n', b'\n'.join(kept) + data[end:]
+
+
+def verify_signature(signature, payload, keyring=None):
+    """Check an OpenPGP signature with gpgv.
+
+    Parameters
+    ----------
+    signature : bytes
+        The ASCII-armored detached signature
+    payload : bytes
+        The data that was signed
+    keyring : string or None
+        Path to the keyring file of trusted public keys (a relative path
+        is taken from the current directory); gpgv's default if None
+
+    Returns
+    -------
+    boolean
+        True if the signature is good and made by a key in the keyring;
+        False otherwise, including when gpgv isn't installed
+    """
+    fd, path = tempfile.mkstemp(suffix='.asc')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(signature)
+        command = ['gpgv', '--status-fd', '1']
+        if keyring is not None:
+            command += ['--keyring', os.path.abspath(keyring)]
+        try:
+            process = subprocess.run(command + [path, '-'], input=payload,
+                                     stdout=subprocess.PIPE,
+                                     stderr=subprocess.DEVNULL)
+        except OSError:
+            return False
+    finally:
+        os.remove(path)
+    status = process.stdout.split(b'\n')
+    return process.returncode == 0 and any(
+        line.startswith(b'[GNUPG:] VALIDSIG ') for line in status)
@@ -0,0 +1,428 @@
+#!usr/bin/env python3
+"""
+store.py
+
+Keep the results of every run in an SQLite database, so that questions
+about many repositories over time ("which repositories lost their
+CONTRIBUTING file this month?") are a query instead of a search through
+old output. Results are buffered and written many at a time, each batch
+in one transaction, so storing the results of a batch run over thousands
+of repositories takes seconds. The table is indexed for looking up one
+rule across repositories, and one repository across rules.
+
+`openlinter query` prints the common reports; anything else can be asked
+of the database with any SQLite client. Each row of its results table is
+one result: the repository (an absolute path or a URL), the commit that
+was checked, the rule id, status, detail and duration of the result, and
+when the run was (seconds since the epoch).
+
+Classes
+-------
+ResultStore
+    Saves results to an SQLite database and queries them.
+
+Functions
+---------
+checked_commit
+    Returns the SHA of the commit a run checked, if it can tell.
+
+parse_time
+    Returns the time a date, date and time, or number of days ago means.
+
+main
+    Entry point for `openlinter query`.
+
+Constants
+---------
+REPORTS
+    Names of the reports `openlinter query` can print.
+
+DEFAULT_BATCH_SIZE
+    Results buffered before they are written out in one transaction.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+import openlinter.gitrepo as gitrepo
+import openlinter.remote as remote
+from openlinter.results import FORMATS, INFO, PASS
+
+REPORTS = ('latest', 'failing', 'regressions', 'history', 'summary')
+
+DEFAULT_BATCH_SIZE = 10000
+
+_COLUMNS = ('repo', 'commit_sha', 'rule_id', 'status', 'detail', 'duration',
+            'checked_at')
+
+
+class ResultStore(object):
+    """Results of lint runs, saved in an SQLite database.
+
+    Parameters
+    ----------
+    path : string
+        Path to the database file; created if it doesn't exist
+    batch_size : int
+        Results to buffer before writing them out together
+    """
+
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self._pending = []
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def record(self, directory, results, commit=None, checked_at=None):
+        """Save the results of checking one directory. They are written
+        out once batch_size results are waiting, or on flush or close.
+
+        Parameters
+        ----------
+        directory : string
+            Path to the directory that was checked, or its URL
+        results : iterable of results.Result
+            The results of the run; INFO results are not saved
+        commit : string or None
+            SHA of the commit that was checked, if known (see
+            checked_commit)
+        checked_at : float or None
+            When the run was, in seconds since the epoch; now if None
+        """
+        if not remote.is_remote(directory):
+            directory = os.path.abspath(directory)
+        if checked_at is None:
+            checked_at = time.time()
+        rows = [(directory, commit, result.rule_id, result.status,
+                 result.detail, result.duration, checked_at)
+                for result in results if result.status != INFO]
+        with self._lock:
+            self._pending.extend(rows)
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+
+    def flush(self):
+        """Write out every buffered result."""
+        with self._lock:
+            self._flush()
+
+    def latest(self, rule_id=None, repo=None, failing=False):
+        """Return each repository's newest results for each rule.
+
+        Parameters
+        ----------
+        rule_id, repo : string or None
+            Only return results for this rule or repository
+        failing : boolean
+            Only return the results of rules that didn't pass. A rule
+            passed if any of its results in the run did, as when the
+            first of a files_exist rule's names isn't found but the
+            second is.
+
+        Returns
+        -------
+        list of dicts
+            The results, by repository and then rule, with the keys of
+            the results table
+        """
+        if repo is not None and not remote.is_remote(repo):
+            repo = os.path.abspath(repo)
+        where, params = _filters(rule_id=rule_id, repo=repo)
+        rows = self._query(
+            'SELECT {columns} FROM results AS r WHERE {where} AND '
+            'checked_at = (SELECT MAX(checked_at) FROM results '
+            'WHERE repo = r.repo AND rule_id = r.rule_id) '
+            'ORDER BY repo, rule_id, rowid'.format(
+                columns=', '.join(_COLUMNS), where=where), params)
+        if failing:
+            outcomes = _outcomes(rows)
+            rows = [row for row in rows
+                    if outcomes[row['repo'], row['rule_id']] != PASS]
+        return rows
+
+    def regressions(self, rule_id, since, until=None):
+        """Find the repositories whose newest result for a rule passed at
+        some time but doesn't pass at a later one, such as repositories
+        that lost a file.
+
+        Parameters
+        ----------
+        rule_id : string
+            The rule, such as 'files_exist.contributing'
+        since : float
+            Compare each repository's newest result from before this time
+            (seconds since the epoch)...
+        until : float or None
+            ...with its newest result from before this time; now if None
+
+        Returns
+        -------
+        list of dicts
+            The later results of each such repository, by repository
+        """
+        if until is None:
+            until = time.time()
+        # Each repository's newest results for the rule before a time
+        newest = ('SELECT {columns} FROM results AS r WHERE rule_id = ? AND '
+                  'checked_at = (SELECT MAX(checked_at) FROM results WHERE '
+                  'repo = r.repo AND rule_id = r.rule_id AND checked_at < ?) '
+                  'ORDER BY repo, rowid'.format(columns=', '.join(_COLUMNS)))
+        before = _outcomes(self._query(newest, (rule_id, since)))
+        after = self._query(newest, (rule_id, until))
+        outcomes = _outcomes(after)
+        return [row for row in after
+                if row['checked_at'] >= since and
+                before.get((row['repo'], rule_id)) == PASS and
+                outcomes[row['repo'], rule_id] != PASS]
+
+    def history(self, repo, rule_id=None):
+        """Return every result saved for a repository, oldest first.
+
+        Parameters
+        ----------
+        repo : string
+            Path to the repository, or its URL
+        rule_id : string or None
+            Only return results for this rule
+
+        Returns
+        -------
+        list of dicts
+        """
+        if not remote.is_remote(repo):
+            repo = os.path.abspath(repo)
+        where, params = _filters(rule_id=rule_id, repo=repo)
+        return self._query(
+            'SELECT {} FROM results WHERE {} '
+            'ORDER BY checked_at, rule_id, rowid'.format(
+                ', '.join(_COLUMNS), where), params)
+
+    def summary(self):
+        """Count the repositories with each status for each rule, going
+        by each repository's newest result.
+
+        Returns
+        -------
+        list of dicts
+            With rule_id, status and repos (the count), by rule and status
+        """
+        counts = {}
+        for (_, rule_id), status in _outcomes(self.latest()).items():
+            counts[rule_id, status] = counts.get((rule_id, status), 0) + 1
+        return [{'rule_id': rule_id, 'status': status, 'repos': count}
+                for (rule_id, status), count in sorted(counts.items())]
+
+    def close(self):
+        """Write out buffered results and close the database."""
+        with self._lock:
+            self._flush()
+            if self._connection is not None:
+                self._connection.close()
+            self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        with self._connect() as connection:
+            connection.executemany(
+                'INSERT INTO results ({}) VALUES (?, ?, ?, ?, ?, ?, ?)'
+                .format(', '.join(_COLUMNS)), self._pending)
+        self._pending = []
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            self._flush()
+            cursor = self._connect().execute(sql, params)
+            return [dict(zip(_COLUMNS, row)) for row in cursor]
+
+    def _connect(self):
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            import sqlite3
+            connection = sqlite3.connect(self.path, timeout=60,
+                                         check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            with connection:
+                connection.execute(
+                    'CREATE TABLE IF NOT EXISTS results ('
+                    'repo TEXT NOT NULL, commit_sha TEXT, '
+                    'rule_id TEXT NOT NULL, status TEXT NOT NULL, '
+                    'detail TEXT NOT NULL, duration REAL NOT NULL, '
+                    'checked_at REAL NOT NULL)')
+                # For one rule across repositories, and for one
+                # repository; both find each newest result quickly
+                connection.execute(
+                    'CREATE INDEX IF NOT EXISTS results_rule '
+                    'ON results (rule_id, repo, checked_at)')
+                connection.execute(
+                    'CREATE INDEX IF NOT EXISTS results_repo '
+                    'ON results (repo, checked_at)')
+            self._connection = connection
+        return self._connection
+
+
+def _outcomes(rows):
+    # Maps each (repo, rule_id) to PASS if any of its rows passed, or else
+    # to the status of its first row
+    outcomes = {}
+    for row in rows:
+        key = (row['repo'], row['rule_id'])
+        if key not in outcomes or row['status'] == PASS:
+            outcomes[key] = row['status']
+    return outcomes
+
+
+def _filters(**columns):
+    # A WHERE clause matching the columns that are given
+    where = ['1']
+    params = []
+    for column, value in sorted(columns.items()):
+        if value is not None:
+            where.append('{} = ?'.format(column))
+            params.append(value)
+    return ' AND '.join(where), params
+
+
+def checked_commit(directory, ref=None, mirrors=None):
+    """Find the SHA of the commit a run checked.
+
+    Parameters
+    ----------
+    directory : string
+        Path to the directory that was checked, or its URL
+    ref : string or None
+        The ref that was checked; HEAD if None
+    mirrors : string or None
+        Directory that clones of URLs are kept in; without it, no commit
+        is found for a URL
+
+    Returns
+    -------
+    string or None
+        The SHA, or None if directory isn't a git repository or the
+        commit can't be found
+    """
+    if remote.is_remote(directory):
+        if mirrors is None:
+            return None
+        directory = remote.mirror_path(directory, mirrors)
+    if gitrepo.find_git_dir(directory) is None:
+        return None
+    repository = gitrepo.GitContext(directory)
+    try:
+        if ref is None:
+            return repository.head
+        if ref in repository.branches:
+            # Read from the ref files, without starting git
+            return repository.resolve(repository.branches[ref])
+        return repository.repo.commit(ref).hexsha
+    except Exception:
+        return None
+    finally:
+        repository.close()
+
+
+def parse_time(value):
+    """Work out the time a command-line argument means.
+
+    Parameters
+    ----------
+    value : string
+        A date (2017-01-31), a date and time (2017-01-31T12:00), or a
+        number of days ago (30d), in local time
+
+    Returns
+    -------
+    float
+        Seconds since the epoch
+
+    Raises
+    ------
+    ValueError if value is none of these
+    """
+    days = re.match(r'(\d+)d$', value)
+    if days:
+        return time.time() - int(days.group(1)) * 86400
+    return datetime.datetime.fromisoformat(value).timestamp()
+
+
+def main(argv=None):
+    """Run `openlinter query`: print a report from a results database.
+
+    Parameters
+    ----------
+    argv : list of strings or None
+        The arguments after `query`; sys.argv's if None
+    """
+    parser = argparse.ArgumentParser(
+        prog='openlinter query',
+        description='Report on the results saved with --store. latest: '
+        "each repository's newest result for each rule; failing: those "
+        "that didn't pass; regressions: repositories whose --rule passed "
+        'before --since but not after; history: every result for --repo; '
+        'summary: how many repositories have each status for each rule.')
+    parser.add_argument('report', choices=REPORTS)
+    parser.add_argument('--store', metavar='DB', required=True, help='The results database written by --store.',
+    )
+    parser.add_argument('--rule', metavar='RULE_ID', help='Only report on this rule, e.g. files_exist.contributing.',
+        default=None
+    )
+    parser.add_argument('--repo', metavar='PATH', help='Only report on this repository (a path or URL).',
+        default=None
+    )
+    parser.add_argument('--since', type=parse_time, metavar='WHEN', help='With regressions: the time to compare against, as a date (2017-01-31), a date and time, or a number of days ago (30d).',
+        default=None
+    )
+    parser.add_argument('--until', type=parse_time, metavar='WHEN', help='With regressions: compare with results from before this time instead of the newest.',
+        default=None
+    )
+    parser.add_argument('-f', '--format', choices=FORMATS, help='How to write out the report: text (the default) or json, one JSON object per line.',
+        default='text'
+    )
+    args = parser.parse_args(sys.argv[2:] if argv is None else argv)
+    if args.report == 'regressions' and (args.rule is None or
+                                         args.since is None):
+        parser.error('regressions needs --rule and --since')
+    if args.report == 'history' and args.repo is None:
+        parser.error('history needs --repo')
+    if not os.path.exists(args.store):
+        parser.error('no results database at {}'.format(args.store))
+
+    with ResultStore(args.store) as store:
+        if args.report == 'latest':
+            rows = store.latest(args.rule, args.repo)
+        elif args.report == 'failing':
+            rows = store.latest(args.rule, args.repo, failing=True)
+        elif args.report == 'regressions':
+            rows = store.regressions(args.rule, args.since, args.until)
+        elif args.report == 'history':
+            rows = store.history(args.repo, args.rule)
+        else:
+            rows = store.summary()
+    for row in rows:
+        if args.format == 'json':
+            print(json.dumps(row, sort_keys=True))
+        elif args.report == 'summary':
+            print('{rule_id}\t{status}\t{repos}'.format(**row))
+        else:
+            print('{}\t{}\t{}\t{}\t{}'.format(
+                datetime.datetime.fromtimestamp(row['checked_at'])
+                .isoformat(' ', 'seconds'), row['repo'],
+                (row['commit_sha'] or '-')[:12], row['rule_id'],
+                '{}: {}'.format(row['status'], row['detail'])))
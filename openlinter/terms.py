@@ -0,0 +1,245 @@
+#!usr/bin/env python3
+"""
+terms.py
+
+Find words and phrases that a project would rather not use (such as
+non-inclusive language) in the comments, strings and prose of its files.
+Each file is tokenized once by the Pygments lexer the code check guesses
+for it, and only comment, string and text tokens are looked at, so names
+in the code itself (which often can't be changed without breaking things)
+are left alone.
+
+The terms are compiled into one trie of words. Every word of the text is
+looked up in it once, and a phrase only follows the trie from a word that
+starts one, so the time per file grows with the file's length, not with
+the number of terms.
+
+Classes
+-------
+TermFinding
+    A use of one of the terms in a file.
+
+TermMatcher
+    Finds the terms in text.
+
+Functions
+---------
+find_terms
+    Finds the terms in the comments, strings and prose of a file's text.
+
+get_lexer
+    Returns a shared Pygments lexer instance for a lexer name.
+
+Constants
+---------
+DEFAULT_TERMS
+    Terms to avoid, and what to use instead, if none are configured.
+
+PROSE_TOKENS
+    The Pygments token types whose text is checked.
+
+SUFFIXES
+    Endings that can be added to a term's last word and still match.
+
+MAX_FILE_BYTES
+    Default size of the biggest file that is checked.
+"""
+
+import functools
+import itertools
+import re
+
+# Imported when the terms are first checked for, like the lexers
+from pygments.token import Comment, Generic, String, Text
+
+PROSE_TOKENS = (Comment, String, Text, Generic)
+
+SUFFIXES = ('s', 'es', 'ed', 'd', 'ing', 'er', 'ers')
+
+# Used when the configuration file doesn't list any terms
+DEFAULT_TERMS = {
+    'blacklist': 'denylist',
+    'whitelist': 'allowlist',
+    'master': 'main',
+    'slave': 'replica',
+    'grandfathered': 'legacy',
+    'sanity check': 'confidence check',
+    'dummy value': 'placeholder value',
+    'man hours': 'person hours',
+}
+
+# Bigger files are skipped: tokenizing them takes too long
+MAX_FILE_BYTES = 1024 * 1024
+
+# Words, splitting identifiers in camelCase or snake_case into their words
+_WORD = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+')
+
+# Marks the end of a term in the trie
+_END = None
+
+
+class TermFinding(object):
+    """A use of one of the terms in a file.
+
+    Parameters
+    ----------
+    path : string
+        Path of the file, relative to the repository
+    line : int
+        Line the term is on, counting from 1
+    term : string
+        The term, as it was configured
+    suggestion : string or None
+        What to use instead, if configured
+    """
+    __slots__ = ('path', 'line', 'term', 'suggestion')
+
+    def __init__(self, path, line, term, suggestion=None):
+        self.path = path
+        self.line = line
+        self.term = term
+        self.suggestion = suggestion
+
+    def __repr__(self):
+        return '<TermFinding {!r} at {}:{}>'.format(self.term, self.path,
+                                                    self.line)
+
+
+class TermMatcher(object):
+    """Finds whole words and phrases in text, ignoring case. A term's last
+    word also matches with one of SUFFIXES added ('whitelist' matches
+    'whitelisted'), and the words of an identifier are matched separately
+    ('whitelistedHosts' has 'whitelisted' and 'hosts').
+
+    Parameters
+    ----------
+    terms : dict
+        Maps each term (a word or phrase) to what to use instead of it,
+        or None
+    """
+
+    def __init__(self, terms):
+        self.terms = dict(terms)
+        self._trie = {}
+        for term, suggestion in self.terms.items():
+            node = self._trie
+            for word in _words(term):
+                node = node.setdefault(word, {})
+            if node is not self._trie:
+                node[_END] = (term, suggestion)
+        # The first letters of every word that can start a term, so most
+        # words are passed over without trying the suffixes
+        self._starts = frozenset(word[:3] for word in self._trie)
+
+    def find(self, text):
+        """Find the terms in a piece of text.
+
+        Parameters
+        ----------
+        text : string
+            The text to look in
+
+        Yields
+        ------
+        tuple of (int, string, string or None)
+            Offset in text where the term starts, the term and its
+            suggestion
+        """
+        words = [(match.start(), match.group().lower())
+                 for match in _WORD.finditer(text)]
+        for n, (start, word) in enumerate(words):
+            if word[:3] not in self._starts:
+                continue
+            node = self._trie
+            found = None
+            for _, next_word in itertools.islice(words, n, None):
+                node = _step(node, next_word)
+                if node is None:
+                    break
+                if _END in node:
+                    found = node[_END]
+            if found is not None:
+                yield start, found[0], found[1]
+
+
+def find_terms(text, lexer_name, matcher):
+    """Find the terms in the comments, strings and prose of a file.
+
+    Parameters
+    ----------
+    text : string
+        The file's text
+    lexer_name : string or None
+        Name of the Pygments lexer for the file, as guessed by the code
+        check; with None, the whole text is prose
+    matcher : TermMatcher
+        The terms to find
+
+    Yields
+    ------
+    tuple of (int, string, string or None)
+        Line the term is on, the term and its suggestion
+    """
+    line = 1
+    counted = 0
+    for start, value in _prose(text, lexer_name):
+        for offset, term, suggestion in matcher.find(value):
+            position = start + offset
+            line += text.count('\n', counted, position)
+            counted = position
+            yield line, term, suggestion
+
+
+@functools.lru_cache(maxsize=None)
+def get_lexer(lexer_name):
+    """Return a lexer instance for a lexer name, made once per name and
+    shared by every file in that language.
+
+    Parameters
+    ----------
+    lexer_name : string
+        Name of a Pygments lexer, as returned by rules.guess_lexer_name
+
+    Returns
+    -------
+    pygments.lexer.Lexer or None
+        The lexer, or None if Pygments has no lexer by that name
+    """
+    from pygments.lexers import find_lexer_class
+    lexer_class = find_lexer_class(lexer_name)
+    if lexer_class is None:
+        return None
+    # Offsets into the text have to stay right for the line numbers
+    return lexer_class(stripnl=False, stripall=False, ensurenl=False)
+
+
+def _prose(text, lexer_name):
+    # (offset, text) of each comment, string or text token
+    lexer = get_lexer(lexer_name) if lexer_name else None
+    if lexer is None:
+        yield 0, text
+        return
+    for start, token_type, value in lexer.get_tokens_unprocessed(text):
+        if _is_prose(token_type):
+            yield start, value
+
+
+@functools.lru_cache(maxsize=None)
+def _is_prose(token_type):
+    return any(token_type in prose for prose in PROSE_TOKENS)
+
+
+def _words(text):
+    return [word.lower() for word in _WORD.findall(text)]
+
+
+def _step(node, word):
+    # The trie node under node for word, allowing for suffixes
+    if word in node:
+        return node[word]
+    for suffix in SUFFIXES:
+        if word.endswith(suffix):
+            child = node.get(word[:-len(suffix)])
+            if child is not None and _END in child:
+                return child
+    return None
@@ -0,0 +1,198 @@
+#!usr/bin/env python3
+"""
+treeindex.py
+
+An index of the files in a git tree (the snapshot recorded by a commit),
+read from the repository's object database instead of a working tree. It
+has the same interface as `fsindex.FileIndex`, so the file-based rules in
+`rules.py` can check any commit of a repository, including bare
+repositories and mirrors that have no checkout at all.
+
+Classes
+-------
+GitTreeIndex
+    Index of the files in the tree of a commit.
+
+TreeEntry
+    A file or directory in a git tree.
+
+Functions
+---------
+open_blob
+    Opens a blob in a repository's object database for reading.
+"""
+
+import os
+
+import openlinter.gitrepo as gitrepo
+from openlinter.fsindex import FileIndex
+from openlinter.instrument import record
+
+
+# git tree entry modes
+_MODE_TREE = 0o040000
+_MODE_SYMLINK = 0o120000
+_MODE_SUBMODULE = 0o160000
+
+
+class TreeEntry(object):
+    """A file or directory in a GitTreeIndex. Has the same attributes as
+    fsindex.Entry, plus the object SHA. Symlinks and submodules are
+    neither files nor directories.
+    """
+    __slots__ = ('name', 'relpath', 'path', 'is_file', 'is_dir', 'is_link',
+                 'sha', 'mode', '_object')
+
+    def __init__(self, git_object, relpath, root):
+        mode = git_object.mode
+        self.name = git_object.name
+        self.relpath = relpath
+        self.path = os.path.join(root, relpath)
+        self.is_dir = mode & 0o170000 == _MODE_TREE
+        self.is_link = mode & 0o170000 == _MODE_SYMLINK
+        self.is_file = (not self.is_dir and not self.is_link and
+                        mode & 0o170000 != _MODE_SUBMODULE)
+        self.sha = git_object.hexsha
+        self.mode = mode
+        self._object = git_object
+
+    def __repr__(self):
+        return '<TreeEntry {!r}>'.format(self.relpath)
+
+    @property
+    def ext(self):
+        """The lowercased file extension, including the dot, or ''."""
+        return os.path.splitext(self.name)[1].lower()
+
+    @property
+    def size(self):
+        """The size of the blob in bytes, read from the object header."""
+        return self._object.size
+
+
+class GitTreeIndex(FileIndex):
+    """Index of the files and directories in the tree of a commit, read
+    from the git object database without a checkout.
+
+    Parameters
+    ----------
+    repository : string or gitrepo.GitContext
+        Path to a git repository (working tree or bare), or the
+        repository already opened
+    ref : string
+        Branch, tag, commit SHA or other revision whose tree to index
+    ignore : ignore.IgnoreRules or None
+        Rules for files and directories to leave out of iter_files
+
+    Raises
+    ------
+    git.InvalidGitRepositoryError, git.NoSuchPathError as for
+        gitrepo.GitContext
+    git.BadName if ref doesn't name a commit
+    """
+
+    def __init__(self, repository, ref='HEAD', ignore=None):
+        self.repository = gitrepo.open_repository(repository)
+        super(GitTreeIndex, self).__init__(self.repository.path, ignore)
+        self.ref = ref
+        self.tree = self.repository.repo.commit(ref).tree
+        self.tree_sha = self.tree.hexsha
+
+    def listdir(self, relpath=''):
+        """Return the entries in a directory of the tree.
+
+        Parameters
+        ----------
+        relpath : string
+            Path to the directory relative to the tree root; '' for the
+            root itself
+
+        Returns
+        -------
+        list of TreeEntry
+            The entries in the directory, in git's sorted order
+
+        Raises
+        ------
+        FileNotFoundError if there is no such directory in the tree
+        """
+        listing = self._listings.get(relpath)
+        if listing is None:
+            with self._lock:
+                listing = self._listings.get(relpath)
+                if listing is None:
+                    listing = self._list_tree(relpath)
+                    self._listings[relpath] = listing
+        return listing
+
+    def _list_tree(self, relpath):
+        tree = self.tree
+        if relpath:
+            try:
+                tree = tree.join(relpath.replace(os.sep, '/'))
+            except KeyError:
+                raise FileNotFoundError(relpath)
+            if tree.type != 'tree':
+                raise NotADirectoryError(relpath)
+        record('dirs_listed')
+        return [TreeEntry(item, os.path.join(relpath, item.name),
+                          self.directory)
+                for item in tree]
+
+    def open(self, entry):
+        """Open a file in the tree for reading its blob's content.
+
+        Parameters
+        ----------
+        entry : TreeEntry
+            A file entry from this index
+
+        Returns
+        -------
+        file-like object
+            Binary stream of the blob's content
+        """
+        return _BlobReader(entry._object.data_stream)
+
+
+def open_blob(repository, sha):
+    """Open a blob in a repository's object database for reading, as
+    GitTreeIndex.open does for the files in a tree.
+
+    Parameters
+    ----------
+    repository : gitrepo.GitContext
+        The repository the blob is in
+    sha : string
+        Hex SHA of the blob
+
+    Returns
+    -------
+    file-like object
+        Binary stream of the blob's content, to be closed (or used as a
+        context manager) before the next blob is opened
+    """
+    return _BlobReader(repository.repo.odb.stream(bytes.fromhex(sha)))
+
+
+class _BlobReader(object):
+    # Gives GitPython's blob streams the context manager interface of
+    # files opened with open(). Blobs are streamed from one long-running
+    # `git cat-file` process, so whatever is left of a blob has to be read
+    # off the pipe before the next one can be requested.
+    def __init__(self, stream):
+        self._stream = stream
+
+    def read(self, size=-1):
+        return self._stream.read(size if size >= 0 else self._stream.size)
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.read()
+            self._stream = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
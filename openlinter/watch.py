@@ -0,0 +1,236 @@
+#!usr/bin/env python3
+"""
+watch.py
+
+Notice when the files in a directory change, using Linux's inotify
+through ctypes, so a long-running linter can drop results it saved for a
+directory as soon as the directory is edited. Version control directories
+are not watched: the linter already fingerprints the git refs and index.
+Nor are the directories the linter skips (skip_directories and anything
+`.gitignore`d), so build output and dependencies don't use up watches or
+drop results the linter would give again.
+
+inotify has a limit on watches per user. If it is reached, the rest of
+the tree isn't watched and a warning is logged; changes there are still
+caught, by the stat data in the linter's fingerprint of the files (see
+incremental.RuleInputs), just not dropped as soon as they happen.
+
+Classes
+-------
+Watcher
+    Calls back with the watched directory when anything in it changes.
+
+Functions
+---------
+watch_supported
+    Returns True if inotify can be used on this system.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import threading
+
+from openlinter.fsindex import Entry
+from openlinter.ignore import ignore_rules_for
+
+_log = logging.getLogger(__name__)
+
+# From <sys/inotify.h>
+_IN_MODIFY = 0x2
+_IN_MOVED_FROM = 0x40
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_DELETE_SELF = 0x400
+_IN_MOVE_SELF = 0x800
+_IN_Q_OVERFLOW = 0x4000
+_IN_IGNORED = 0x8000
+_IN_ONLYDIR = 0x1000000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+_MASK = (_IN_MODIFY | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE |
+         _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR)
+
+# struct inotify_event: wd, mask, cookie, len, then len bytes of name
+_EVENT = struct.Struct('iIII')
+
+
+def watch_supported():
+    """Check whether directories can be watched on this system.
+
+    Returns
+    -------
+    boolean
+        True if the C library has inotify (Linux)
+    """
+    return _libc() is not None
+
+
+class Watcher(object):
+    """Watches directory trees with inotify, on a background thread, and
+    calls back with the watched directory whenever something in it is
+    created, changed, moved or deleted.
+
+    Parameters
+    ----------
+    callback : callable
+        Called as callback(directory) with the directory given to watch;
+        called on the watcher's thread, possibly many times in a row
+
+    Raises
+    ------
+    OSError if inotify isn't available
+    """
+
+    def __init__(self, callback):
+        libc = _libc()
+        if libc is None:
+            raise OSError('watching directories needs Linux inotify')
+        self.callback = callback
+        self._libc = libc
+        self._fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        # Maps each watch descriptor to (watched root, path)
+        self._watches = {}
+        # Maps each watched root to its IgnoreRules
+        self._roots = {}
+        # Roots that ran out of watches, warned about once
+        self._limited = set()
+        self._lock = threading.Lock()
+        self._stop_read, self._stop_write = os.pipe()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name='openlinter-watch')
+        self._thread.start()
+
+    def watch(self, directory, rule_set=None):
+        """Start watching a directory and everything below it that the
+        linter doesn't skip, if it isn't watched already.
+
+        Parameters
+        ----------
+        directory : string
+            Path to the directory
+        rule_set : dict or None
+            The parsed configuration file, whose skip_directories and
+            use_gitignore settings decide which directories aren't watched
+            and which files' changes don't count (see
+            ignore.ignore_rules_for); defaults as for an empty rule set
+        """
+        directory = os.path.abspath(directory)
+        with self._lock:
+            if directory in self._roots:
+                return
+            self._roots[directory] = ignore_rules_for(directory,
+                                                      rule_set or {})
+        self._add_tree(directory, directory)
+
+    def close(self):
+        """Stop watching and end the background thread."""
+        os.write(self._stop_write, b'x')
+        self._thread.join()
+        for fd in (self._fd, self._stop_read, self._stop_write):
+            os.close(fd)
+
+    def _add_tree(self, root, top):
+        # Walks the tree as FileIndex.iter_files does, pruning ignored
+        # directories
+        ignore = self._roots[root]
+        pending = [top]
+        while pending:
+            path = pending.pop()
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path),
+                                              _MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error == errno.ENOSPC:
+                    with self._lock:
+                        warn = root not in self._limited
+                        self._limited.add(root)
+                    if warn:
+                        _log.warning('inotify watch limit reached at %s; '
+                                     'changes in %s that are not watched '
+                                     'are found from file stat data '
+                                     'instead', path, root)
+                    return
+                # Removed already, or can't be read
+                continue
+            with self._lock:
+                self._watches[wd] = (root, path)
+            relpath = _relpath(root, path)
+            try:
+                with os.scandir(path) as it:
+                    entries = [Entry(d, os.path.join(relpath, d.name))
+                               for d in it]
+            except OSError:
+                continue
+            ignore.visit_directory(relpath, entries)
+            pending.extend(entry.path for entry in entries
+                           if entry.is_dir and not entry.is_link and
+                           not ignore.is_ignored(entry.relpath, True))
+
+    def _run(self):
+        while True:
+            ready, _, _ = select.select([self._fd, self._stop_read], [], [])
+            if self._stop_read in ready:
+                return
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            changed = set()
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT.unpack_from(data, offset)
+                name = data[offset + _EVENT.size:
+                            offset + _EVENT.size + length].rstrip(b'\0')
+                offset += _EVENT.size + length
+                if mask & _IN_Q_OVERFLOW:
+                    # Events were lost: anything could have changed
+                    with self._lock:
+                        changed.update(self._roots)
+                    continue
+                with self._lock:
+                    if mask & _IN_IGNORED:
+                        self._watches.pop(wd, None)
+                        continue
+                    root, path = self._watches.get(wd, (None, None))
+                    ignore = self._roots.get(root)
+                if root is None:
+                    continue
+                is_dir = bool(mask & _IN_ISDIR)
+                if name:
+                    # An event for an entry in the watched directory
+                    relpath = os.path.join(_relpath(root, path),
+                                           os.fsdecode(name))
+                    if ignore.is_ignored(relpath, is_dir):
+                        continue
+                changed.add(root)
+                if is_dir and mask & (_IN_CREATE | _IN_MOVED_TO):
+                    self._add_tree(root, os.path.join(path,
+                                                      os.fsdecode(name)))
+            for root in changed:
+                self.callback(root)
+
+
+def _relpath(root, path):
+    # Path relative to a watched root, '' for the root itself
+    return '' if path == root else os.path.relpath(path, root)
+
+
+def _libc():
+    # The C library, if it has inotify
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    except OSError:
+        return None
+    if not hasattr(libc, 'inotify_init1'):
+        return None
+    return libc
@@ -17,11 +17,12 @@ with(open(path.join(here, 'README.md'), encoding='utf-8')) as f:
 setup(
     name='open-project-linter',
     version='1.0.1',
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks', 'tests']),
     package_data={
         'openlinter': ['*.yml'],
     },
     install_requires=['gitpython', 'pyyaml', 'pygments'],
+    python_requires='>=3.9',
     license='Apache v2.0',
     description='Automatic checklist for open source project best practices.',
     long_description=long_description,
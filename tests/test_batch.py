@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+""" Automated tests for openlinter.batch using pytest. Run from the
+openlinter root directory with
+
+$ pytest tests/test_batch.py
+"""
+
+import io
+
+import pytest
+
+from openlinter.batch import *
+
+
+RULE_SET = {
+    'files_exist': [{'readme': ['README']}],
+    'code_exists': True,
+}
+
+
+# Test fixtures
+
+@pytest.fixture()
+def setup_two_dirs(tmpdir):
+    with_readme = tmpdir.mkdir('with_readme')
+    with_readme.join('README').write('Read me.\n')
+    without_readme = tmpdir.mkdir('without_readme')
+    return [str(with_readme), str(without_readme)]
+
+
+# Tests for openlinter.batch.lint_many()
+
+def text_output(results):
+    return dict((directory, [str(result) for result in output])
+                for directory, output in results)
+
+
+def test_lint_many_in_process(setup_two_dirs):
+    results = text_output(lint_many(setup_two_dirs, RULE_SET, jobs=1))
+    assert results[setup_two_dirs[0]] == ['  README exists and has content',
+                                          '! no code files found']
+    assert results[setup_two_dirs[1]][0].startswith('! README not found')
+
+def test_lint_many_process_pool_matches_in_process(setup_two_dirs):
+    serial = text_output(lint_many(setup_two_dirs, RULE_SET, jobs=1))
+    parallel = text_output(lint_many(setup_two_dirs, RULE_SET, jobs=2))
+    assert parallel == serial
+
+def test_lint_many_results_know_their_directory(setup_two_dirs):
+    for directory, output in lint_many(setup_two_dirs, RULE_SET, jobs=2):
+        assert [result.directory for result in output] == [directory] * 2
+
+def test_lint_many_reports_errors_per_directory(tmpdir):
+    rule_set = {'version_control': ['detect_vcs', 'multiple_git_commits']}
+    tmpdir.mkdir('.git')
+    results = dict(lint_many([str(tmpdir)], rule_set, jobs=1))
+    assert results[str(tmpdir)][-1].status == 'error'
+    assert str(results[str(tmpdir)][-1]).startswith('! could not check')
+
+def test_lint_many_with_state_and_no_checks(setup_two_dirs, tmpdir):
+    from openlinter.incremental import LintState
+    state = LintState(str(tmpdir.join('state.db')))
+    results = dict(lint_many(setup_two_dirs, {}, jobs=1, state=state))
+    assert results == {directory: [] for directory in setup_two_dirs}
+
+
+# Tests for openlinter.batch.read_directory_list()
+
+def test_read_directory_list_from_args():
+    assert read_directory_list(['a', 'b']) == ['a', 'b']
+
+def test_read_directory_list_from_file(tmpdir):
+    path_file = tmpdir.join('repos.txt')
+    path_file.write('repo1\n\n# a comment\n  repo2  \n')
+    result = read_directory_list(['repo0'], str(path_file))
+    assert result == ['repo0', 'repo1', 'repo2']
+
+def test_read_directory_list_from_stdin(monkeypatch):
+    monkeypatch.setattr('sys.stdin', io.StringIO('repo1\nrepo2\n'))
+    assert read_directory_list() == ['repo1', 'repo2']
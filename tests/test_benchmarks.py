@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+""" Automated tests for the benchmark suite using pytest. Run from the
+openlinter root directory with
+
+$ pytest tests/test_benchmarks.py
+"""
+
+import inspect
+import subprocess
+
+import pytest
+
+import openlinter.rules as rules
+from benchmarks.bench import benchmark_cases, compare
+from benchmarks.synthrepo import generate
+
+
+def head(path):
+    return subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+                                   cwd=path).decode().strip()
+
+
+# Tests for benchmarks.synthrepo.generate()
+
+def test_generate_is_reproducible(tmpdir):
+    first = generate(str(tmpdir.join('a')), 'small', ['deep', 'branches'])
+    second = generate(str(tmpdir.join('b')), 'small', ['deep', 'branches'])
+    for shape in first:
+        assert head(first[shape]) == head(second[shape])
+    assert rules.check_for_code(first['deep'])
+    assert not rules.check_for_develop_branch(first['branches'], 'develop')
+
+def test_generate_reuses_repositories(tmpdir):
+    path = generate(str(tmpdir), 'small', ['deep'])['deep']
+    tmpdir.join('small', 'deep', 'marker').write('')
+    assert generate(str(tmpdir), 'small', ['deep'])['deep'] == path
+    assert tmpdir.join('small', 'deep', 'marker').check()
+
+
+# Tests for benchmarks.bench
+
+def test_every_rule_has_a_benchmark(tmpdir):
+    path = generate(str(tmpdir), 'small', ['deep'])['deep']
+    public = set(name for name, value in vars(rules).items()
+                 if inspect.isfunction(value) and
+                 value.__module__ == rules.__name__ and
+                 not name.startswith('_'))
+    assert public <= set(benchmark_cases(path))
+
+def test_compare_reports_slower_cases():
+    def saved(seconds):
+        return {'commit': 'abc', 'date': 'today', 'scale': 'small',
+                'results': {'files': {'main': {'min': seconds}}}}
+    output = []
+    assert compare(saved(1.0), saved(1.5), report=output.append) == \
+        [('files', 'main', 1.5)]
+    assert output[-1].endswith('slower')
+    assert compare(saved(1.0), saved(1.05), report=output.append) == []
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+""" Automated tests for openlinter.cache using pytest. Run from the
+openlinter root directory with
+
+$ pytest tests/test_cache.py
+"""
+
+import concurrent.futures
+import os
+
+import pytest
+
+from openlinter.cache import *
+from openlinter.gitrepo import IndexEntry
+
+# sniff_bytes and max_read_bytes
+LIMITS = (8192, 65536)
+
+
+# Tests for openlinter.cache.ClassificationCache
+
+def test_cache_miss(tmpdir):
+    cache = ClassificationCache(str(tmpdir.join('cache.db')))
+    assert cache.get('key') is None
+    assert cache.misses == 1
+
+def test_cache_put_and_get(tmpdir):
+    cache = ClassificationCache(str(tmpdir.join('cache.db')))
+    cache.put('python', 'Python')
+    cache.put('binary', None)
+    assert cache.get('python') == 'Python'
+    assert cache.get('binary') == ''
+    assert cache.hits == 2
+
+def test_cache_persists_between_instances(tmpdir):
+    path = str(tmpdir.join('cache.db'))
+    with ClassificationCache(path) as cache:
+        cache.put('key', 'Python')
+    assert ClassificationCache(path).get('key') == 'Python'
+
+def test_cache_directory_path(tmpdir):
+    cache = ClassificationCache(str(tmpdir))
+    assert cache.path == os.path.join(str(tmpdir), CACHE_FILENAME)
+
+def test_cache_evicts_least_recently_used(tmpdir, monkeypatch):
+    clock = iter(range(100))
+    monkeypatch.setattr('openlinter.cache._now', lambda: next(clock))
+    path = str(tmpdir.join('cache.db'))
+    cache = ClassificationCache(path, max_entries=2)
+    cache.put('a', 'A')
+    cache.flush()
+    cache.put('b', 'B')
+    cache.flush()
+    # Using 'a' makes 'b' the least recently used
+    assert cache.get('a') == 'A'
+    cache.put('c', 'C')
+    cache.close()
+    cache = ClassificationCache(path, max_entries=2)
+    assert len(cache) == 2
+    assert cache.get('b') is None
+    assert cache.get('a') == 'A'
+
+def test_cache_shared_between_connections(tmpdir):
+    path = str(tmpdir.join('cache.db'))
+    first = ClassificationCache(path)
+    second = ClassificationCache(path)
+    first.put('one', 'Python')
+    second.put('two', 'C')
+    first.flush()
+    second.flush()
+    assert first.get('two') == 'C'
+    assert second.get('one') == 'Python'
+
+def test_cache_shared_between_threads(tmpdir):
+    cache = ClassificationCache(str(tmpdir.join('cache.db')))
+    cache.put('one', 'Python')
+    cache.flush()
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        found = list(executor.map(cache.get, ['one'] * 20))
+        executor.submit(cache.put, 'two', 'C').result()
+        executor.submit(cache.flush).result()
+    assert found == ['Python'] * 20
+    assert cache.get('two') == 'C'
+
+
+# Tests for openlinter.cache.file_key()
+
+def test_file_key_untracked_uses_stat(tmpdir):
+    path = tmpdir.join('code.py')
+    path.write('x = 1\n')
+    key = file_key('code.py', os.stat(str(path)), LIMITS)
+    assert ':stat:' in key and key.endswith(':code.py')
+
+def test_file_key_tracked_uses_blob_sha(tmpdir):
+    path = tmpdir.join('code.py')
+    path.write('x = 1\n')
+    stat = os.stat(str(path))
+    entry = IndexEntry('code.py', 'ab' * 20, stat.st_size,
+                       int(stat.st_mtime), stat.st_mtime_ns % 1000000000,
+                       stat.st_ino)
+    key = file_key('code.py', stat, LIMITS, entry)
+    assert ':blob:' + 'ab' * 20 + ':' in key
+
+def test_file_key_modified_tracked_file_uses_stat(tmpdir):
+    path = tmpdir.join('code.py')
+    path.write('x = 1\n')
+    stat = os.stat(str(path))
+    entry = IndexEntry('code.py', 'ab' * 20, stat.st_size + 1,
+                       int(stat.st_mtime), 0, stat.st_ino)
+    assert ':stat:' in file_key('code.py', stat, LIMITS, entry)
+
+def test_keys_depend_on_limits(tmpdir):
+    path = tmpdir.join('code.py')
+    path.write('x = 1\n')
+    stat = os.stat(str(path))
+    assert file_key('code.py', stat, LIMITS) != \
+        file_key('code.py', stat, (8192, 1024))
+    assert blob_key('code.py', 'ab' * 20, LIMITS) != \
+        blob_key('code.py', 'ab' * 20, (512, 65536))
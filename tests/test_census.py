@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+""" Automated tests for openlinter.census using pytest. Run from the
+openlinter root directory with
+
+$ pytest tests/test_census.py
+"""
+
+import os
+
+import git
+import pytest
+
+from openlinter.census import *
+from openlinter.rules import check_for_code, check_for_languages
+from openlinter.treeindex import GitTreeIndex
+
+
+# Test fixtures
+
+@pytest.fixture()
+def setup_mixed_tree(tmpdir):
+    src = tmpdir.mkdir('src')
+    for i in range(6):
+        src.join('mod{}.py'.format(i)).write('x = {}\n'.format(i))
+    src.join('main.h').write('int main(void);\n')
+    tmpdir.join('README.md').write('# Project\n\nRead me.\n')
+    tmpdir.join('logo.png').write_binary(b'\x89PNG\r\n\x1a\n')
+    return str(tmpdir)
+
+
+def counts(census):
+    return {language: (files, size)
+            for language, files, size, _ in census.breakdown()}
+
+
+# Tests for openlinter.census.LanguageCensus
+
+def test_census_breakdown_largest_first():
+    census = LanguageCensus()
+    census.add('Python', 30)
+    census.add('Markdown', 10)
+    census.add('Python', 60)
+    census.add(None, 1000)
+    assert census.breakdown() == [('Python', 2, 90, 0.9),
+                                  ('Markdown', 1, 10, 0.1)]
+    assert census.code
+
+def test_census_update_adds_counts():
+    first, second = LanguageCensus(), LanguageCensus()
+    first.add('Python', 5)
+    second.add('Python', 7)
+    second.add('C', 3)
+    first.update(second)
+    assert counts(first) == {'Python': (2, 12), 'C': (1, 3)}
+
+def test_census_without_code():
+    census = LanguageCensus()
+    census.add('reStructuredText', 10)
+    assert not census.code
+    assert not LanguageCensus().code
+
+
+# Tests for openlinter.census.count_languages()
+
+def test_count_languages_pool_matches_one_process(setup_mixed_tree):
+    relpaths = ['README.md', 'logo.png'] + [
+        os.path.join('src', name)
+        for name in sorted(os.listdir(os.path.join(setup_mixed_tree, 'src')))]
+    serial, serial_guessed = count_languages(setup_mixed_tree, relpaths,
+                                             jobs=1)
+    pooled, pooled_guessed = count_languages(setup_mixed_tree, relpaths,
+                                             jobs=2, batch_size=2)
+    assert counts(pooled) == counts(serial)
+    assert counts(serial)['Python'] == (6, 6 * len('x = 0\n'))
+    # Only files that had to be read are returned for caching
+    assert pooled_guessed == serial_guessed
+    assert os.path.join('src', 'main.h') in serial_guessed
+    assert 'README.md' not in serial_guessed
+
+def test_count_languages_pool_from_a_thread(setup_mixed_tree):
+    import concurrent.futures
+    relpaths = [os.path.join('src', 'mod{}.py'.format(i)) for i in range(6)]
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        future = executor.submit(count_languages, setup_mixed_tree, relpaths,
+                                 jobs=2, batch_size=2)
+        census, _ = future.result(timeout=60)
+    assert counts(census) == {'Python': (6, 6 * len('x = 0\n'))}
+
+def test_count_languages_skips_removed_files(setup_mixed_tree):
+    census, _ = count_languages(setup_mixed_tree, ['README.md', 'gone.py'],
+                                jobs=1)
+    assert counts(census) == {'Markdown': (1, len('# Project\n\nRead me.\n'))}
+
+
+# Tests for openlinter.rules.check_for_languages()
+
+def test_check_for_languages_agrees_with_check_for_code(setup_mixed_tree):
+    census = check_for_languages(setup_mixed_tree)
+    assert census.code == check_for_code(setup_mixed_tree)
+    assert set(counts(census)) >= {'Python', 'Markdown'}
+
+def test_check_for_languages_uses_cache(setup_mixed_tree, tmpdir,
+                                        monkeypatch):
+    from openlinter.cache import ClassificationCache
+    cache = ClassificationCache(str(tmpdir.join('cache.db')))
+    first = check_for_languages(setup_mixed_tree, cache=cache)
+    sent = []
+    real_count_languages = count_languages
+    def count(root, relpaths, *args):
+        sent.extend(relpaths)
+        return real_count_languages(root, relpaths, *args)
+    monkeypatch.setattr('openlinter.census.count_languages', count)
+    second = check_for_languages(setup_mixed_tree, cache=cache)
+    assert counts(second) == counts(first)
+    assert os.path.join('src', 'main.h') not in sent
+
+def test_check_for_languages_at_ref(tmpdir):
+    repo = git.Repo.init(str(tmpdir))
+    tmpdir.join('main.py').write('print("hi")\n')
+    repo.index.add(['main.py'])
+    repo.index.commit('add code')
+    tmpdir.join('main.py').remove()
+    census = check_for_languages(str(tmpdir), GitTreeIndex(str(tmpdir)))
+    assert counts(census) == {'Python': (1, len('print("hi")\n'))}
+
+
+# Tests for openlinter.openlinter.lint_directory() with census set
+
+def test_lint_reports_languages(setup_mixed_tree):
+    from openlinter.openlinter import lint_directory
+    from openlinter.results import INFO, PASS
+    results = []
+    lint_directory(setup_mixed_tree, {'code_exists': True,
+                                      'code_detection': {'census': True}},
+                   report=results.append)
+    assert [(r.rule_id, r.status) for r in results] == \
+        [('code_exists', PASS), ('code_exists.languages', INFO)]
+    assert results[1].detail.startswith('languages: Python ')
+    assert '(6 files)' in results[1].detail
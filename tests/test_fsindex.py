@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+""" Automated tests for openlinter.fsindex using pytest. Run from the
+openlinter root directory with
+
+$ pytest tests/test_fsindex.py
+"""
+
+import os
+
+import pytest
+
+from openlinter.fsindex import *
+
+
+# Test fixtures
+
+@pytest.fixture()
+def setup_tree(tmpdir):
+    tmpdir.join('README.md').write('Read me.\n')
+    tmpdir.join('empty.txt').write('')
+    src = tmpdir.mkdir('src')
+    src.join('main.py').write('print("hi")\n')
+    src.mkdir('pkg').join('mod.py').write('x = 1\n')
+
+
+@pytest.fixture()
+def count_scandir(monkeypatch):
+    calls = []
+    real_scandir = os.scandir
+    def scandir(path):
+        calls.append(path)
+        return real_scandir(path)
+    monkeypatch.setattr('os.scandir', scandir)
+    return calls
+
+
+# Tests for openlinter.fsindex.FileIndex
+
+def test_listdir_root(setup_tree, tmpdir):
+    index = FileIndex(str(tmpdir))
+    names = sorted(entry.name for entry in index.listdir())
+    assert names == ['README.md', 'empty.txt', 'src']
+
+def test_listdir_nonexistent_dir():
+    with pytest.raises(FileNotFoundError):
+        FileIndex('zzyzx').listdir()
+
+def test_iter_files_whole_tree(setup_tree, tmpdir):
+    index = FileIndex(str(tmpdir))
+    relpaths = sorted(entry.relpath for entry in index.iter_files())
+    assert relpaths == ['README.md', 'empty.txt',
+                        os.path.join('src', 'main.py'),
+                        os.path.join('src', 'pkg', 'mod.py')]
+
+def test_iter_files_nonexistent_dir():
+    assert list(FileIndex('zzyzx').iter_files()) == []
+
+def test_iter_files_by_cheapest_first(setup_tree, tmpdir):
+    index = FileIndex(str(tmpdir))
+    costs = {'README.md': 5, 'src': 0, 'pkg': 0, 'main.py': 0, 'mod.py': 0}
+    relpaths = [entry.relpath for entry in
+                index.iter_files_by(lambda entry: costs.get(entry.name, 1))]
+    assert relpaths == [os.path.join('src', 'main.py'),
+                        os.path.join('src', 'pkg', 'mod.py'),
+                        'empty.txt', 'README.md']
+
+def test_iter_files_by_lists_costly_directories_last(setup_tree, tmpdir,
+                                                      count_scandir):
+    index = FileIndex(str(tmpdir))
+    files = index.iter_files_by(lambda entry: 9 if entry.name == 'src' else 0)
+    assert next(files).relpath in ('README.md', 'empty.txt')
+    assert len(count_scandir) == 1
+
+def test_each_directory_scanned_once(setup_tree, tmpdir, count_scandir):
+    index = FileIndex(str(tmpdir))
+    index.listdir()
+    list(index.iter_files())
+    list(index.iter_files())
+    assert len(count_scandir) == 3
+
+def test_entry_attributes(setup_tree, tmpdir):
+    entry = FileIndex(str(tmpdir)).get('README.md')
+    assert entry.is_file and not entry.is_dir
+    assert entry.size == 9
+    assert entry.ext == '.md'
+    assert entry.path == os.path.join(str(tmpdir), 'README.md')
+
+def test_get_by_full_path(setup_tree, tmpdir):
+    index = FileIndex(str(tmpdir))
+    entry = index.get(os.path.join(str(tmpdir), 'src', 'main.py'))
+    assert entry.relpath == os.path.join('src', 'main.py')
+
+def test_get_missing_path(setup_tree, tmpdir):
+    index = FileIndex(str(tmpdir))
+    assert index.get('zzyzx') is None
+    assert index.get(os.path.join('zzyzx', 'file.txt')) is None
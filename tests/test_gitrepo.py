@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+""" Automated tests for openlinter.gitrepo using pytest. Run from the
+openlinter root directory with
+
+$ pytest tests/test_gitrepo.py
+"""
+
+import os
+
+import git
+import pytest
+
+from openlinter.gitrepo import *
+
+
+# Test fixtures
+
+@pytest.fixture()
+def setup_repo_with_files(tmpdir):
+    repo = git.Repo.init(str(tmpdir))
+    with repo.config_writer() as config:
+        config.set_value('user', 'name', 'Test User')
+        config.set_value('user', 'email', 'test@example.com')
+    tmpdir.join('README.md').write('Read me.\n')
+    tmpdir.mkdir('src').join('main.py').write('print("hi")\n')
+    # Stage with git itself so the index has git's own stat data
+    repo.git.add('README.md', os.path.join('src', 'main.py'))
+    repo.git.commit('-m', 'initial commit')
+    return repo
+
+
+def git_ls_files(repo):
+    shas = {}
+    for line in repo.git.ls_files('-s').splitlines():
+        info, path = line.split('\t')
+        shas[path] = info.split()[1]
+    return shas
+
+
+# Tests for openlinter.gitrepo.find_git_dir()
+
+def test_find_git_dir_working_tree(setup_repo_with_files, tmpdir):
+    assert find_git_dir(str(tmpdir)) == os.path.join(str(tmpdir), '.git')
+
+def test_find_git_dir_bare_repo(tmpdir):
+    git.Repo.init(str(tmpdir), bare=True)
+    assert find_git_dir(str(tmpdir)) == str(tmpdir)
+
+def test_find_git_dir_not_a_repo():
+    assert find_git_dir('tests/fixtures') is None
+
+
+# Tests for openlinter.gitrepo.read_index()
+
+def test_read_index_no_index(tmpdir):
+    git.Repo.init(str(tmpdir))
+    assert read_index(os.path.join(str(tmpdir), '.git')) == {}
+
+@pytest.mark.parametrize('version', ['2', '3', '4'])
+def test_read_index_matches_git(setup_repo_with_files, tmpdir, version):
+    repo = setup_repo_with_files
+    repo.git.update_index('--index-version', version)
+    # Make sure no entry is "racily clean" against the rewritten index
+    index_path = os.path.join(str(tmpdir), '.git', 'index')
+    stat = os.stat(index_path)
+    os.utime(index_path, (stat.st_atime + 10, stat.st_mtime + 10))
+    entries = read_index(os.path.join(str(tmpdir), '.git'))
+    assert {path: e.sha for path, e in entries.items()} == git_ls_files(repo)
+
+def test_read_index_entry_matches_stat(setup_repo_with_files, tmpdir):
+    index_path = os.path.join(str(tmpdir), '.git', 'index')
+    stat = os.stat(index_path)
+    os.utime(index_path, (stat.st_atime + 10, stat.st_mtime + 10))
+    entry = read_index(os.path.join(str(tmpdir), '.git'))['README.md']
+    assert entry.matches_stat(os.stat(str(tmpdir.join('README.md'))))
+    tmpdir.join('README.md').write('Changed.\n')
+    assert not entry.matches_stat(os.stat(str(tmpdir.join('README.md'))))
+
+
+# Tests for openlinter.gitrepo.GitContext
+
+def test_git_context_nonexistent_folder():
+    with pytest.raises(git.NoSuchPathError):
+        GitContext('zzyzx')
+
+def test_git_context_not_a_repo():
+    with pytest.raises(git.InvalidGitRepositoryError):
+        GitContext('tests/fixtures/pic-folder')
+
+def test_git_context_branches_without_git_process(setup_repo_with_files,
+                                                   tmpdir, monkeypatch):
+    repo = setup_repo_with_files
+    repo.create_head('feature/login')
+    head_sha = repo.head.commit.hexsha
+    def no_subprocess(*args, **kwargs):
+        raise AssertionError('started a git process')
+    monkeypatch.setattr('subprocess.Popen', no_subprocess)
+    branches = GitContext(str(tmpdir)).branches
+    assert branches == {repo.active_branch.name: head_sha,
+                        'feature/login': head_sha}
+
+def test_git_context_packed_branches(setup_repo_with_files, tmpdir):
+    repo = setup_repo_with_files
+    repo.create_head('develop')
+    repo.git.pack_refs('--all')
+    assert not tmpdir.join('.git', 'refs', 'heads', 'develop').exists()
+    assert 'develop' in GitContext(str(tmpdir)).branches
+
+def test_git_context_repo_opened_once(setup_repo_with_files, tmpdir):
+    context = GitContext(str(tmpdir))
+    assert context.repo is context.repo
+
+def test_git_context_refresh_reads_new_branches(setup_repo_with_files,
+                                                tmpdir):
+    context = GitContext(str(tmpdir))
+    repo = context.repo
+    assert 'develop' not in context.branches
+    setup_repo_with_files.create_head('develop')
+    context.refresh()
+    assert 'develop' in context.branches
+    assert context.repo is repo
+
+
+# Tests for openlinter.gitrepo.open_repository()
+
+def test_open_repository_reuses_context(setup_repo_with_files, tmpdir):
+    context = GitContext(str(tmpdir))
+    assert open_repository(context) is context
+    assert isinstance(open_repository(str(tmpdir)), GitContext)
+
+
+# Tests for openlinter.gitrepo.CommitGraph and history walks
+
+@pytest.fixture()
+def setup_repo_with_history(tmpdir):
+    repo = git.Repo.init(str(tmpdir))
+    for i in range(5):
+        tmpdir.join('file.txt').write('version {}\n'.format(i))
+        repo.index.add([str(tmpdir.join('file.txt'))])
+        repo.index.commit('commit {}'.format(i))
+    # An octopus merge of three branches, whose extra parents are stored
+    # separately in the commit-graph file
+    base = repo.head.commit
+    heads = []
+    for i in range(2):
+        tmpdir.join('other.txt').write('branch {}\n'.format(i))
+        repo.index.add([str(tmpdir.join('other.txt'))])
+        heads.append(repo.index.commit('branch {}'.format(i),
+                                       parent_commits=[base]))
+    merge = git.Commit.create_from_tree(repo, repo.index.write_tree(),
+                                        'octopus', [base] + heads)
+    repo.create_head('octopus', merge)
+    return repo
+
+def test_read_commit_graph_missing(setup_repo_with_history, tmpdir):
+    assert read_commit_graph(os.path.join(str(tmpdir), '.git')) is None
+
+def test_commit_graph_parents_match_git(setup_repo_with_history, tmpdir):
+    repo = setup_repo_with_history
+    repo.git.commit_graph('write', '--reachable')
+    graph = read_commit_graph(os.path.join(str(tmpdir), '.git'))
+    commits = list(repo.iter_commits('--all'))
+    assert len(graph) == len(commits) == 8
+    for commit in commits:
+        expected = [parent.hexsha for parent in commit.parents]
+        assert graph.parents(commit.hexsha) == expected
+
+def test_commit_graph_unknown_commit(setup_repo_with_history, tmpdir):
+    setup_repo_with_history.git.commit_graph('write', '--reachable')
+    graph = read_commit_graph(os.path.join(str(tmpdir), '.git'))
+    assert graph.parents('0' * 40) is None
+
+@pytest.mark.parametrize('with_graph', [False, True])
+def test_count_commits_is_bounded(setup_repo_with_history, tmpdir,
+                                  with_graph):
+    repo = setup_repo_with_history
+    if with_graph:
+        repo.git.commit_graph('write', '--reachable')
+    context = GitContext(str(tmpdir))
+    sha = repo.heads.octopus.commit.hexsha
+    assert context.count_commits(sha, 100) == 8
+    assert context.count_commits(sha, 3) == 3
+
+def test_commit_parents_from_graph_without_git_process(
+        setup_repo_with_history, tmpdir, monkeypatch):
+    repo = setup_repo_with_history
+    repo.git.commit_graph('write', '--reachable')
+    sha = repo.head.commit.hexsha
+    parent = repo.head.commit.parents[0].hexsha
+    def no_subprocess(*args, **kwargs):
+        raise AssertionError('started a git process')
+    monkeypatch.setattr('subprocess.Popen', no_subprocess)
+    assert GitContext(str(tmpdir)).commit_parents(sha) == [parent]
+
+def test_resolve_symbolic_branch(setup_repo_with_history, tmpdir):
+    repo = setup_repo_with_history
+    context = GitContext(str(tmpdir))
+    name = repo.active_branch.name
+    assert (context.resolve('ref: refs/heads/' + name) ==
+            repo.head.commit.hexsha)
+    assert context.resolve('ref: refs/heads/zzyzx') is None
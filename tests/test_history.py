@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+""" Automated tests for openlinter.history using pytest. Run from the
+openlinter root directory with
+
+$ pytest tests/test_history.py
+"""
+
+import os
+
+import git
+import pytest
+
+import openlinter.rules
+from openlinter.history import *
+from openlinter.ignore import ignore_rules_for
+from openlinter.treeindex import GitTreeIndex
+
+
+RULE_SET = {
+    'files_exist': [{'license': ['LICENSE', 'COPYING']},
+                    {'readme': ['README']}],
+    'code_exists': True,
+    'use_gitignore': True,
+}
+
+
+# Test fixtures
+
+@pytest.fixture()
+def setup_history(tmpdir):
+    repo = git.Repo.init(str(tmpdir))
+
+    def commit(message, write=(), remove=()):
+        for path, text in write:
+            tmpdir.join(path).write(text, ensure=True)
+        if write:
+            repo.index.add([path for path, _ in write])
+        if remove:
+            repo.index.remove(list(remove), working_tree=True)
+        repo.index.commit(message)
+
+    commit('readme', [('README', 'Read me.\n')])
+    commit('empty license', [('LICENSE', '')])
+    commit('code', [('src/main.h', 'int main(void);\n')])
+    commit('build output', [('build/out.c', 'int x;\n'),
+                            ('.gitignore', 'build/\n')])
+    commit('remove code', remove=['src/main.h'])
+    commit('license text', [('LICENSE', 'MIT\n'),
+                            ('docs/notes.rst', 'Notes\n=====\n')])
+    return repo
+
+
+def full_check(directory, sha):
+    # Results for one commit computed from scratch
+    index = GitTreeIndex(directory, sha, ignore_rules_for(directory, RULE_SET))
+    results = {}
+    for group in RULE_SET['files_exist']:
+        for file_type, names in group.items():
+            found = [openlinter.rules.check_file_presence(n, directory, index)
+                     for n in names]
+            results[file_type] = (True if True in found else
+                                  None if None in found else False)
+    results['code'] = openlinter.rules.check_for_code(directory, index)
+    return results
+
+
+# Tests for openlinter.history.list_commits()
+
+def test_list_commits_oldest_first(setup_history):
+    commits = list_commits(setup_history.working_tree_dir)
+    shas = [c.hexsha for c in setup_history.iter_commits()]
+    assert [sha for sha, _ in commits] == shas[::-1]
+    assert len(commits[0][1]) == len('2016-01-01')
+
+def test_list_commits_every_nth_keeps_newest(setup_history):
+    commits = list_commits(setup_history.working_tree_dir, step=4)
+    shas = [c.hexsha for c in setup_history.iter_commits()][::-1]
+    assert [sha for sha, _ in commits] == [shas[0], shas[4], shas[5]]
+
+def test_list_commits_range(setup_history):
+    commits = list_commits(setup_history.working_tree_dir, 'HEAD~2..HEAD')
+    assert len(commits) == 2
+
+
+# Tests for openlinter.history.changed_paths()
+
+def test_changed_paths(setup_history):
+    paths = changed_paths(setup_history.working_tree_dir, 'HEAD~2', 'HEAD~1')
+    assert paths == [os.path.join('src', 'main.h')]
+
+
+# Tests for openlinter.history.lint_history()
+
+def test_lint_history_series(setup_history):
+    series = list(lint_history(setup_history.working_tree_dir, RULE_SET))
+    assert [results for _, _, results in series] == [
+        {'license': False, 'readme': True, 'code': False},
+        {'license': None, 'readme': True, 'code': False},
+        {'license': None, 'readme': True, 'code': True},
+        {'license': None, 'readme': True, 'code': True},
+        {'license': None, 'readme': True, 'code': False},
+        {'license': True, 'readme': True, 'code': False},
+    ]
+
+def test_lint_history_matches_full_checks(setup_history):
+    directory = setup_history.working_tree_dir
+    for sha, _, results in lint_history(directory, RULE_SET, step=2):
+        assert results == full_check(directory, sha)
+
+def test_lint_history_only_classifies_changed_files(setup_history,
+                                                    monkeypatch):
+    classified = []
+    guess = openlinter.rules.guess_entry_lexer_name
+    def counting_guess(index, entry, *args):
+        classified.append(entry.relpath)
+        return guess(index, entry, *args)
+    monkeypatch.setattr(openlinter.rules, 'guess_entry_lexer_name',
+                        counting_guess)
+    list(lint_history(setup_history.working_tree_dir, RULE_SET))
+    # Each file is classified once, in the commit that adds or changes it;
+    # build/ is ignored and the .gitignore commit reuses earlier results
+    assert sorted(classified) == sorted([
+        'README', 'LICENSE', os.path.join('src', 'main.h'), '.gitignore',
+        'LICENSE', os.path.join('docs', 'notes.rst')])
+
+
+# Tests for openlinter.history.format_history()
+
+def test_format_history():
+    output = []
+    format_history([('a' * 40, '2016-01-01', {'license': None,
+                                              'readme': True,
+                                              'code': False})],
+                   RULE_SET, report=output.append)
+    assert output == ['commit   date        license  readme  code',
+                      'aaaaaaa  2016-01-01  0        +       -']
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+""" Automated tests for openlinter.ignore using pytest. Run from the
+openlinter root directory with
+
+$ pytest tests/test_ignore.py
+"""
+
+import concurrent.futures
+import os
+import threading
+import time
+
+import git
+import pytest
+
+from openlinter.fsindex import FileIndex
+from openlinter.ignore import *
+
+
+def rules_with(lines, base=''):
+    ignore = IgnoreRules()
+    ignore.add_patterns(base, lines)
+    return ignore
+
+
+# Tests for openlinter.ignore.IgnoreRules
+
+def test_vcs_directories_always_ignored():
+    ignore = IgnoreRules(use_gitignore=False)
+    assert ignore.is_ignored('.git', True)
+    assert ignore.is_ignored('src/.svn', True)
+    assert not ignore.is_ignored('.gitignore', False)
+
+def test_skip_directories_by_name_and_glob():
+    ignore = IgnoreRules(['node_modules', '*.egg-info'])
+    assert ignore.is_ignored('web/node_modules', True)
+    assert ignore.is_ignored('openlinter.egg-info', True)
+    # Only directories are skipped by name
+    assert not ignore.is_ignored('node_modules', False)
+
+@pytest.mark.parametrize('pattern, path, is_dir, expected', [
+    ('*.log', 'debug.log', False, True),
+    ('*.log', 'logs/debug.log', False, True),
+    ('*.log', 'debug.log.txt', False, False),
+    ('/build', 'build', True, True),
+    ('/build', 'src/build', True, False),
+    ('build/', 'src/build', True, True),
+    ('build/', 'build', False, False),
+    ('docs/*.md', 'docs/index.md', False, True),
+    ('docs/*.md', 'docs/api/index.md', False, False),
+    ('docs/*.md', 'src/docs/index.md', False, False),
+    ('**/tmp', 'a/b/tmp', True, True),
+    ('a/**/b', 'a/b', True, True),
+    ('a/**/b', 'a/x/y/b', True, True),
+    ('logs/**', 'logs/today.txt', False, True),
+    ('file?.txt', 'file1.txt', False, True),
+    ('file[0-9].txt', 'filea.txt', False, False),
+    ('file[!0-9].txt', 'filea.txt', False, True),
+    ('\\#notes', '#notes', False, True),
+    ('# a comment', '# a comment', False, False),
+])
+def test_gitignore_patterns(pattern, path, is_dir, expected):
+    assert rules_with([pattern]).is_ignored(path, is_dir) is expected
+
+def test_negation_last_match_wins():
+    ignore = rules_with(['*.log', '!keep.log'])
+    assert ignore.is_ignored('debug.log', False)
+    assert not ignore.is_ignored('keep.log', False)
+
+def test_deeper_gitignore_takes_precedence():
+    ignore = rules_with(['*.txt'])
+    ignore.add_patterns('docs', ['!*.txt'])
+    assert ignore.is_ignored('notes.txt', False)
+    assert not ignore.is_ignored('docs/notes.txt', False)
+
+def test_nested_patterns_relative_to_their_directory():
+    ignore = rules_with(['/generated'], base='src')
+    assert ignore.is_ignored('src/generated', True)
+    assert not ignore.is_ignored('generated', True)
+
+
+def test_visit_directory_waits_for_another_thread(tmpdir):
+    tmpdir.join('.gitignore').write('ignored/\n')
+    tmpdir.mkdir('ignored')
+    reading = threading.Event()
+    release = threading.Event()
+    class SlowIndex(FileIndex):
+        def open(self, entry):
+            reading.set()
+            release.wait(5)
+            return super(SlowIndex, self).open(entry)
+    index = SlowIndex(str(tmpdir))
+    ignore = IgnoreRules()
+    entries = index.listdir()
+    def visit_and_check():
+        ignore.visit_directory('', entries, index)
+        return ignore.is_ignored('ignored', True)
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        executor.submit(ignore.visit_directory, '', entries, index)
+        assert reading.wait(5)
+        second = executor.submit(visit_and_check)
+        # The second visit must not go ahead while the first is reading
+        time.sleep(0.05)
+        release.set()
+        assert second.result(5)
+
+
+# Tests for pruning in openlinter.fsindex.FileIndex.iter_files()
+
+@pytest.fixture()
+def setup_tree_with_ignores(tmpdir):
+    git.Repo.init(str(tmpdir))
+    tmpdir.join('.gitignore').write('*.log\n/dist/\n')
+    tmpdir.join('main.py').write('print("hi")\n')
+    tmpdir.join('debug.log').write('log\n')
+    tmpdir.mkdir('dist').join('bundle.js').write('x\n')
+    tmpdir.mkdir('node_modules').mkdir('lib').join('index.js').write('x\n')
+    src = tmpdir.mkdir('src')
+    src.join('.gitignore').write('!important.log\n')
+    src.join('important.log').write('log\n')
+    tmpdir.join('.git', 'info', 'exclude').write('secret.txt\n')
+    tmpdir.join('secret.txt').write('shh\n')
+
+def test_iter_files_prunes_ignored(setup_tree_with_ignores, tmpdir,
+                                   monkeypatch):
+    scanned = []
+    real_scandir = os.scandir
+    def scandir(path):
+        scanned.append(os.path.normpath(path))
+        return real_scandir(path)
+    monkeypatch.setattr('os.scandir', scandir)
+
+    rule_set = {'skip_directories': ['node_modules']}
+    index = FileIndex(str(tmpdir), ignore_rules_for(str(tmpdir), rule_set))
+    relpaths = sorted(entry.relpath for entry in index.iter_files())
+    assert relpaths == ['.gitignore', 'main.py',
+                        os.path.join('src', '.gitignore'),
+                        os.path.join('src', 'important.log')]
+    assert sorted(scanned) == [str(tmpdir), str(tmpdir.join('src'))]
+
+def test_iter_files_without_gitignore(setup_tree_with_ignores, tmpdir):
+    rule_set = {'use_gitignore': False}
+    index = FileIndex(str(tmpdir), ignore_rules_for(str(tmpdir), rule_set))
+    relpaths = [entry.relpath for entry in index.iter_files()]
+    assert 'debug.log' in relpaths
+    assert os.path.join('node_modules', 'lib', 'index.js') in relpaths
+    assert not any(path.startswith('.git' + os.sep) for path in relpaths)
+
+
+# Tests for ignore rules shared by checks running at the same time
+
+def test_concurrent_checks_skip_ignored_files(tmpdir):
+    from openlinter.openlinter import lint_directory
+    git.Repo.init(str(tmpdir))
+    tmpdir.join('.gitignore').write('ignored/\n')
+    tmpdir.join('README').write('Read me.\n')
+    tmpdir.mkdir('ignored').join('settings.py').write(
+        'password = "hunter2hunter2"\n')
+    rule_set = {'files_exist': [{'readme': ['README']}],
+                'code_exists': True, 'secrets': True,
+                'inclusive_language': True}
+    for _ in range(20):
+        results = []
+        lint_directory(str(tmpdir), rule_set, report=results.append)
+        assert not any('ignored' in result.detail for result in results)
+        assert ('code_exists', 'fail') in [(r.rule_id, r.status)
+                                           for r in results]
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+""" Automated tests for openlinter.incremental using pytest. Run from the
+openlinter root directory with
+
+$ pytest tests/test_incremental.py
+"""
+
+import git
+import pytest
+
+import openlinter.rules as rules
+from openlinter.incremental import *
+from openlinter.openlinter import lint_directory
+
+
+RULE_SET = {
+    'files_exist': [{'readme': ['README']}],
+    'code_exists': True,
+    'version_control': ['detect_vcs', 'detect_git_branches',
+                        'multiple_git_commits'],
+    'dev_branch_names': ['develop'],
+}
+
+
+# Test fixtures
+
+@pytest.fixture()
+def setup_repo(tmpdir):
+    work = tmpdir.mkdir('work')
+    repo = git.Repo.init(str(work))
+    work.join('main.py').write('print("hi")\n')
+    repo.index.add([str(work.join('main.py'))])
+    repo.index.commit('initial commit')
+    return repo
+
+@pytest.fixture()
+def state(tmpdir):
+    with LintState(str(tmpdir.join('state.db'))) as state:
+        yield state
+
+
+def lint(directory, state, rule_set=RULE_SET):
+    output = []
+    lint_directory(directory, rule_set, report=output.append, state=state)
+    return [str(result) for result in output]
+
+
+def fail(*args, **kwargs):
+    raise AssertionError('check was run again')
+
+
+# Tests for openlinter.incremental.LintState
+
+def test_unchanged_directory_replays_all_checks(setup_repo, state,
+                                                monkeypatch):
+    directory = setup_repo.working_tree_dir
+    first = lint(directory, state)
+    assert state.hits == 0
+    monkeypatch.setattr('openlinter.rules.check_file_presence', fail)
+    monkeypatch.setattr('openlinter.rules.check_for_code', fail)
+    monkeypatch.setattr('openlinter.rules.check_multiple_branches', fail)
+    monkeypatch.setattr('openlinter.rules.check_for_multiple_commits', fail)
+    assert lint(directory, state) == first
+    assert state.hits == 4
+    assert state.hit_rate() == 0.5
+
+def test_new_root_file_reruns_file_checks(setup_repo, state, monkeypatch,
+                                          tmpdir):
+    directory = setup_repo.working_tree_dir
+    assert '! README not found in {}'.format(directory) in lint(directory,
+                                                                 state)
+    tmpdir.join('work', 'README').write('Read me.\n')
+    monkeypatch.setattr('openlinter.rules.check_multiple_branches', fail)
+    assert '  README exists and has content' in lint(directory, state)
+
+def test_new_branch_reruns_branch_checks(setup_repo, state, monkeypatch):
+    directory = setup_repo.working_tree_dir
+    assert '! no development branch found' in lint(directory, state)
+    setup_repo.create_head('develop')
+    monkeypatch.setattr('openlinter.rules.check_for_code', fail)
+    assert '  development branch "develop" found' in lint(directory, state)
+
+def test_new_commit_reruns_code_check(setup_repo, state, tmpdir,
+                                      monkeypatch):
+    directory = setup_repo.working_tree_dir
+    lint(directory, state)
+    tmpdir.join('work', 'lib.py').write('x = 1\n')
+    setup_repo.index.add([str(tmpdir.join('work', 'lib.py'))])
+    setup_repo.index.commit('second commit')
+    calls = []
+    real_check_for_code = rules.check_for_code
+    def check_for_code(*args, **kwargs):
+        calls.append(args)
+        return real_check_for_code(*args, **kwargs)
+    monkeypatch.setattr('openlinter.rules.check_for_code', check_for_code)
+    lint(directory, state)
+    assert len(calls) == 1
+
+def test_changed_rules_rerun_every_check(setup_repo, state):
+    directory = setup_repo.working_tree_dir
+    lint(directory, state)
+    rule_set = dict(RULE_SET, dev_branch_names=['feature'])
+    lint(directory, state, rule_set)
+    assert state.hits == 0
+
+def test_forget_reruns_every_check(setup_repo, state):
+    directory = setup_repo.working_tree_dir
+    lint(directory, state)
+    state.forget(directory)
+    lint(directory, state)
+    assert state.hits == 0
+
+def test_undetermined_result_is_not_saved(setup_repo, state):
+    directory = setup_repo.working_tree_dir
+    rule_set = {'code_exists': True, 'code_detection': {'max_files': 0}}
+    assert lint(directory, state, rule_set) == lint(directory, state,
+                                                    rule_set)
+    assert state.hits == 0
+    assert state.misses == 2
+
+def test_hit_rate_before_any_check(state):
+    assert state.hit_rate() is None
+
+
+# Tests for openlinter.incremental.RuleInputs
+
+def test_rule_inputs_tree_without_git(tmpdir):
+    from openlinter.fsindex import FileIndex
+    tmpdir.join('notes.txt').write('first\n')
+    inputs = RuleInputs(str(tmpdir), {}, FileIndex(str(tmpdir)))
+    before = inputs.fingerprint('tree')
+    tmpdir.join('notes.txt').write('second version\n')
+    inputs = RuleInputs(str(tmpdir), {}, FileIndex(str(tmpdir)))
+    assert inputs.fingerprint('tree') != before
+
+def test_rule_inputs_tree_sees_unstaged_and_untracked_files(setup_repo,
+                                                            tmpdir):
+    from openlinter.fsindex import FileIndex
+    work = tmpdir.join('work')
+    def fingerprint():
+        inputs = RuleInputs(str(work), {}, FileIndex(str(work)))
+        return inputs.fingerprint('tree')
+    clean = fingerprint()
+    assert fingerprint() == clean
+    work.join('main.py').write('print("hello")\n')
+    edited = fingerprint()
+    assert edited != clean
+    work.join('notes.h').write('int x;\n')
+    assert fingerprint() != edited
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+""" Automated tests for openlinter.instrument using pytest. Run from the
+openlinter root directory with
+
+$ pytest tests/test_instrument.py
+"""
+
+import io
+import json
+
+import git
+import pytest
+
+import openlinter.rules as rules
+from openlinter.instrument import *
+from openlinter.openlinter import lint_directory
+
+
+RULE_SET = {
+    'files_exist': [{'readme': ['README']}],
+    'code_exists': True,
+    'version_control': ['detect_vcs', 'multiple_git_commits'],
+}
+
+
+# Test fixtures
+
+@pytest.fixture()
+def setup_repo(tmpdir):
+    repo = git.Repo.init(str(tmpdir))
+    tmpdir.join('README').write('Read me.\n')
+    tmpdir.mkdir('src').join('main.h').write('int main(void);\n')
+    repo.index.add(['README', 'src/main.h'])
+    repo.index.commit('initial commit')
+    return str(tmpdir)
+
+
+def quiet(result):
+    pass
+
+
+# Tests for openlinter.instrument.Profiler
+
+def test_profiler_counts_rules_and_io(setup_repo):
+    with Profiler() as profiler:
+        # Checks running at the same time share the file index, and each
+        # listing is charged to whichever of them gets to it first
+        lint_directory(setup_repo, RULE_SET, report=quiet, threads=1)
+    summary = profiler.summary()
+    stats = summary['rules']
+    assert stats['check_files_presence']['calls'] == 1
+    assert stats['check_for_file_content']['stats'] == 1
+    assert stats['check_for_code']['files_read'] == 1
+    assert stats['check_for_code']['bytes_read'] == len('int main(void);\n')
+    assert stats['check_for_code']['dirs_listed'] == 1
+    assert stats['check_for_multiple_commits']['git_processes'] >= 1
+    assert summary['total']['wall'] >= stats['check_for_code']['wall']
+    assert summary['total']['calls'] == sum(s['calls']
+                                            for s in stats.values())
+
+def test_profiler_times_are_exclusive(setup_repo):
+    with Profiler() as profiler:
+        # Checks running at the same time would overlap
+        lint_directory(setup_repo, RULE_SET, report=quiet, threads=1)
+    summary = profiler.summary()
+    rule_wall = sum(stats['wall'] for stats in summary['rules'].values())
+    assert rule_wall == pytest.approx(summary['total']['wall'])
+
+def test_profiler_restores_rules():
+    check_for_code = rules.check_for_code
+    with Profiler():
+        assert rules.check_for_code is not check_for_code
+    assert rules.check_for_code is check_for_code
+    assert git.cmd.Git.execute.__qualname__ == 'Git.execute'
+
+def test_record_without_profiler_does_nothing():
+    record('stats')
+
+def test_only_one_profiler_at_a_time():
+    with Profiler():
+        with pytest.raises(RuntimeError):
+            Profiler().__enter__()
+
+def test_profiler_traces_memory(setup_repo):
+    with Profiler(trace_memory=True) as profiler:
+        lint_directory(setup_repo, RULE_SET, report=quiet)
+    assert profiler.summary()['total']['peak_memory'] > 0
+
+
+# Tests for openlinter.instrument.write_profile()
+
+def test_write_profile_formats(setup_repo):
+    with Profiler() as profiler:
+        lint_directory(setup_repo, RULE_SET, report=quiet)
+    stream = io.StringIO()
+    write_profile(profiler, 'json', stream)
+    assert json.loads(stream.getvalue())['total']['calls'] > 0
+    stream = io.StringIO()
+    write_profile(profiler, 'text', stream)
+    lines = stream.getvalue().splitlines()
+    assert lines[0].split()[:3] == ['rule', 'calls', 'wall']
+    assert any(line.startswith('total') for line in lines)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+""" Automated tests for openlinter.linter using pytest. Run from the
+openlinter root directory with
+
+$ pytest tests/test_linter.py
+"""
+
+import concurrent.futures
+import os
+
+import git
+import pytest
+
+import openlinter.gitrepo
+from openlinter.linter import *
+from openlinter.results import FAIL, PASS
+
+RULES = '''files_exist:
+- readme:
+  - README
+code_exists: True
+version_control:
+- detect_vcs
+- detect_git_branches
+dev_branch_names:
+- develop
+'''
+
+
+# Test fixtures
+
+@pytest.fixture()
+def setup_repos(tmpdir):
+    # A git repository with a README and code, and a plain directory
+    # with neither
+    work = tmpdir.mkdir('work')
+    repo = git.Repo.init(str(work))
+    work.join('README').write('Read me.\n')
+    work.join('main.c').write('int main(void) { return 0; }\n')
+    repo.index.add([str(work.join('README')), str(work.join('main.c'))])
+    repo.index.commit('initial commit')
+    plain = tmpdir.mkdir('plain')
+    plain.join('notes.rst').write('Notes\n=====\n')
+    tmpdir.join('rules.yml').write(RULES)
+    return str(work), str(plain)
+
+
+def statuses(results):
+    return [(result.rule_id, result.status) for result in results]
+
+
+# Tests for openlinter.linter.Linter
+
+def test_lint_returns_results_without_printing(setup_repos, tmpdir, capsys):
+    work, plain = setup_repos
+    with Linter(str(tmpdir.join('rules.yml'))) as linter:
+        results = linter.lint(work)
+        assert statuses(results) == [
+            ('files_exist.readme', PASS), ('code_exists', PASS),
+            ('detect_vcs', PASS), ('detect_git_branches', FAIL),
+            ('dev_branch_names', FAIL)]
+        assert results[0].directory == work
+        assert statuses(linter.lint(plain))[:2] == [
+            ('files_exist.readme', FAIL), ('code_exists', FAIL)]
+    assert capsys.readouterr().out == ''
+
+def test_lint_calls_report_as_results_come(setup_repos, tmpdir):
+    work, _ = setup_repos
+    reported = []
+    with Linter(str(tmpdir.join('rules.yml'))) as linter:
+        results = linter.lint(work, report=reported.append)
+    assert reported == results
+
+def test_lint_with_a_parsed_rule_set(setup_repos):
+    work, _ = setup_repos
+    with Linter({'code_exists': True}) as linter:
+        assert statuses(linter.lint(work)) == [('code_exists', PASS)]
+        assert statuses(linter.lint(work, {'files_exist': [
+            {'license': ['LICENSE']}]})) == [('files_exist.license', FAIL)]
+
+def test_rule_set_read_again_only_when_changed(setup_repos, tmpdir):
+    path = tmpdir.join('rules.yml')
+    with Linter(str(path)) as linter:
+        first = linter.rule_set()
+        assert linter.rule_set() is first
+        path.write('code_exists: True\n')
+        os.utime(str(path), ns=(0, 10 ** 9))
+        assert linter.rule_set() == {'code_exists': True}
+
+def test_repository_opened_once(setup_repos, tmpdir, monkeypatch):
+    work, _ = setup_repos
+    opened = []
+    class GitContext(openlinter.gitrepo.GitContext):
+        def __init__(self, repository):
+            opened.append(repository)
+            super(GitContext, self).__init__(repository)
+    monkeypatch.setattr('openlinter.gitrepo.GitContext', GitContext)
+    with Linter(str(tmpdir.join('rules.yml'))) as linter:
+        first = linter.lint(work)
+        second = linter.lint(work)
+    assert statuses(first) == statuses(second)
+    assert opened == [work]
+
+def test_lint_replays_saved_output(setup_repos, tmpdir):
+    work, _ = setup_repos
+    with Linter(str(tmpdir.join('rules.yml')),
+                state_path=':memory:') as linter:
+        first = linter.lint(work)
+        second = linter.lint(work)
+        assert statuses(second) == statuses(first)
+        assert linter.state.hits > 0
+
+def test_lint_from_several_threads(setup_repos, tmpdir):
+    work, plain = setup_repos
+    with Linter(str(tmpdir.join('rules.yml'))) as linter:
+        expected = {work: statuses(linter.lint(work)),
+                    plain: statuses(linter.lint(plain))}
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            futures = {executor.submit(linter.lint, directory): directory
+                       for directory in [work, plain] * 4}
+            for future, directory in futures.items():
+                assert statuses(future.result()) == expected[directory]
+
+def test_missing_rules_file(tmpdir):
+    with pytest.raises(OSError):
+        Linter(str(tmpdir.join('missing.yml')))
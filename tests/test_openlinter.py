@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+""" Automated tests for openlinter.openlinter using pytest. Run from the
+openlinter root directory with
+
+$ pytest tests/test_openlinter.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+# Modules that are slow to import and only needed by some checks;
+# importing them up front would add over 100ms to every run
+SLOW_MODULES = ('git', 'pygments.lexers', 'yaml')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_python(*args):
+    return subprocess.run([sys.executable] + list(args), cwd=ROOT,
+                          check=True, stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE, universal_newlines=True)
+
+
+def import_times(stderr):
+    # Maps each module to its cumulative import time in microseconds
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def loaded_modules(code):
+    output = run_python('-c', code + '\nimport json, sys\n'
+                        'print(json.dumps(sorted(sys.modules)))').stdout
+    return set(json.loads(output.splitlines()[-1]))
+
+
+# Tests for the linter's startup time
+
+def test_import_leaves_out_slow_modules():
+    modules = loaded_modules('import openlinter.openlinter')
+    assert 'openlinter.openlinter' in modules
+    assert not set(SLOW_MODULES) & modules
+
+
+def test_import_skips_slow_modules():
+    times = import_times(run_python(
+        '-X', 'importtime', '-m', 'openlinter.openlinter', '--version').stderr)
+    for module in SLOW_MODULES:
+        assert module not in times
+
+
+@pytest.mark.parametrize('rule_set, expected', [
+    ({'files_exist': [{'readme': ['README']}]}, set()),
+    ({'files_exist': [{'readme': ['README']}], 'code_exists': True},
+     {'pygments.lexers'}),
+    ({'version_control': ['multiple_git_commits']}, {'git'}),
+])
+def test_rules_import_what_they_need(tmpdir, rule_set, expected):
+    tmpdir.join('README').write('about\n')
+    tmpdir.join('main.c').write('int main(void) { return 0; }\n')
+    subprocess.check_call(['git', 'init', '-q', str(tmpdir)])
+    subprocess.check_call(['git', '-c', 'user.name=Test', '-c',
+                           'user.email=test@example.com', 'commit', '-q',
+                           '--allow-empty', '-m', 'initial'], cwd=str(tmpdir))
+    modules = loaded_modules(
+        'from openlinter.openlinter import lint_directory\n'
+        'lint_directory({!r}, {!r}, report=lambda result: None)'.format(
+            str(tmpdir), rule_set))
+    assert set(SLOW_MODULES) & modules == expected
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+""" Automated tests for openlinter.plan using pytest. Run from the
+openlinter root directory with
+
+$ pytest tests/test_plan.py
+"""
+
+import os
+
+import git
+import pytest
+
+import openlinter.openlinter as linter
+from openlinter.plan import *
+
+RULES = '''files_exist:
+- readme:
+  - README
+- license:
+  - LICENSE
+  - COPYING
+code_exists: True
+version_control:
+- signed_commits
+signed_commits:
+  since: 2017-01-31
+'''
+
+
+# Tests for openlinter.plan.NameMatcher
+
+@pytest.mark.parametrize('filename, expected', [
+    ('README.md', {'README'}),
+    ('LICENSE-MIT', {'LICENSE', 'LICENSE-MIT', 'SE'}),
+    ('COPYING.LESSER', {'COPY', 'COPYING', 'SE'}),
+    ('license', set()),
+    ('NOTES', set()),
+])
+def test_name_matcher(filename, expected):
+    matcher = NameMatcher(['README', 'LICENSE', 'LICENSE-MIT', 'SE',
+                           'COPYING', 'COPY'])
+    assert matcher.match(filename) == expected
+
+def test_name_matcher_no_names():
+    assert NameMatcher([]).match('README') == set()
+
+
+# Tests for openlinter.plan.RulePlan
+
+def test_plan_checks_and_inputs():
+    plan = compile_plan({'files_exist': [{'readme': ['README', 'README']},
+                                         {'license': ['LICENSE']}],
+                         'version_control': ['detect_vcs']})
+    assert plan.checks == ('files_exist', 'version_control')
+    assert plan.inputs == {'root', 'refs'}
+    assert plan.file_rules == [('readme', ['README', 'README']),
+                               ('license', ['LICENSE'])]
+    assert plan.file_names == ('README', 'LICENSE')
+    assert plan.needs_index
+
+@pytest.mark.parametrize('secrets, inputs', [
+    (True, ('tree',)),
+    ({'scan_history': True}, ('tree', 'refs')),
+])
+def test_plan_secrets_inputs(secrets, inputs):
+    assert compile_plan({'secrets': secrets}).inputs_for('secrets') == inputs
+
+def test_plan_leaves_out_sections_set_to_false():
+    plan = compile_plan({'secrets': False, 'code_exists': True})
+    assert plan.checks == ('code_exists',)
+
+def test_plan_without_file_checks():
+    plan = compile_plan({'version_control': ['detect_vcs']})
+    assert not plan.needs_index
+
+def test_plan_round_trip():
+    plan = compile_plan({'files_exist': [{'readme': ['README']}],
+                         'secrets': {'scan_history': True}})
+    loaded = RulePlan.from_dict(plan.to_dict())
+    assert (loaded.checks, loaded.inputs, loaded.file_rules,
+            loaded.file_names) == (plan.checks, plan.inputs,
+                                   plan.file_rules, plan.file_names)
+
+
+# Tests for openlinter.plan.load_plan()
+
+def test_load_plan_without_cache(tmpdir):
+    path = tmpdir.join('rules.yml')
+    path.write(RULES)
+    plan = load_plan(str(path))
+    assert plan.checks == ('files_exist', 'code_exists', 'version_control')
+    # Dates are read as strings, as they are from a cached plan
+    assert plan.rule_set['signed_commits'] == {'since': '2017-01-31'}
+    assert not tmpdir.join('plans').exists()
+
+def test_load_plan_cached(tmpdir, monkeypatch):
+    import yaml
+    path = tmpdir.join('rules.yml')
+    path.write(RULES)
+    first = load_plan(str(path), str(tmpdir))
+    assert len(tmpdir.join(PLAN_DIRNAME).listdir()) == 1
+    monkeypatch.setattr(yaml, 'safe_load', None)
+    second = load_plan(str(path), str(tmpdir))
+    assert second.rule_set == first.rule_set
+    assert second.file_names == ('README', 'LICENSE', 'COPYING')
+
+def test_load_plan_changed_file(tmpdir):
+    path = tmpdir.join('rules.yml')
+    path.write(RULES)
+    load_plan(str(path), str(tmpdir))
+    path.write(RULES + 'inclusive_language: True\n')
+    plan = load_plan(str(path), str(tmpdir))
+    assert 'inclusive_language' in plan.checks
+    assert len(tmpdir.join(PLAN_DIRNAME).listdir()) == 2
+
+@pytest.mark.parametrize('keyring, expected', [
+    ('keys.gpg', os.path.join('{config}', 'keys.gpg')),
+    (os.path.join('..', 'keys.gpg'), os.path.join('{config}', '..',
+                                                  'keys.gpg')),
+    ('/etc/keys.gpg', '/etc/keys.gpg'),
+])
+def test_load_plan_keyring_relative_to_file(tmpdir, monkeypatch, keyring,
+                                            expected):
+    monkeypatch.chdir(str(tmpdir.mkdir('elsewhere')))
+    for name in ('first', 'second'):
+        config = tmpdir.mkdir(name)
+        path = config.join('rules.yml')
+        path.write(RULES + '  keyring: {}\n'.format(keyring))
+        # The second file loads the plan cached for the first
+        plan = load_plan(str(path), str(tmpdir))
+        assert plan.rule_set['signed_commits']['keyring'] == \
+            expected.format(config=str(config))
+
+
+# Tests for openlinter.openlinter.lint_directory() following the plan
+
+def test_lint_skips_unneeded_index(tmpdir, monkeypatch):
+    repo = git.Repo.init(str(tmpdir), bare=True)
+    def fail(*args, **kwargs):
+        raise AssertionError('the file tree was read')
+    monkeypatch.setattr(linter, 'GitTreeIndex', fail)
+    results = []
+    linter.lint_directory(str(tmpdir), {'version_control': ['detect_vcs']},
+                          report=results.append)
+    assert [result.detail for result in results] == [
+        'version control using git']
+
+def test_lint_with_secrets_false_runs_nothing(tmpdir):
+    tmpdir.join('settings.py').write("password = 'hunter2hunter2'\n")
+    results = []
+    linter.lint_directory(str(tmpdir), {'secrets': False},
+                          report=results.append)
+    assert results == []
+
+def test_lint_with_inclusive_language_false_runs_nothing(tmpdir):
+    tmpdir.join('hosts.py').write('# the whitelist of hosts\n')
+    results = []
+    linter.lint_directory(str(tmpdir), {'inclusive_language': False},
+                          report=results.append)
+    assert results == []
+
+def test_lint_with_signed_commits_false_runs_nothing(tmpdir):
+    git.Repo.init(str(tmpdir))
+    results = []
+    linter.lint_directory(str(tmpdir),
+                          {'version_control': ['detect_vcs', 'signed_commits'],
+                           'signed_commits': False},
+                          report=results.append)
+    assert [result.detail for result in results] == [
+        'version control using git']
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+""" Automated tests for openlinter.remote using pytest. Run from the
+openlinter root directory with
+
+$ pytest tests/test_remote.py
+"""
+
+import os
+
+import git
+import pytest
+
+from openlinter.openlinter import lint_directory
+from openlinter.remote import *
+from openlinter.results import FAIL, PASS
+
+
+# Test fixtures
+
+@pytest.fixture()
+def setup_remote(tmpdir):
+    # A bare repository that serves partial clones, and its URL
+    work = git.Repo.init(str(tmpdir.join('work')))
+    for name, text in [('README', 'Read me.\n'), ('main.c', 'int x;\n'),
+                       ('data.csv', 'a,b\n1,2\n')]:
+        tmpdir.join('work', name).write(text)
+        work.index.add([str(tmpdir.join('work', name))])
+        work.index.commit('add {}'.format(name))
+    bare = work.clone(str(tmpdir.join('origin.git')), bare=True)
+    with bare.config_writer() as config:
+        config.set_value('uploadpack', 'allowFilter', 'true')
+    return work, 'file://' + bare.git_dir
+
+
+def missing_blobs(path):
+    output = git.Git(path).rev_list('--objects', '--all', '--missing=print')
+    return set(line[1:] for line in output.splitlines()
+               if line.startswith('?'))
+
+
+# Tests for openlinter.remote.is_remote()
+
+@pytest.mark.parametrize('repository, expected', [
+    ('https://github.com/OpenNewsLabs/open-project-linter', True),
+    ('file:///srv/git/project.git', True),
+    ('git@github.com:OpenNewsLabs/open-project-linter.git', True),
+    ('/home/me/project', False),
+    ('project', False),
+    ('C:\\Users\\me\\project', False),
+])
+def test_is_remote(repository, expected):
+    assert is_remote(repository) == expected
+
+
+# Tests for openlinter.remote.mirror_path()
+
+def test_mirror_path_names_each_url():
+    path = mirror_path('https://example.com/team/project.git', 'mirrors')
+    assert os.path.dirname(path) == 'mirrors'
+    assert os.path.basename(path).startswith('project-')
+    assert path != mirror_path('https://example.org/team/project.git',
+                               'mirrors')
+
+
+# Tests for openlinter.remote.clone()
+
+def test_clone_has_no_blobs(setup_remote):
+    work, url = setup_remote
+    with clone(url) as path:
+        assert len(missing_blobs(path)) == 3
+        # Blobs are fetched when they are read
+        assert git.Git(path).show('HEAD:README') == 'Read me.'
+        assert len(missing_blobs(path)) == 2
+    assert not os.path.exists(path)
+
+def test_clone_shallow(setup_remote):
+    work, url = setup_remote
+    with clone(url, depth=1) as path:
+        assert git.Git(path).rev_list('--count', 'HEAD') == '1'
+
+def test_clone_updates_mirror(setup_remote, tmpdir):
+    work, url = setup_remote
+    mirrors = str(tmpdir.join('mirrors'))
+    with clone(url, mirrors) as path:
+        first = git.Repo(path).head.commit.hexsha
+    work.index.commit('another commit')
+    work.git.push(url, 'HEAD')
+    with clone(url, mirrors) as second_path:
+        assert second_path == path
+        assert git.Repo(path).head.commit.hexsha == work.head.commit.hexsha
+        assert git.Repo(path).head.commit.parents[0].hexsha == first
+    assert os.path.isdir(path)
+
+
+# Tests for openlinter.openlinter.lint_directory() with a URL
+
+def test_lint_url_fetches_only_what_rules_read(setup_remote, tmpdir):
+    work, url = setup_remote
+    mirrors = str(tmpdir.join('mirrors'))
+    results = []
+    lint_directory(url, {'files_exist': [{'readme': ['README']},
+                                         {'license': ['LICENSE']}]},
+                   report=results.append, mirrors=mirrors)
+    assert [(r.directory, r.status, r.detail) for r in results] == [
+        (url, PASS, 'README exists and has content'),
+        (url, FAIL, 'LICENSE not found in {}'.format(url))]
+    path = mirror_path(url, mirrors)
+    tree = git.Repo(path).head.commit.tree
+    assert missing_blobs(path) == {tree['main.c'].hexsha,
+                                   tree['data.csv'].hexsha}
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+""" Automated tests for openlinter.results using pytest. Run from the
+openlinter root directory with
+
+$ pytest tests/test_results.py
+"""
+
+import io
+import json
+
+import pytest
+
+from openlinter.openlinter import lint_directory
+from openlinter.results import *
+
+
+RULE_SET = {
+    'files_exist': [{'readme': ['README']}],
+    'code_exists': True,
+    'version_control': ['detect_vcs', 'detect_git_branches'],
+}
+
+
+# Tests for openlinter.results.Result
+
+def test_result_text_format():
+    assert str(Result('code_exists', PASS, 'code files detected')) == \
+        '  code files detected'
+    assert str(Result('code_exists', FAIL, 'no code files found')) == \
+        '! no code files found'
+
+def test_result_dict_round_trip():
+    result = Result('files_exist.readme', PASS, 'README exists', 0.5, 'repo')
+    copy = Result.from_dict(json.loads(json.dumps(result.to_dict())))
+    assert copy.to_dict() == result.to_dict()
+    assert copy.passed
+
+
+# Tests for the reporters
+
+def test_text_reporter_matches_print():
+    stream = io.StringIO()
+    reporter = get_reporter('text', stream)
+    reporter.begin('repo')
+    reporter.report(Result('detect_vcs', FAIL,
+                           'version control system not detected'))
+    assert stream.getvalue() == \
+        'repo\n! version control system not detected\n'
+
+def test_json_reporter_streams_each_result(tmpdir):
+    tmpdir.join('README').write('Read me.\n')
+    stream = io.StringIO()
+    lines = []
+    reporter = get_reporter('json', stream)
+    def report(result):
+        reporter.report(result)
+        # Each result is written out as soon as it is reported
+        lines.append(stream.getvalue().splitlines()[-1])
+    lint_directory(str(tmpdir), RULE_SET, report=report)
+    results = [json.loads(line) for line in lines]
+    assert [r['rule_id'] for r in results] == [
+        'files_exist.readme', 'code_exists', 'detect_vcs',
+        'detect_git_branches']
+    assert [r['status'] for r in results] == [PASS, FAIL, FAIL, SKIP]
+    assert all(r['directory'] == str(tmpdir) for r in results)
+    assert all(r['duration'] >= 0 for r in results)
+
+def test_code_check_undetermined_at_limit(tmpdir):
+    tmpdir.mkdir('docs').join('index.rst').write('Docs\n====\n')
+    tmpdir.join('notes.rst').write('Notes\n=====\n')
+    results = []
+    lint_directory(str(tmpdir), {'code_exists': True,
+                                 'code_detection': {'max_files': 1}},
+                   report=results.append)
+    assert [(r.rule_id, r.status) for r in results] == \
+        [('code_exists', UNDETERMINED)]
+    assert str(results[0]).startswith('! ')
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        get_reporter('xml')
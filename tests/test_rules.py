@@ -101,6 +101,68 @@ def test_get_file_text_file_exists_has_text():
     assert result == 'This is a file with content.\n'
 
 
+def test_get_file_text_bounded_read(tmpdir):
+    path = tmpdir.join('big.txt')
+    path.write('a' * 100000)
+    result = get_file_text(str(path), max_bytes=1000)
+    assert result == 'a' * 1000
+
+def test_get_file_text_bounded_read_cuts_multibyte_char(tmpdir):
+    path = tmpdir.join('unicode.txt')
+    path.write_binary(u'\u00e9\u00e9'.encode('utf-8'))
+    assert get_file_text(str(path), max_bytes=3) == u'\u00e9'
+
+def test_get_file_text_bounded_read_binary():
+    result = get_file_text('tests/fixtures/pic-folder/kitten_pic.jpg',
+                           max_bytes=1000)
+    assert result is None
+
+
+# Tests for openlinter.rules.looks_binary()
+
+def test_looks_binary_nul_byte():
+    assert looks_binary(b'text\0more text') is True
+
+def test_looks_binary_magic_number():
+    assert looks_binary(b'\x89PNG\r\n\x1a\n') is True
+
+def test_looks_binary_text():
+    assert looks_binary(b'#!/usr/bin/env python\n') is False
+
+
+# Tests for openlinter.rules.guess_lexer_name()
+
+def test_guess_lexer_name_unambiguous_name_not_read():
+    # The file doesn't exist, so it can't have been read
+    assert guess_lexer_name('zzyzx/main.py') == 'Python'
+
+def test_guess_lexer_name_no_lexer_not_read():
+    assert guess_lexer_name('zzyzx/data.csv') is None
+
+def test_guess_lexer_name_ambiguous_name_uses_text(tmpdir):
+    path = tmpdir.join('main.h')
+    path.write('@interface Foo : NSObject\n@end\n')
+    assert guess_lexer_name(str(path)) == 'Objective-C'
+
+def test_guess_lexer_name_binary_with_ambiguous_name(tmpdir):
+    path = tmpdir.join('main.h')
+    path.write_binary(b'\x7fELF\x02\x01\x01' + b'\0' * 100)
+    assert guess_lexer_name(str(path)) is None
+
+
+# Tests for openlinter.rules.candidate_lexer_names()
+
+def test_candidate_lexer_names():
+    assert candidate_lexer_names('main.py') == ('Python',)
+    assert set(candidate_lexer_names('main.h')) == {'C', 'Objective-C'}
+    assert candidate_lexer_names('data.csv') == ()
+
+def test_candidate_lexer_names_include_alias_filenames():
+    # HTML+Django/Jinja only lists *.html among its alias_filenames
+    names = candidate_lexer_names('index.html')
+    assert 'HTML' in names and 'HTML+Django/Jinja' in names
+
+
 # Tests for openlinter.rules.detect_version_control()
 
 def test_detect_version_control_repository_exists(setup_empty_repo, tmpdir):
@@ -157,6 +219,18 @@ def test_check_for_develop_branch_repo_has_dev_branch(setup_repo_two_br_two_comm
     assert result == True
 
 
+# Tests for openlinter.rules.find_develop_branches()
+
+def test_find_develop_branches_in_config_order(setup_repo_two_br_two_commits, tmpdir):
+    repo = git.Repo(str(tmpdir))
+    repo.create_head('feature-login')
+    result = find_develop_branches(str(tmpdir), ['feature', 'dev', 'release'])
+    assert result == ['feature', 'dev']
+
+def test_find_develop_branches_none_found(setup_repo_one_br_one_commit, tmpdir):
+    assert find_develop_branches(str(tmpdir), ['develop', 'feature']) == []
+
+
 # Tests for openlinter.rules.check_for_multiple_commits()
 
 def test_check_for_multiple_commits_nonexistent_folder():
@@ -178,3 +252,169 @@ def test_check_for_multiple_commits_one_commit(setup_repo_one_br_one_commit, tmp
 def test_check_for_multiple_commits_two_commits(setup_repo_two_br_two_commits, tmpdir):
     result = check_for_multiple_commits(str(tmpdir))
     assert result == True
+
+
+# Tests for sharing one openlinter.fsindex.FileIndex between rules
+
+def test_file_rules_share_index():
+    index = FileIndex('tests/fixtures')
+    assert check_file_presence('file_with_text.txt', 'tests/fixtures',
+                               index) == True
+    assert check_file_presence('empty_file.txt', 'tests/fixtures',
+                               index) == None
+    assert check_for_code('tests/fixtures', index) == True
+    assert check_for_file_content('tests/fixtures/empty_file.txt',
+                                  index) is False
+
+
+# Tests for openlinter.rules.check_for_code() with a ClassificationCache
+
+def test_check_for_code_cache_skips_classification(tmpdir, monkeypatch):
+    from openlinter.cache import ClassificationCache
+    code_dir = tmpdir.mkdir('code')
+    code_dir.join('main.h').write('int main(void);\n')
+    cache = ClassificationCache(str(tmpdir.join('cache.db')))
+    assert check_for_code(str(code_dir), cache=cache) == True
+    def fail(*args):
+        raise AssertionError('classified a cached file')
+    monkeypatch.setattr('openlinter.rules.guess_entry_lexer_name', fail)
+    assert check_for_code(str(code_dir), cache=cache) == True
+
+def test_check_for_code_cache_misses_with_other_limits(tmpdir):
+    from openlinter.cache import ClassificationCache
+    code_dir = tmpdir.mkdir('code')
+    code_dir.join('main.h').write('int main(void);\n')
+    cache = ClassificationCache(str(tmpdir.join('cache.db')))
+    assert check_for_code(str(code_dir), cache=cache) == True
+    misses = cache.misses
+    options = {'max_read_bytes': 1024}
+    assert check_for_code(str(code_dir), cache=cache, options=options) == True
+    assert cache.misses == misses + 1
+    assert check_for_code(str(code_dir), cache=cache, options=options) == True
+    assert cache.misses == misses + 1
+
+
+# Tests for openlinter.rules.check_for_code() search order and limits
+
+@pytest.fixture()
+def setup_data_heavy_repo(tmpdir):
+    data = tmpdir.mkdir('data')
+    for i in range(50):
+        data.join('table{}.h'.format(i)).write('int x;\n')
+    docs = tmpdir.mkdir('docs')
+    for i in range(50):
+        docs.join('page{}.md'.format(i)).write('# Page\n')
+    tmpdir.join('README.md').write('# Project\n')
+    tmpdir.mkdir('src').join('main.py').write('print("hi")\n')
+    return str(tmpdir)
+
+def test_check_for_code_looks_in_source_first(setup_data_heavy_repo,
+                                              monkeypatch):
+    import openlinter.rules
+    seen = []
+    real_candidates = openlinter.rules.candidate_lexer_names
+    def candidates(filename):
+        seen.append(filename)
+        return real_candidates(filename)
+    monkeypatch.setattr('openlinter.rules.candidate_lexer_names',
+                        candidates)
+    assert check_for_code(setup_data_heavy_repo) == True
+    assert seen[0] == 'main.py'
+
+def test_check_for_code_undetermined_at_file_limit(tmpdir):
+    docs = tmpdir.mkdir('docs')
+    for i in range(5):
+        docs.join('page{}.rst'.format(i)).write('Page\n====\n')
+    assert check_for_code(str(tmpdir), options={'max_files': 3}) is None
+    assert check_for_code(str(tmpdir), options={'max_files': 5}) == False
+
+def test_check_for_code_undetermined_at_byte_limit(tmpdir):
+    # Binary files whose names fit several lexers are read, but not code
+    for i in range(5):
+        tmpdir.join('table{}.h'.format(i)).write_binary(b'\0' * 100)
+    assert check_for_code(str(tmpdir), options={'max_bytes': 250}) is None
+    assert check_for_code(str(tmpdir), options={'max_bytes': 500}) == False
+
+def test_check_for_code_undetermined_at_time_limit(setup_data_heavy_repo):
+    assert check_for_code(setup_data_heavy_repo,
+                          options={'max_seconds': 0}) is None
+
+
+# Tests for openlinter.rules.check_for_secrets()
+
+def test_check_for_secrets_reports_path_and_line(tmpdir):
+    tmpdir.mkdir('config').join('settings.py').write(
+        'DEBUG = False\nDB_PASSWORD = "correcthorse"\n')
+    tmpdir.join('README').write('No secrets here.\n')
+    findings = check_for_secrets(str(tmpdir))
+    assert [(f.path, f.line, f.kind) for f in findings] == [
+        (os.path.join('config', 'settings.py'), 2, 'password assignment')]
+
+def test_check_for_secrets_history_skips_current_files(tmpdir):
+    repo = git.Repo.init(str(tmpdir))
+    path = str(tmpdir.join('settings.py'))
+    for content in ['DB_PASSWORD = "correcthorse"\n', 'DB_PASSWORD = None\n',
+                    'DB_PASSWORD = "batterystaple"\n']:
+        with open(path, 'w') as f:
+            f.write(content)
+        repo.index.add([path])
+        repo.index.commit('change password')
+    old_sha = repo.head.commit.parents[0].parents[0].tree['settings.py'].hexsha
+    findings = check_for_secrets(str(tmpdir), index=GitTreeIndex(str(tmpdir)),
+                                 options={'scan_history': True})
+    assert [(f.path, f.sha) for f in findings] == [
+        ('settings.py', None), ('settings.py', old_sha)]
+
+
+# Tests for openlinter.rules.check_for_flagged_terms()
+
+def test_check_for_flagged_terms_skips_code_names(tmpdir):
+    tmpdir.join('hosts.py').write(
+        'whitelist = []\n'
+        '# Hosts on the whitelist\n'
+        'def allowed(host):\n'
+        '    return host in whitelist  # master copy\n')
+    tmpdir.join('NOTES').write('Update the master list.\n')
+    findings = check_for_flagged_terms(
+        str(tmpdir), {'whitelist': 'allowlist', 'master': None})
+    assert sorted((f.path, f.line, f.term, f.suggestion)
+                  for f in findings) == [
+        ('NOTES', 1, 'master', None),
+        ('hosts.py', 2, 'whitelist', 'allowlist'),
+        ('hosts.py', 4, 'master', None)]
+
+def test_check_for_flagged_terms_skips_big_files(tmpdir):
+    tmpdir.join('NOTES').write('Update the master list.\n' * 10)
+    assert check_for_flagged_terms(str(tmpdir), {'master': 'main'},
+                                   options={'max_file_bytes': 100}) == []
+
+
+# Tests for openlinter.rules.check_for_signed_commits()
+
+def test_check_for_signed_commits_nonexistent_repo():
+    with pytest.raises(git.InvalidGitRepositoryError):
+        check_for_signed_commits('tests/fixtures/pic-folder')
+
+def test_check_for_signed_commits_no_commits(setup_empty_repo, tmpdir):
+    assert check_for_signed_commits(str(tmpdir)) == []
+
+def test_check_for_signed_commits_shared_commits(setup_repo_two_br_two_commits,
+                                                 tmpdir):
+    # Both commits are on master and develop, but each is checked once
+    commits = check_for_signed_commits(str(tmpdir))
+    assert [commit.signed for commit in commits] == [False, False]
+    commits = check_for_signed_commits(str(tmpdir), {'max_commits': 1})
+    assert len(commits) == 1
+
+
+# Tests for openlinter.rules.check_files_presence()
+
+def test_check_files_presence_matches_check_file_presence(tmpdir):
+    tmpdir.join('README.md').write('Read me.\n')
+    tmpdir.join('LICENSE').write('')
+    tmpdir.join('LICENSE.txt').write('MIT\n')
+    tmpdir.mkdir('CONTRIBUTING')
+    keywords = ['README', 'LICENSE', 'COPYING', 'CONTRIBUTING', 'READ']
+    found = check_files_presence(keywords, str(tmpdir))
+    assert found == {keyword: check_file_presence(keyword, str(tmpdir))
+                     for keyword in keywords}
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+""" Automated tests for openlinter.scheduler using pytest. Run from the
+openlinter root directory with
+
+$ pytest tests/test_scheduler.py
+"""
+
+import threading
+import time
+
+import git
+import pytest
+
+from openlinter.openlinter import lint_directory
+from openlinter.scheduler import *
+
+
+def emit(*values, report):
+    for value in values:
+        report(value)
+    return values[-1]
+
+
+# Tests for openlinter.scheduler.run_tasks()
+
+def test_output_in_task_order():
+    def slow(report):
+        time.sleep(0.05)
+        report('slow')
+    output = []
+    run_tasks([Task('slow', slow), Task('fast', emit, 'fast')],
+              output.append)
+    assert output == ['slow', 'fast']
+
+def test_independent_tasks_run_concurrently():
+    # Each task waits for the other, so they only finish if run together
+    barrier = threading.Barrier(2, timeout=5)
+    def meet(name, report):
+        barrier.wait()
+        report(name)
+    output = []
+    run_tasks([Task('a', meet, 'a'), Task('b', meet, 'b')], output.append)
+    assert output == ['a', 'b']
+
+def test_output_is_reported_as_soon_as_ready():
+    reported = threading.Event()
+    def report(result):
+        if result == 'first':
+            reported.set()
+    def second(report):
+        assert reported.wait(5)
+    run_tasks([Task('first', emit, 'first'), Task('second', second)],
+              report)
+
+def test_dependencies_get_values():
+    output = []
+    values = run_tasks([Task('vcs', emit, 'git'),
+                        Task('branches', emit, 'branches',
+                             depends=['vcs'])],
+                       output.append)
+    # The dependency's value comes before the task's own args
+    assert output == ['git', 'git', 'branches']
+    assert values == {'vcs': 'git', 'branches': 'branches'}
+
+def test_after_orders_without_values():
+    finished = []
+    def slow(report):
+        time.sleep(0.05)
+        finished.append('slow')
+    def check(report):
+        report(list(finished))
+    output = []
+    run_tasks([Task('slow', slow), Task('check', check, after=['slow'])],
+              output.append)
+    assert output == [['slow']]
+
+def test_one_thread_runs_in_order():
+    started = []
+    def record(name, report):
+        started.append((name, threading.current_thread()))
+    run_tasks([Task('a', record, 'a'), Task('b', record, 'b')],
+              threads=1)
+    assert [name for name, _ in started] == ['a', 'b']
+    assert all(thread is threading.current_thread()
+               for _, thread in started)
+
+def test_error_is_raised_after_earlier_output():
+    def broken(report):
+        report('partial')
+        raise RuntimeError('broken')
+    output = []
+    with pytest.raises(RuntimeError):
+        run_tasks([Task('ok', emit, 'ok'), Task('broken', broken),
+                   Task('after', emit, 'after', depends=['broken'])],
+                  output.append)
+    assert output == ['ok', 'partial']
+
+def test_error_is_reported_with_the_task_that_failed():
+    # 'waits' is never started, since 'broken' fails while 'slow' runs
+    def slow(report):
+        time.sleep(0.1)
+        report('slow')
+    def broken(report):
+        report('partial')
+        raise RuntimeError('broken')
+    output = []
+    with pytest.raises(RuntimeError):
+        run_tasks([Task('slow', slow),
+                   Task('waits', emit, 'waits', depends=['slow']),
+                   Task('broken', broken)],
+                  output.append)
+    assert output == ['slow', 'partial']
+
+def test_dependency_must_come_first():
+    with pytest.raises(ValueError):
+        run_tasks([Task('a', emit, 'a', depends=['b']), Task('b', emit, 'b')])
+
+
+# Tests for the scheduled checks in openlinter.lint_directory()
+
+def test_lint_directory_concurrent_matches_sequential(tmpdir):
+    repo = git.Repo.init(str(tmpdir))
+    tmpdir.join('README').write('Read me.\n')
+    repo.index.add(['README'])
+    repo.index.commit('initial commit')
+    rule_set = {'files_exist': [{'readme': ['README']}],
+                'code_exists': True,
+                'version_control': ['detect_vcs', 'detect_git_branches',
+                                    'multiple_git_commits'],
+                'dev_branch_names': ['develop']}
+    outputs = []
+    for threads in (1, None):
+        output = []
+        lint_directory(str(tmpdir), rule_set, report=output.append,
+                       threads=threads)
+        outputs.append([str(result) for result in output])
+    assert outputs[0] == outputs[1]
+    assert len(outputs[0]) == 6
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+""" Automated tests for openlinter.server using pytest. Run from the
+openlinter root directory with
+
+$ pytest tests/test_server.py
+"""
+
+import http.client
+import json
+import socket
+import threading
+import time
+
+import git
+import pytest
+
+from openlinter.server import *
+from openlinter.watch import watch_supported
+
+RULES = '''files_exist:
+- readme:
+  - README
+code_exists: True
+version_control:
+- detect_vcs
+- detect_git_branches
+dev_branch_names:
+- develop
+'''
+
+
+# Test fixtures
+
+@pytest.fixture()
+def setup_repo(tmpdir):
+    work = tmpdir.mkdir('work')
+    repo = git.Repo.init(str(work))
+    work.join('README').write('Read me.\n')
+    work.join('main.c').write('int main(void) { return 0; }\n')
+    repo.index.add([str(work.join('README')), str(work.join('main.c'))])
+    repo.index.commit('initial commit')
+    tmpdir.join('rules.yml').write(RULES)
+    return repo
+
+@pytest.fixture()
+def setup_server(setup_repo, tmpdir):
+    linter = LintServer(str(tmpdir.join('rules.yml')))
+    server = make_server(linter, port=0)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield server, setup_repo.working_tree_dir
+    server.shutdown()
+    server.server_close()
+    thread.join()
+    linter.close()
+
+
+def post(server, body):
+    host, port = server.server_address[:2]
+    connection = http.client.HTTPConnection(host, port)
+    try:
+        connection.request('POST', '/lint', json.dumps(body))
+        response = connection.getresponse()
+        lines = response.read().decode('utf-8').splitlines()
+        return response.status, [json.loads(line) for line in lines]
+    finally:
+        connection.close()
+
+
+def summary(results):
+    return [(r['rule_id'], r['status'], r['detail']) for r in results]
+
+
+# Tests for openlinter.server.make_server() and the /lint endpoint
+
+def test_lint_request(setup_server):
+    server, directory = setup_server
+    status, results = post(server, {'directory': directory})
+    assert status == 200
+    assert summary(results) == [
+        ('files_exist.readme', 'pass', 'README exists and has content'),
+        ('code_exists', 'pass', 'code files detected'),
+        ('detect_vcs', 'pass', 'version control using git'),
+        ('detect_git_branches', 'fail', 'fewer than 2 git branches found'),
+        ('dev_branch_names', 'fail', 'no development branch found')]
+    assert all(r['directory'] == directory for r in results)
+
+def test_repeat_request_replays_results(setup_server):
+    server, directory = setup_server
+    first = post(server, {'directory': directory})[1]
+    second = post(server, {'directory': directory})[1]
+    assert summary(second) == summary(first)
+    # Everything but detecting git, which the git checks need, is replayed
+    assert all(r['duration'] == 0.0 for r in second
+               if r['rule_id'] != 'detect_vcs')
+
+def test_new_branch_is_seen(setup_server, setup_repo):
+    server, directory = setup_server
+    post(server, {'directory': directory})
+    setup_repo.create_head('develop')
+    results = post(server, {'directory': directory})[1]
+    assert ('dev_branch_names', 'pass',
+            'development branch "develop" found') in summary(results)
+
+def test_concurrent_requests(setup_server):
+    server, directory = setup_server
+    expected = summary(post(server, {'directory': directory})[1])
+    found = []
+    threads = [threading.Thread(target=lambda: found.append(
+        summary(post(server, {'directory': directory})[1])))
+        for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert found == [expected] * 4
+
+@pytest.mark.parametrize('body, status', [
+    ({'dir': 'x'}, 400),
+    ({'directory': 'x', 'rules': 'no-such-rules.yml'}, 400),
+])
+def test_bad_request(setup_server, body, status):
+    server, directory = setup_server
+    assert post(server, body)[0] == status
+
+def test_missing_directory_is_an_error_result(setup_server, tmpdir):
+    server, directory = setup_server
+    missing = str(tmpdir.join('missing'))
+    status, results = post(server, {'directory': missing})
+    assert status == 200
+    assert [r['status'] for r in results][-1] == 'error'
+
+def test_unix_socket(setup_repo, tmpdir):
+    path = str(tmpdir.join('lint.sock'))
+    with LintServer(str(tmpdir.join('rules.yml'))) as linter:
+        server = make_server(linter, socket_path=path)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            body = json.dumps({'directory': setup_repo.working_tree_dir})
+            client = socket.socket(socket.AF_UNIX)
+            client.connect(path)
+            client.sendall('POST /lint HTTP/1.0\r\nContent-Length: {}\r\n\r\n'
+                           '{}'.format(len(body), body).encode('utf-8'))
+            response = b''
+            while True:
+                data = client.recv(4096)
+                if not data:
+                    break
+                response += data
+            client.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+    assert response.startswith(b'HTTP/1.0 200')
+    assert b'README exists and has content' in response
+    assert not tmpdir.join('lint.sock').exists()
+
+
+# Tests for openlinter.server.LintServer
+
+def test_rule_set_read_again_when_changed(setup_repo, tmpdir):
+    path = tmpdir.join('rules.yml')
+    with LintServer(str(path)) as linter:
+        first = linter.rule_set()
+        assert linter.rule_set() is first
+        path.write(RULES + 'use_gitignore: False\n')
+        assert linter.rule_set()['use_gitignore'] is False
+
+@pytest.mark.skipif(not watch_supported(), reason='needs inotify')
+def test_watch_reruns_checks_after_edit(setup_repo, tmpdir):
+    directory = setup_repo.working_tree_dir
+    with LintServer(str(tmpdir.join('rules.yml')), watch=True) as linter:
+        linter.lint(directory, report=lambda result: None)
+        linter.lint(directory, report=lambda result: None)
+        assert linter.state.misses == 3
+        # An unstaged edit doesn't change the git index or refs
+        tmpdir.join('work', 'main.c').write('int x;\n')
+        deadline = time.time() + 5
+        while linter.state.misses == 3 and time.time() < deadline:
+            linter.lint(directory, report=lambda result: None)
+            time.sleep(0.05)
+        assert linter.state.misses > 3
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+""" Automated tests for openlinter.signatures using pytest. Run from the
+openlinter root directory with
+
+$ pytest tests/test_signatures.py
+"""
+
+import shutil
+
+import git
+import pytest
+
+from openlinter.gitrepo import GitContext
+from openlinter.signatures import *
+
+# The public key of the key that made SIGNATURE, exported by gpg
+KEYRING = 'tests/fixtures/trusted-keys.gpg'
+
+EMPTY_TREE = '4b825dc642cb6eb9a060e54bf8d69288fbee4904'
+
+PAYLOAD = ('tree {}\n'
+           'author Test Signer <signer@example.com> 1500000000 +0000\n'
+           'committer Test Signer <signer@example.com> 1500000000 +0000\n'
+           '\n'
+           'Signed commit\n').format(EMPTY_TREE)
+
+SIGNATURE = '''-----BEGIN PGP SIGNATURE-----
+
+iHUEABYIAB0WIQS0Qk01Mo5mIyZzvRptE+JyuHsr1wUCatSyTwAKCRBtE+JyuHsr
+11+/AP9ISNjMvE0/OrlFAE+nmgwxLsTjDPGySmhrx2kcISWeoAEA2/qs2BUKgs9h
+8iFJ6DAXjytAgk4Aqx/pS8sLEjtsZgw=
+=SIW5
+-----END PGP SIGNATURE-----
+'''
+
+
+def with_signature(payload, signature, header='gpgsig'):
+    # A commit object with the signature as a header after the committer
+    lines = signature.rstrip('\n').split('\n')
+    headers, message = payload.split('\n\n', 1)
+    return '{}\n{} {}\n\n{}'.format(headers, header, '\n '.join(lines),
+                                    message)
+
+
+def write_commit(repo, text, branch):
+    path = repo.git_dir + '/new-commit'
+    with open(path, 'w') as f:
+        f.write(text)
+    sha = repo.git.hash_object('-t', 'commit', '-w', path)
+    repo.git.update_ref('refs/heads/' + branch, sha)
+    return sha
+
+
+# Test fixtures
+
+@pytest.fixture()
+def setup_repo(tmpdir):
+    repo = git.Repo.init(str(tmpdir))
+    repo.git.hash_object('-t', 'tree', '-w', '/dev/null')
+    return repo
+
+
+# Tests for openlinter.signatures.split_signature()
+
+def test_split_signature():
+    data = with_signature(PAYLOAD, SIGNATURE).encode()
+    assert split_signature(data) == (SIGNATURE.encode(), PAYLOAD.encode())
+
+def test_split_signature_unsigned():
+    assert split_signature(PAYLOAD.encode()) == (None, PAYLOAD.encode())
+
+
+# Tests for openlinter.signatures.check_commits()
+
+def test_check_commits_reads_each_commit_once(setup_repo):
+    repo = setup_repo
+    signed = write_commit(repo, with_signature(PAYLOAD, SIGNATURE), 'master')
+    unsigned = write_commit(
+        repo, 'tree {}\nparent {}\n{}'.format(EMPTY_TREE, signed,
+                                             PAYLOAD.split('\n', 1)[1]),
+        'feature')
+    repository = GitContext(repo.working_tree_dir)
+    try:
+        found = [(commit.sha, commit.kind)
+                 for commit in check_commits(repository)]
+    finally:
+        repository.close()
+    assert found == [(unsigned, None), (signed, 'gpg')]
+
+def test_check_commits_window(setup_repo):
+    repo = setup_repo
+    parent = None
+    shas = []
+    for n in range(5):
+        text = PAYLOAD.replace('1500000000', str(1500000000 + n * 86400))
+        if parent:
+            text = text.replace('\n', '\nparent {}\n'.format(parent), 1)
+        parent = write_commit(repo, text, 'master')
+        shas.insert(0, parent)
+    path = repo.working_tree_dir
+    assert [c.sha for c in check_commits(path, max_commits=2)] == shas[:2]
+    # One commit a day, from 2017-07-14 02:40 UTC
+    assert [c.sha for c in check_commits(
+        path, since='2017-07-15 12:00 +0000',
+        until='2017-07-17 12:00 +0000')] == shas[1:3]
+
+def test_check_commits_empty_repo(setup_repo):
+    assert list(check_commits(setup_repo.working_tree_dir)) == []
+
+@pytest.mark.skipif(shutil.which('gpgv') is None, reason='needs gpgv')
+def test_check_commits_verify(setup_repo):
+    repo = setup_repo
+    good = write_commit(repo, with_signature(PAYLOAD, SIGNATURE), 'good')
+    forged = write_commit(repo, with_signature(
+        PAYLOAD.replace('Signed', 'Forged'), SIGNATURE), 'forged')
+    found = {commit.sha: commit.verified for commit in check_commits(
+        repo.working_tree_dir, verify=True, keyring=KEYRING)}
+    assert found == {good: True, forged: False}
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+""" Automated tests for openlinter.store using pytest. Run from the
+openlinter root directory with
+
+$ pytest tests/test_store.py
+"""
+
+import json
+import sqlite3
+import sys
+
+import git
+import pytest
+
+import openlinter.openlinter as linter
+from openlinter.results import FAIL, INFO, PASS, Result
+from openlinter.store import *
+
+DAY = 86400
+
+
+def contributing(found):
+    # The results of files_exist.contributing with two names configured
+    if found:
+        return [Result('files_exist.contributing', FAIL,
+                       'CONTRIBUTING not found in repo'),
+                Result('files_exist.contributing', PASS,
+                       'contributing exists and has content')]
+    return [Result('files_exist.contributing', FAIL,
+                   'CONTRIBUTING not found in repo'),
+            Result('files_exist.contributing', FAIL,
+                   'contributing not found in repo')]
+
+
+# Test fixtures
+
+@pytest.fixture()
+def setup_store(tmpdir):
+    # Two runs over three repositories, ten days apart; b loses its
+    # CONTRIBUTING file and c gains one
+    store = ResultStore(str(tmpdir.join('results.db')))
+    for day, found in ((0, {'/a': True, '/b': True, '/c': False}),
+                       (10, {'/a': True, '/b': False, '/c': True})):
+        for repo in sorted(found):
+            store.record(repo, contributing(found[repo]) +
+                         [Result('code_exists', PASS, 'code files detected'),
+                          Result('incremental', INFO, '0 of 2 reused')],
+                         commit='{}{}'.format(repo[1], day) * 20,
+                         checked_at=day * DAY)
+    yield store
+    store.close()
+
+
+# Tests for openlinter.store.ResultStore
+
+def test_record_buffers_until_batch_size(tmpdir):
+    path = str(tmpdir.join('results.db'))
+    store = ResultStore(path, batch_size=4)
+    store.record('/a', contributing(True))
+    store.flush()
+    store.record('/b', contributing(False))
+    store.record('/c', [Result('code_exists', PASS, 'code files detected')])
+    count = 'SELECT COUNT(*) FROM results'
+    assert sqlite3.connect(path).execute(count).fetchone()[0] == 2
+    store.record('/d', [Result('code_exists', PASS, 'code files detected')])
+    assert sqlite3.connect(path).execute(count).fetchone()[0] == 6
+    store.close()
+
+def test_latest_skips_info_and_older_runs(setup_store):
+    rows = setup_store.latest(repo='/b')
+    assert [(row['rule_id'], row['status'], row['checked_at'])
+            for row in rows] == [('code_exists', PASS, 10 * DAY),
+                                 ('files_exist.contributing', FAIL, 10 * DAY),
+                                 ('files_exist.contributing', FAIL, 10 * DAY)]
+    assert rows[0]['commit_sha'] == 'b10' * 20
+
+def test_latest_failing_counts_a_later_name_passing(setup_store):
+    rows = setup_store.latest('files_exist.contributing', failing=True)
+    assert set(row['repo'] for row in rows) == {'/b'}
+
+def test_regressions_find_lost_file(setup_store):
+    rows = setup_store.regressions('files_exist.contributing', 5 * DAY)
+    assert set(row['repo'] for row in rows) == {'/b'}
+    assert setup_store.regressions('files_exist.contributing', 5 * DAY,
+                                   until=5 * DAY) == []
+    assert setup_store.regressions('code_exists', 5 * DAY) == []
+
+def test_summary_counts_repositories(setup_store):
+    assert setup_store.summary() == [
+        {'rule_id': 'code_exists', 'status': PASS, 'repos': 3},
+        {'rule_id': 'files_exist.contributing', 'status': FAIL, 'repos': 1},
+        {'rule_id': 'files_exist.contributing', 'status': PASS, 'repos': 2}]
+
+def test_history_oldest_first(setup_store):
+    rows = setup_store.history('/c', 'files_exist.contributing')
+    assert [(row['checked_at'], row['status']) for row in rows] == [
+        (0, FAIL), (0, FAIL), (10 * DAY, FAIL), (10 * DAY, PASS)]
+
+def test_record_uses_absolute_paths(tmpdir):
+    store = ResultStore(str(tmpdir.join('results.db')))
+    with tmpdir.as_cwd():
+        store.record('repo', [Result('code_exists', PASS, 'code')])
+    assert store.latest()[0]['repo'] == str(tmpdir.join('repo'))
+    store.close()
+
+
+# Tests for openlinter.store.checked_commit()
+
+def test_checked_commit(tmpdir):
+    repo = git.Repo.init(str(tmpdir))
+    tmpdir.join('README').write('Read me.\n')
+    repo.index.add(['README'])
+    first = repo.index.commit('first').hexsha
+    repo.create_tag('v1')
+    repo.index.commit('second')
+    head = repo.head.commit.hexsha
+    assert checked_commit(str(tmpdir)) == head
+    assert checked_commit(str(tmpdir), repo.active_branch.name) == head
+    assert checked_commit(str(tmpdir), 'v1') == first
+    assert checked_commit(str(tmpdir), 'nosuchref') is None
+    assert checked_commit(str(tmpdir.mkdir('notgit'))) is None
+    assert checked_commit('https://example.com/repo.git') is None
+
+
+# Tests for openlinter.store.parse_time()
+
+def test_parse_time():
+    assert parse_time('2017-01-31') == parse_time('2017-01-31T00:00')
+    assert parse_time('2017-01-31T12:00') - parse_time('2017-01-31') == \
+        DAY / 2
+    assert abs(parse_time('0d') - parse_time('1d') - DAY) < 1
+    with pytest.raises(ValueError):
+        parse_time('last month')
+
+
+# Tests for openlinter --store and openlinter query
+
+def test_store_then_query(tmpdir, monkeypatch, capsys):
+    repo = tmpdir.mkdir('repo')
+    repo.join('README').write('Read me.\n')
+    rules = tmpdir.join('rules.yml')
+    rules.write('files_exist:\n- readme:\n  - README\n'
+                '- contributing:\n  - CONTRIBUTING\n')
+    db = str(tmpdir.join('results.db'))
+    monkeypatch.setattr(sys, 'argv', ['openlinter', '-d', str(repo), '-r',
+                                      str(rules), '--store', db])
+    linter.main()
+    capsys.readouterr()
+
+    monkeypatch.setattr(sys, 'argv', ['openlinter', 'query', 'failing',
+                                      '--store', db, '--format', 'json'])
+    linter.main()
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(row['repo'], row['rule_id']) for row in rows] == \
+        [(str(repo), 'files_exist.contributing')]
+    assert rows[0]['commit_sha'] is None
+
+    main(['summary', '--store', db])
+    assert capsys.readouterr().out.splitlines() == [
+        'files_exist.contributing\tfail\t1', 'files_exist.readme\tpass\t1']
+
+def test_query_needs_existing_database(tmpdir):
+    with pytest.raises(SystemExit):
+        main(['latest', '--store', str(tmpdir.join('missing.db'))])
+    assert not tmpdir.join('missing.db').check()
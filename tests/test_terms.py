@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+""" Automated tests for openlinter.terms using pytest. Run from the
+openlinter root directory with
+
+$ pytest tests/test_terms.py
+"""
+
+import pytest
+
+from openlinter.terms import *
+
+TERMS = {'whitelist': 'allowlist', 'sanity check': 'confidence check',
+         'sanity': None, 'man hours': 'person hours'}
+
+
+def found(text, terms=TERMS):
+    matcher = TermMatcher(terms)
+    return [(text[offset:offset + 20].split()[0], term)
+            for offset, term, _ in matcher.find(text)]
+
+
+# Tests for openlinter.terms.TermMatcher.find()
+
+@pytest.mark.parametrize('text, expected', [
+    ('Add it to the whitelist.', [('whitelist.', 'whitelist')]),
+    ('Whitelisted hosts', [('Whitelisted', 'whitelist')]),
+    ('WHITELISTS', [('WHITELISTS', 'whitelist')]),
+    ('whitelistedHosts = []', [('whitelistedHosts', 'whitelist')]),
+    ('ALLOWED_WHITELIST', [('WHITELIST', 'whitelist')]),
+    ('a sanity check here', [('sanity', 'sanity check')]),
+    ('sanity checks', [('sanity', 'sanity check')]),
+    ('for sanity, check', [('sanity,', 'sanity check')]),
+    ('insanity', []),
+    ('whitelisting', [('whitelisting', 'whitelist')]),
+    ('white list', []),
+    ('man hour', []),
+])
+def test_find(text, expected):
+    assert found(text) == expected
+
+def test_find_suggestion():
+    matcher = TermMatcher(TERMS)
+    assert list(matcher.find('man hours')) == [
+        (0, 'man hours', 'person hours')]
+
+def test_find_many_terms():
+    terms = {'term{}'.format(chr(97 + n % 26) * (n // 26 + 1)): None
+             for n in range(5000)}
+    terms['whitelist'] = 'allowlist'
+    assert found('the whitelist', terms) == [('whitelist', 'whitelist')]
+
+
+# Tests for openlinter.terms.find_terms()
+
+def test_find_terms_in_comments_and_strings():
+    text = ('whitelist = load("whitelist.txt")\n'
+            '\n'
+            'def check(host):\n'
+            '    # a sanity check of the whitelist\n'
+            '    return host in whitelist\n')
+    matcher = TermMatcher(TERMS)
+    assert list(find_terms(text, 'Python', matcher)) == [
+        (1, 'whitelist', 'allowlist'),
+        (4, 'sanity check', 'confidence check'),
+        (4, 'whitelist', 'allowlist')]
+
+def test_find_terms_without_lexer_is_prose():
+    text = 'Intro\n\nThe whitelist and\nthe sanity check.\n'
+    matcher = TermMatcher(TERMS)
+    assert [(line, term) for line, term, _ in
+            find_terms(text, None, matcher)] == [
+        (3, 'whitelist'), (4, 'sanity check')]
+
+
+# Tests for openlinter.terms.get_lexer()
+
+def test_get_lexer_is_shared():
+    assert get_lexer('Python') is get_lexer('Python')
+    assert get_lexer('No Such Language') is None
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+""" Automated tests for openlinter.treeindex using pytest. Run from the
+openlinter root directory with
+
+$ pytest tests/test_treeindex.py
+"""
+
+import os
+
+import git
+import pytest
+
+from openlinter.ignore import IgnoreRules
+from openlinter.rules import check_file_presence, check_for_code
+from openlinter.treeindex import *
+
+
+# Test fixtures
+
+@pytest.fixture()
+def setup_repo_history(tmpdir):
+    # First commit has only a README; the second adds code and ignores
+    # the build directory
+    root = tmpdir.mkdir('repo')
+    repo = git.Repo.init(str(root))
+    root.join('README').write('Read me.\n')
+    repo.index.add(['README'])
+    repo.index.commit('initial commit')
+    root.mkdir('src').join('main.h').write('int main(void);\n')
+    root.mkdir('build').join('out.c').write('int x;\n')
+    root.join('.gitignore').write('build/\n')
+    root.join('LICENSE').write('')
+    repo.index.add(['src/main.h', 'build/out.c', '.gitignore', 'LICENSE'])
+    repo.index.commit('add code')
+    return repo
+
+
+# Tests for openlinter.treeindex.GitTreeIndex
+
+def test_listdir_matches_tree(setup_repo_history):
+    index = GitTreeIndex(setup_repo_history.working_tree_dir)
+    names = sorted(entry.name for entry in index.listdir())
+    assert names == ['.gitignore', 'LICENSE', 'README', 'build', 'src']
+    src = index.get('src')
+    assert src.is_dir and not src.is_file
+    main = index.listdir('src')[0]
+    assert main.relpath == os.path.join('src', 'main.h')
+    assert main.size == len('int main(void);\n')
+
+def test_listdir_missing_directory(setup_repo_history):
+    index = GitTreeIndex(setup_repo_history.working_tree_dir)
+    with pytest.raises(FileNotFoundError):
+        index.listdir('nope')
+    with pytest.raises(NotADirectoryError):
+        index.listdir('README')
+
+def test_open_reads_blob(setup_repo_history):
+    index = GitTreeIndex(setup_repo_history.working_tree_dir)
+    with index.open(index.get('README')) as f:
+        assert f.read() == b'Read me.\n'
+    with index.open(index.get('README')) as f:
+        assert f.read(4) == b'Read'
+
+def test_older_ref(setup_repo_history):
+    index = GitTreeIndex(setup_repo_history.working_tree_dir, 'HEAD~1')
+    assert [entry.name for entry in index.listdir()] == ['README']
+    assert index.tree_sha == setup_repo_history.commit('HEAD~1').tree.hexsha
+
+def test_iter_files_applies_gitignore_blob(setup_repo_history):
+    index = GitTreeIndex(setup_repo_history.working_tree_dir,
+                         ignore=IgnoreRules())
+    paths = sorted(entry.relpath for entry in index.iter_files())
+    assert paths == ['.gitignore', 'LICENSE', 'README',
+                     os.path.join('src', 'main.h')]
+
+def test_bare_clone(setup_repo_history, tmpdir):
+    bare = setup_repo_history.clone(str(tmpdir.join('bare.git')), bare=True)
+    index = GitTreeIndex(bare.git_dir)
+    assert index.get('src') is not None
+    assert index.tree_sha == setup_repo_history.head.commit.tree.hexsha
+
+
+# Tests for openlinter.treeindex.open_blob()
+
+def test_open_blob(setup_repo_history):
+    from openlinter.gitrepo import GitContext
+    repository = GitContext(setup_repo_history.working_tree_dir)
+    sha = setup_repo_history.head.commit.tree['README'].hexsha
+    with open_blob(repository, sha) as f:
+        assert f.read(4) == b'Read'
+    with open_blob(repository, sha) as f:
+        assert f.read() == b'Read me.\n'
+    repository.close()
+
+
+# Tests for the file rules against a GitTreeIndex
+
+def test_check_file_presence_at_ref(setup_repo_history):
+    directory = setup_repo_history.working_tree_dir
+    head = GitTreeIndex(directory)
+    assert check_file_presence('README', directory, head)
+    assert check_file_presence('LICENSE', directory, head) is None
+    first = GitTreeIndex(directory, 'HEAD~1')
+    assert not check_file_presence('LICENSE', directory, first)
+
+def test_check_for_code_at_ref(setup_repo_history):
+    directory = setup_repo_history.working_tree_dir
+    os.remove(os.path.join(directory, 'src', 'main.h'))
+    assert check_for_code(directory, GitTreeIndex(directory))
+    first = GitTreeIndex(directory, 'HEAD~1', IgnoreRules())
+    assert not check_for_code(directory, first)
+
+
+# Tests for openlinter.openlinter.lint_directory() at a ref
+
+def test_lint_at_ref_closes_repository(setup_repo_history, monkeypatch):
+    import openlinter.gitrepo
+    from openlinter.openlinter import lint_directory
+    opened = []
+    class GitContext(openlinter.gitrepo.GitContext):
+        def __init__(self, repository):
+            super(GitContext, self).__init__(repository)
+            opened.append(self)
+    monkeypatch.setattr('openlinter.gitrepo.GitContext', GitContext)
+    results = []
+    lint_directory(setup_repo_history.working_tree_dir,
+                   {'code_exists': True}, report=results.append,
+                   ref='HEAD~1')
+    assert [result.status for result in results] == ['fail']
+    assert len(opened) == 1
+    assert opened[0]._repo is None
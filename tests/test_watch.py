@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+""" Automated tests for openlinter.watch using pytest. Run from the
+openlinter root directory with
+
+$ pytest tests/test_watch.py
+"""
+
+import errno
+import logging
+import queue
+
+import pytest
+
+import openlinter.watch as watch
+from openlinter.watch import *
+
+pytestmark = pytest.mark.skipif(not watch_supported(),
+                                reason='needs inotify')
+
+
+# Test fixtures
+
+@pytest.fixture()
+def setup_tree(tmpdir):
+    tmpdir.join('.gitignore').write('build/\n*.o\n')
+    for name in ('src', 'build', 'node_modules', '.git'):
+        tmpdir.mkdir(name)
+    return tmpdir
+
+
+@pytest.fixture()
+def watcher():
+    changed = queue.Queue()
+    watcher = Watcher(changed.put)
+    watcher.changed = changed
+    yield watcher
+    watcher.close()
+
+
+def watched(watcher):
+    return sorted(path for _, path in watcher._watches.values())
+
+
+# Tests for openlinter.watch.Watcher
+
+def test_watch_leaves_out_skipped_directories(setup_tree, watcher):
+    watcher.watch(str(setup_tree), {'skip_directories': ['node_modules']})
+    assert watched(watcher) == [str(setup_tree),
+                                str(setup_tree.join('src'))]
+
+def test_watch_ignores_changes_to_ignored_files(setup_tree, watcher):
+    watcher.watch(str(setup_tree))
+    setup_tree.join('src', 'main.o').write('')
+    setup_tree.join('build', 'main').write('')
+    with pytest.raises(queue.Empty):
+        watcher.changed.get(timeout=0.3)
+    setup_tree.join('src', 'main.c').write('int x;\n')
+    assert watcher.changed.get(timeout=5) == str(setup_tree)
+
+def test_watch_new_directory(setup_tree, watcher):
+    watcher.watch(str(setup_tree))
+    setup_tree.mkdir('docs')
+    assert watcher.changed.get(timeout=5) == str(setup_tree)
+    setup_tree.join('docs', 'index.md').write('# Docs\n')
+    assert watcher.changed.get(timeout=5) == str(setup_tree)
+
+def test_watch_limit_reached(setup_tree, watcher, monkeypatch, caplog):
+    class FullLibc(object):
+        def inotify_add_watch(self, fd, path, mask):
+            return -1
+    monkeypatch.setattr(watcher, '_libc', FullLibc())
+    monkeypatch.setattr(watch.ctypes, 'get_errno', lambda: errno.ENOSPC)
+    with caplog.at_level(logging.WARNING, logger='openlinter.watch'):
+        watcher.watch(str(setup_tree))
+        watcher._add_tree(str(setup_tree), str(setup_tree.join('src')))
+    assert watched(watcher) == []
+    assert len(caplog.records) == 1
+    assert 'watch limit reached' in caplog.records[0].getMessage()